@@ -0,0 +1,169 @@
+import numpy as np
+from typing import Optional
+
+
+class BruteForceIndex:
+    """Exact reference index: every training row is a candidate."""
+
+    kind = "brute"
+
+    def candidates(self, scaled_query: np.ndarray) -> Optional[np.ndarray]:
+        """Return None, meaning score the full training matrix"""
+        return None
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the K-means clusters.
+
+    Each cluster is a coarse cell holding the training rows assigned to it.
+    A query only scores the rows of the n_probe cells whose centroids are
+    closest to it, trading recall for latency. n_probe equal to the number
+    of clusters is exact.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, centroids: np.ndarray, labels: np.ndarray, n_probe: int = 2):
+        """
+        Build the cell lists.
+
+        Args:
+            centroids (np.ndarray): Cluster centers in scaled feature space
+            labels (np.ndarray): Cluster of every training row
+            n_probe (int): Number of nearest cells to score per query
+        """
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.n_cells = len(self.centroids)
+        self.n_probe = n_probe
+
+        # Rows of cell c are _rows[_offsets[c]:_offsets[c + 1]], ascending
+        self._rows = np.argsort(labels, kind="stable").astype(np.int32)
+        self._offsets = np.searchsorted(
+            np.asarray(labels)[self._rows], np.arange(self.n_cells + 1)
+        )
+
+    def nearest_cells(self, scaled_query: np.ndarray) -> np.ndarray:
+        """Return the n_probe cells closest to the query, nearest first"""
+        distances = ((self.centroids - scaled_query[0]) ** 2).sum(axis=1)
+        return np.argsort(distances, kind="stable")[: max(1, self.n_probe)]
+
+    def candidates(self, scaled_query: np.ndarray) -> Optional[np.ndarray]:
+        """Return the ascending training rows of the probed cells"""
+        if self.n_probe >= self.n_cells:
+            return None
+        cells = self.nearest_cells(scaled_query)
+        rows = np.concatenate(
+            [self._rows[self._offsets[c] : self._offsets[c + 1]] for c in cells]
+        )
+        return np.sort(rows)
+
+
+class ClusterIndex(IVFIndex):
+    """
+    IVF index that stores each cluster's rows as a contiguous sub-matrix.
+
+    Training rows are laid out sorted by (cluster, genre, row), so the rows
+    of a probed cluster are a slice of one matrix and score with a single
+    matrix-vector product, without gathering rows first. Within a cluster
+    each genre is again a contiguous range, which makes those ranges the
+    genre posting lists: the genre boost is applied to one slice. Work per
+    query is about n_probe / n_clusters of a full scan.
+    """
+
+    kind = "cluster"
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        labels: np.ndarray,
+        features: np.ndarray,
+        genre_codes: np.ndarray,
+        n_probe: int = 2,
+    ):
+        """
+        Build the clustered layout.
+
+        Args:
+            centroids (np.ndarray): Cluster centers in scaled feature space
+            labels (np.ndarray): Cluster of every training row
+            features (np.ndarray): Weighted, normalized training features
+            genre_codes (np.ndarray): Genre code of every training row
+            n_probe (int): Number of nearest clusters to score per query
+        """
+        super().__init__(centroids, labels, n_probe=n_probe)
+        labels = np.asarray(labels)
+        genre_codes = np.asarray(genre_codes)
+        self.n_genres = int(genre_codes.max()) + 1 if len(genre_codes) else 1
+
+        # Rows of cluster c are _rows[_offsets[c]:_offsets[c + 1]]; inside it,
+        # rows of genre g are _rows[_genre_offsets[c * n_genres + g]:...]
+        self._rows = np.lexsort((genre_codes, labels)).astype(np.int32)
+        keys = (
+            labels[self._rows].astype(np.int64) * self.n_genres
+            + genre_codes[self._rows]
+        )
+        self._genre_offsets = np.searchsorted(
+            keys, np.arange(self.n_cells * self.n_genres + 1)
+        )
+        self._offsets = self._genre_offsets[:: self.n_genres]
+        self.features = np.ascontiguousarray(features[self._rows])
+
+    def cell_range(self, cell: int):
+        """Return (start, stop) of a cluster in the clustered layout"""
+        return int(self._offsets[cell]), int(self._offsets[cell + 1])
+
+    def cell_rows(self, cell: int) -> np.ndarray:
+        """Return the training rows of a cluster, in layout order"""
+        return self._rows[self._offsets[cell] : self._offsets[cell + 1]]
+
+    def genre_range(self, cell: int, genre_code: int):
+        """Return (start, stop) of a cluster's rows of one genre in the layout"""
+        key = cell * self.n_genres + genre_code
+        return int(self._genre_offsets[key]), int(self._genre_offsets[key + 1])
+
+    def candidates(self, scaled_query: np.ndarray) -> Optional[np.ndarray]:
+        """Return the training rows of the probed cells, in layout order"""
+        cells = self.nearest_cells(scaled_query)
+        return np.concatenate([self.cell_rows(c) for c in cells])
+
+
+def check_n_probe(n_probe: int) -> int:
+    """Return n_probe, or raise ValueError unless it is a positive integer"""
+    if isinstance(n_probe, bool) or not isinstance(n_probe, (int, np.integer)):
+        raise ValueError(f"n_probe must be an integer, got {n_probe!r}")
+    if n_probe < 1:
+        raise ValueError(f"n_probe must be at least 1, got {n_probe}")
+    return n_probe
+
+
+def build_index(
+    kind: str,
+    centroids: np.ndarray,
+    labels: np.ndarray,
+    n_probe: int = 2,
+    features: Optional[np.ndarray] = None,
+    genre_codes: Optional[np.ndarray] = None,
+):
+    """
+    Create the candidate index used by HybridRecommender.
+
+    Args:
+        kind (str): "brute" for exact scoring, "ivf" for cluster probing, or
+            "cluster" for cluster probing over contiguous sub-matrices
+        centroids (np.ndarray): K-means cluster centers
+        labels (np.ndarray): Cluster label of every training row
+        n_probe (int): Number of cells an IVF or cluster index probes per query
+        features (np.ndarray): Weighted training features, for "cluster"
+        genre_codes (np.ndarray): Training genre codes, for "cluster"
+
+    Returns:
+        BruteForceIndex | IVFIndex | ClusterIndex: The configured index
+    """
+    if kind == "brute":
+        return BruteForceIndex()
+    if kind == "ivf":
+        return IVFIndex(centroids, labels, n_probe=n_probe)
+    if kind == "cluster":
+        return ClusterIndex(centroids, labels, features, genre_codes, n_probe=n_probe)
+    raise ValueError(f"Unknown index kind: {kind}")
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Bump whenever the set or meaning of stored arrays changes
+ARTIFACT_VERSION = 1
+
+META_FILE = "meta.json"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_key(fingerprint: str, params: Dict[str, Any]) -> str:
+    """
+    Key a model artifact by dataset contents, hyperparameters and format version.
+
+    Args:
+        fingerprint (str): Content hash of the training dataset
+        params (dict): JSON-serializable hyperparameters
+
+    Returns:
+        str: Short hex key used as the artifact directory name
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{ARTIFACT_VERSION}".encode())
+    digest.update(fingerprint.encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def save_artifact(
+    directory: str, key: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]
+) -> str:
+    """
+    Write an artifact as one .npy file per array plus a meta.json.
+
+    The artifact is written to a temporary directory and renamed into place,
+    so concurrent workers never see a partial artifact. If another process
+    wins the race, its artifact is kept.
+
+    Args:
+        directory (str): Root directory holding all artifacts
+        key (str): Artifact key from artifact_key()
+        arrays (dict): Array name -> array
+        meta (dict): Extra JSON-serializable metadata
+
+    Returns:
+        str: Path of the artifact directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, key)
+    staging = tempfile.mkdtemp(prefix=f".{key}-", dir=directory)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        meta = {
+            **meta,
+            "version": ARTIFACT_VERSION,
+            "key": key,
+            "arrays": sorted(arrays),
+            "created": time.time(),
+        }
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(staging, target)
+    except OSError:
+        if not os.path.exists(os.path.join(target, META_FILE)):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def load_artifact(directory: str, key: str) -> Optional[Dict[str, Any]]:
+    """
+    Load an artifact with every array memory-mapped read-only.
+
+    Args:
+        directory (str): Root directory holding all artifacts
+        key (str): Artifact key from artifact_key()
+
+    Returns:
+        dict | None: {"meta": dict, "arrays": dict}, or None if the artifact
+        is missing or was written by a different format version
+    """
+    path = os.path.join(directory, key)
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != ARTIFACT_VERSION:
+        return None
+
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in meta["arrays"]
+    }
+    return {"meta": meta, "arrays": arrays}
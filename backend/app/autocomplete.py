@@ -0,0 +1,133 @@
+import heapq
+import time
+from bisect import bisect_left
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Sorts after any character that can follow a prefix
+PREFIX_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace"""
+    return " ".join(str(text).lower().split())
+
+
+class AutocompleteIndex:
+    """
+    Prefix completion over track titles and artist names, ranked by popularity.
+
+    Normalized titles and artists are kept in one sorted array, so the
+    entries completing a prefix form a contiguous range found by bisection.
+    A sparse table answers "most popular entry in a range" in O(1), and the
+    top k are drawn from a heap of at most k + 1 sub-ranges, so a query
+    costs O(log n + k log k) however many entries match.
+    """
+
+    TRACK_NAME = "track_name"
+    ARTISTS = "artists"
+
+    def __init__(self, df: pd.DataFrame, logger=None):
+        """
+        Build the index over the first row of every track_id.
+
+        Args:
+            df (pd.DataFrame): Catalog with track_id, track_name, artists and
+                popularity columns
+            logger (logging.Logger): Optional logger for build statistics
+        """
+        start_time = time.time()
+        tracks = df.drop_duplicates("track_id")
+        positions = pd.Series(
+            np.flatnonzero(~df["track_id"].duplicated().to_numpy()), index=tracks.index
+        )
+
+        # The CSV separates multiple artists with ";"
+        artists = tracks["artists"].astype(str).str.split(";").explode()
+        entries = pd.DataFrame(
+            {
+                "key": pd.concat(
+                    [tracks["track_name"].astype(str), artists], ignore_index=True
+                ).map(normalize),
+                "row": np.concatenate(
+                    [positions.to_numpy(), positions.loc[artists.index].to_numpy()]
+                ),
+                "field": [self.TRACK_NAME] * len(tracks)
+                + [self.ARTISTS] * len(artists),
+            }
+        )
+        entries = entries[entries["key"] != ""]
+        entries = entries.drop_duplicates(["key", "row"]).sort_values(
+            "key", kind="stable"
+        )
+
+        self.keys = entries["key"].tolist()
+        self.rows = entries["row"].to_numpy(dtype=np.int32)
+        self.fields = entries["field"].to_numpy()
+        self.popularity = df["popularity"].to_numpy()[self.rows]
+        self._sparse_table = self._build_sparse_table(self.popularity)
+
+        if logger is not None:
+            logger.info(
+                f"Autocomplete index built over {len(self.keys)} entries in "
+                f"{time.time() - start_time:.2f} seconds"
+            )
+
+    @staticmethod
+    def _build_sparse_table(values: np.ndarray) -> List[np.ndarray]:
+        """table[j][i] is the position of the max of values[i:i + 2**j]"""
+        table = [np.arange(len(values), dtype=np.int32)]
+        width = 2
+        while width <= len(values):
+            previous, half = table[-1], width // 2
+            left = previous[: len(values) - width + 1]
+            right = previous[half : half + len(left)]
+            table.append(np.where(values[right] > values[left], right, left))
+            width *= 2
+        return table
+
+    def _range_max(self, lo: int, hi: int) -> int:
+        """Position of the most popular entry in [lo, hi), leftmost on ties"""
+        level = (hi - lo).bit_length() - 1
+        a = self._sparse_table[level][lo]
+        b = self._sparse_table[level][hi - (1 << level)]
+        return int(b if self.popularity[b] > self.popularity[a] else a)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """
+        Return the most popular tracks whose title or an artist starts with prefix.
+
+        Args:
+            prefix (str): Typed prefix, case-insensitive
+            limit (int): Maximum number of completions
+
+        Returns:
+            List[Tuple[int, str]]: (catalog row, matched field) pairs, most
+            popular first, one per track
+        """
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + PREFIX_END, lo)
+
+        results, seen = [], set()
+        heap = []
+
+        def push(a, b):
+            if a < b:
+                best = self._range_max(a, b)
+                heapq.heappush(heap, (-self.popularity[best], best, a, b))
+
+        push(lo, hi)
+        while heap and len(results) < limit:
+            _, best, a, b = heapq.heappop(heap)
+            row = int(self.rows[best])
+            if row not in seen:
+                seen.add(row)
+                results.append((row, self.fields[best]))
+            push(a, best)
+            push(best + 1, b)
+        return results
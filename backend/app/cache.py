@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+
+class RecommendationCache:
+    """
+    Size-bounded LRU cache of ranked recommendation lists.
+
+    Entries are keyed by (track_id, model version) and remember the limit
+    they were computed for. Rankings are deterministic and the 0.1 score
+    threshold only ever cuts a suffix, so a list computed for a larger limit
+    answers any smaller limit by slicing, and a list that came back shorter
+    than its limit answers every limit. Callers whose rankings depend on the
+    limit put it in the key instead. Looking up a new model version drops
+    all entries of the old one, so retraining or swapping the catalog never
+    serves stale results.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int): Entries kept before evicting the least
+                recently used one; 0 disables caching
+            ttl (float): Seconds an entry stays valid, or None for no expiry
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: Hashable):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, track_id: str, limit: int, version: Hashable) -> Optional[List]:
+        """Return the cached top-limit list, or None on a miss"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(track_id)
+            if entry is not None:
+                expires_at, cached_limit, recommendations = entry
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    del self._entries[track_id]
+                    self.expirations += 1
+                elif limit <= cached_limit or len(recommendations) < cached_limit:
+                    self._entries.move_to_end(track_id)
+                    self.hits += 1
+                    return recommendations[:limit]
+            self.misses += 1
+            return None
+
+    def put(self, track_id: str, limit: int, version: Hashable, recommendations):
+        """Store the list computed for limit, keeping the longer of two lists"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(track_id)
+            if entry is not None and entry[1] > limit:
+                self._entries.move_to_end(track_id)
+                return
+            expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[track_id] = (expires_at, limit, list(recommendations))
+            self._entries.move_to_end(track_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Current size and lifetime counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,300 @@
+import json
+import os
+import shutil
+import tempfile
+
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import file_digest
+
+# Explicit dtypes for every Spotify CSV column the service uses; anything
+# else in the file (e.g. the pandas index column) is dropped on load
+CATALOG_DTYPES = {
+    "track_id": "string",
+    "artists": "string",
+    "album_name": "string",
+    "track_name": "string",
+    "popularity": np.int16,
+    "duration_ms": np.int32,
+    "explicit": bool,
+    "danceability": np.float32,
+    "energy": np.float32,
+    "key": np.int8,
+    "loudness": np.float32,
+    "mode": np.int8,
+    "speechiness": np.float32,
+    "acousticness": np.float32,
+    "instrumentalness": np.float32,
+    "liveness": np.float32,
+    "valence": np.float32,
+    "tempo": np.float32,
+    "time_signature": np.int8,
+    "track_genre": "category",
+}
+
+STRING_COLUMNS = [c for c, dtype in CATALOG_DTYPES.items() if dtype == "string"]
+
+# Fields of an API Song, in response order
+SONG_COLUMNS = [
+    "track_id",
+    "artists",
+    "album_name",
+    "track_name",
+    "popularity",
+    "duration_ms",
+    "explicit",
+    "track_genre",
+    "danceability",
+    "energy",
+    "key",
+    "loudness",
+    "mode",
+    "speechiness",
+    "acousticness",
+    "instrumentalness",
+    "liveness",
+    "valence",
+    "tempo",
+    "time_signature",
+]
+
+COLUMNAR_VERSION = 1
+SCHEMA_FILE = "schema.json"
+
+
+def to_python_float(value) -> float:
+    """Convert a float32 via its shortest repr, so 0.756 does not become 0.75599998"""
+    return float(str(value))
+
+
+def _gather_column(series: pd.Series, positions: np.ndarray) -> list:
+    """Gather one column at positions as native Python values"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.to_numpy(dtype=object)
+        return categories[series.array.codes[positions]].tolist()
+    values = series.to_numpy()[positions]
+    if values.dtype == np.float32:
+        # Shortest repr per value; measurably faster than astype(str) here
+        return list(map(to_python_float, values))
+    return values.tolist()
+
+
+def gather_records(
+    df: pd.DataFrame, positions, columns: List[str] = SONG_COLUMNS
+) -> List[Dict[str, Any]]:
+    """
+    Materialize catalog rows as JSON-ready dicts.
+
+    Each column is gathered once with NumPy fancy indexing and converted with
+    tolist(), instead of building a pandas Series per row and casting field
+    by field.
+
+    Args:
+        df (pd.DataFrame): Catalog from load_catalog
+        positions (array-like): Catalog positions, in output order
+        columns (list): Columns to include
+
+    Returns:
+        list: One dict of str/int/float/bool values per position
+    """
+    positions = np.asarray(positions, dtype=np.intp)
+    values = [_gather_column(df[column], positions) for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(
+        path,
+        dtype={c: (object if d == "string" else d) for c, d in CATALOG_DTYPES.items()},
+        usecols=lambda column: column in CATALOG_DTYPES,
+    )
+    # A handful of rows in the Kaggle dataset have missing names
+    for column in STRING_COLUMNS:
+        df[column] = df[column].fillna("").astype(str)
+    return df[list(CATALOG_DTYPES)]
+
+
+def _read_columnar(path: str) -> pd.DataFrame:
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    if schema.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported columnar catalog version in {path}")
+
+    columns = {}
+    for column, kind in schema["columns"].items():
+        stem = os.path.join(path, column)
+        if kind == "string":
+            blob = np.load(f"{stem}.utf8.npy", mmap_mode="r")
+            offsets = np.load(f"{stem}.offsets.npy")
+            text = bytes(blob).decode("utf-8")
+            # Offsets are in characters of the decoded text
+            columns[column] = np.array(
+                [text[a:b] for a, b in zip(offsets[:-1], offsets[1:])], dtype=object
+            )
+        elif kind == "category":
+            columns[column] = pd.Categorical.from_codes(
+                np.load(f"{stem}.codes.npy"), schema["categories"][column]
+            )
+        else:
+            columns[column] = np.load(f"{stem}.npy", mmap_mode="r")
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_catalog(path: str) -> pd.DataFrame:
+    """
+    Load the track catalog with compact, explicit dtypes.
+
+    Args:
+        path (str): A Spotify CSV, or a columnar directory written by
+            convert_to_columnar()
+
+    Returns:
+        pd.DataFrame: The catalog, one row per CSV row
+    """
+    if os.path.isdir(path):
+        return _read_columnar(path)
+    return _read_csv(path)
+
+
+def iter_feature_chunks(
+    path: str, columns: List[str], chunk_size: int = 100000
+) -> Iterator[np.ndarray]:
+    """
+    Stream numeric catalog columns without loading the whole catalog.
+
+    A CSV is parsed chunk_size rows at a time with only the requested
+    columns; a columnar directory is sliced from its memory-mapped columns.
+
+    Args:
+        path (str): A Spotify CSV or a columnar catalog directory
+        columns (list): Numeric CATALOG_DTYPES columns, in output order
+        chunk_size (int): Rows per chunk
+
+    Yields:
+        np.ndarray: float32 array of shape (rows in chunk, len(columns)),
+        chunks in catalog row order
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            n_rows = json.load(f)["n_rows"]
+        arrays = [
+            np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r") for c in columns
+        ]
+        for start in range(0, n_rows, chunk_size):
+            yield np.column_stack(
+                [a[start : start + chunk_size] for a in arrays]
+            ).astype(np.float32, copy=False)
+        return
+
+    reader = pd.read_csv(
+        path,
+        usecols=columns,
+        dtype={c: CATALOG_DTYPES[c] for c in columns},
+        chunksize=chunk_size,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk[columns].to_numpy(dtype=np.float32)
+
+
+def append_rows(catalog: pd.DataFrame, rows) -> pd.DataFrame:
+    """
+    Return a new catalog with rows appended, cast to the catalog dtypes.
+
+    Args:
+        catalog (pd.DataFrame): Catalog from load_catalog
+        rows (pd.DataFrame | list): New rows with every CATALOG_DTYPES
+            column; extra columns are ignored
+
+    Returns:
+        pd.DataFrame: The combined catalog, renumbered from 0
+    """
+    rows = pd.DataFrame(rows)
+    missing = [column for column in CATALOG_DTYPES if column not in rows.columns]
+    if missing:
+        raise ValueError(f"New tracks are missing columns: {missing}")
+
+    rows = rows[list(CATALOG_DTYPES)].copy()
+    for column, dtype in CATALOG_DTYPES.items():
+        if dtype == "string":
+            rows[column] = rows[column].fillna("").astype(str).astype(object)
+        elif dtype == "category":
+            # Both sides need the same categories, or concat falls back to object
+            categories = catalog[column].cat.categories.union(
+                pd.Index(rows[column].astype(str).unique())
+            )
+            rows[column] = pd.Categorical(rows[column].astype(str), categories)
+            catalog = catalog.assign(
+                **{column: catalog[column].cat.set_categories(categories)}
+            )
+        else:
+            rows[column] = rows[column].astype(dtype)
+    return pd.concat([catalog, rows], ignore_index=True)
+
+
+def catalog_fingerprint(path: str) -> str:
+    """
+    Content hash identifying the catalog at path.
+
+    A columnar directory reports the digest of the CSV it was converted
+    from, so both forms of the same data share model artifacts.
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            return json.load(f)["source_digest"]
+    return file_digest(path)
+
+
+def convert_to_columnar(csv_path: str, out_dir: str) -> str:
+    """
+    Convert a catalog CSV into a directory of per-column .npy files.
+
+    Numeric columns are stored as-is and load memory-mapped. String columns
+    are stored as one UTF-8 blob plus character offsets, and the genre as
+    int16 codes plus its category list.
+
+    Args:
+        csv_path (str): Source CSV
+        out_dir (str): Directory to create; replaced atomically if it exists
+
+    Returns:
+        str: out_dir
+    """
+    df = _read_csv(csv_path)
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    staging = tempfile.mkdtemp(prefix=".catalog-", dir=parent)
+    schema = {
+        "version": COLUMNAR_VERSION,
+        "n_rows": len(df),
+        "source_digest": file_digest(csv_path),
+        "columns": {},
+        "categories": {},
+    }
+    try:
+        for column in df.columns:
+            stem = os.path.join(staging, column)
+            values = df[column]
+            if column in STRING_COLUMNS:
+                lengths = values.str.len().to_numpy(dtype=np.int64)
+                offsets = np.concatenate([[0], np.cumsum(lengths)])
+                blob = "".join(values.tolist()).encode("utf-8")
+                np.save(f"{stem}.utf8.npy", np.frombuffer(blob, dtype=np.uint8))
+                np.save(f"{stem}.offsets.npy", offsets)
+                schema["columns"][column] = "string"
+            elif isinstance(values.dtype, pd.CategoricalDtype):
+                np.save(f"{stem}.codes.npy", values.cat.codes.to_numpy(np.int16))
+                schema["categories"][column] = values.cat.categories.tolist()
+                schema["columns"][column] = "category"
+            else:
+                np.save(f"{stem}.npy", values.to_numpy())
+                schema["columns"][column] = "numeric"
+        with open(os.path.join(staging, SCHEMA_FILE), "w") as f:
+            json.dump(schema, f, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(staging, out_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return out_dir
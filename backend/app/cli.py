@@ -0,0 +1,319 @@
+"""
+Offline model tooling.
+
+Usage:
+    python -m app.cli build-artifacts --data data/spotify_data_cleaned.csv --out artifacts
+    python -m app.cli build-artifacts --data tracks.csv --training chunked --clustering minibatch
+    python -m app.cli build-neighbours --data data/spotify_data_cleaned.csv --neighbours 100 --jobs 8
+    python -m app.cli sweep-clusters --data data/spotify_data_cleaned.csv --cluster-counts 8 16 32 64 --jobs 4
+    python -m app.cli rank-agreement --index cluster --n-probe 1 2 3 --queries 500
+    python -m app.cli rank-agreement --index brute --quantization float32 float16 int8
+    python -m app.cli evaluate --data data/spotify_data_cleaned.csv --silhouette-sample 10000
+    python -m app.cli convert-catalog --data data/spotify_data_cleaned.csv --out data/spotify_data_cleaned.columns
+    python -m app.cli export recommendations --data data/spotify_data_cleaned.csv --out recommendations.ndjson --resume
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from .catalog import convert_to_columnar
+from .clustering import CLUSTERING_MODES, sweep_cluster_counts
+from .export import EXPORT_CHUNK_SIZE, export_catalog, export_recommendations
+from .neighbours import build_neighbour_table
+from .quantization import QUANTIZATION_MODES
+from .recommendation_model import HybridRecommender, TRAINING_MODES
+
+
+def _load_model(args, artifact_dir):
+    """Train or load the model described by the shared model arguments"""
+    return HybridRecommender(
+        n_clusters=args.clusters,
+        test_size=args.test_size,
+        data_path=args.data,
+        artifact_dir=artifact_dir,
+        clustering=args.clustering,
+        minibatch_size=args.minibatch_size,
+        training=args.training,
+        chunk_size=args.chunk_size,
+    )
+
+
+def _add_model_arguments(parser):
+    """Arguments that select the dataset and model hyperparameters"""
+    parser.add_argument("--data", default="data/spotify_data_cleaned.csv")
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--clustering", choices=CLUSTERING_MODES, default="kmeans")
+    parser.add_argument(
+        "--minibatch-size", type=int, default=4096, help="Rows per mini-batch"
+    )
+    parser.add_argument(
+        "--training",
+        choices=TRAINING_MODES,
+        default="memory",
+        help="chunked streams the catalog and trains out of core",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=100000, help="Rows per chunk when chunked"
+    )
+
+
+def build_artifacts(args):
+    """Train the model (or confirm an up-to-date artifact) and persist it"""
+    recommender = _load_model(args, args.out)
+    print(f"{args.out}/{recommender.model_version}")
+
+
+def build_neighbours(args):
+    """Precompute the top-N neighbour table served by get_recommendations"""
+    recommender = _load_model(args, args.artifacts)
+    print(
+        build_neighbour_table(
+            recommender,
+            n_neighbours=args.neighbours,
+            n_jobs=args.jobs,
+            block_size=args.block_size,
+        )
+    )
+
+
+def sweep_clusters(args):
+    """Compare cluster counts by training cost and cluster quality"""
+    recommender = _load_model(args, args.artifacts)
+    results = sweep_cluster_counts(
+        recommender.scaled_features_train,
+        args.cluster_counts,
+        mode=args.mode,
+        batch_size=args.minibatch_size,
+        n_passes=args.passes,
+        sample_size=args.silhouette_sample,
+        n_jobs=args.jobs,
+    )
+
+    print(
+        f"{'clusters':>8} {'mode':>9} {'train s':>8} {'peak MB':>8} "
+        f"{'inertia/row':>11} {'silhouette':>10} {'smallest':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['n_clusters']:>8} {r['mode']:>9} {r['train_seconds']:>8.2f} "
+            f"{r['peak_memory_mb']:>8.1f} {r['inertia_per_row']:>11.4f} "
+            f"{r['silhouette']:>10.4f} {r['smallest_cluster']:>8}"
+        )
+    best = max(results, key=lambda r: r["silhouette"])
+    print(f"Best silhouette: {best['n_clusters']} clusters")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def rank_agreement(args):
+    """Report how closely approximate scoring reproduces exact full-scan rankings"""
+    recommender = _load_model(args, args.artifacts)
+    recommender.neighbour_table = None  # Always score live
+    rng = np.random.default_rng(0)
+    track_ids = recommender.dataset["track_id"].to_numpy()
+    seeds = track_ids[rng.integers(0, len(track_ids), size=args.queries)]
+
+    print(
+        f"{'index':>12} {'quantization':>12} {'recall@k':>9} {'exact':>6} "
+        f"{'top1':>6} {'mean ms':>8} {'full scan ms':>12} {'scan MB':>8} "
+        f"{'saved MB':>8}"
+    )
+    for n_probe in args.n_probe:
+        recommender.set_index(args.index, n_probe=n_probe)
+        for quantization in args.quantization:
+            recommender.set_quantization(quantization)
+            agreement = recommender.rank_agreement(seeds, args.k)
+            saved = agreement["full_precision_bytes"] - agreement["scan_bytes"]
+            print(
+                f"{args.index + '/' + str(n_probe):>12} {quantization:>12} "
+                f"{agreement['recall_at_k']:9.3f} {agreement['exact_match']:6.2f} "
+                f"{agreement['top1_match']:6.2f} {agreement['latency_ms']:8.2f} "
+                f"{agreement['full_scan_latency_ms']:12.2f} "
+                f"{agreement['scan_bytes'] / 2**20:8.2f} {saved / 2**20:8.2f}"
+            )
+
+
+def evaluate(args):
+    """Generate the evaluation report and metrics for the current model"""
+    recommender = _load_model(args, args.artifacts)
+    recommender.generate_evaluation_report(
+        args.out, silhouette_sample_size=args.silhouette_sample
+    )
+
+
+def convert_catalog(args):
+    """Convert a catalog CSV into the memory-mappable columnar format"""
+    print(convert_to_columnar(args.data, args.out))
+
+
+def _resume_point(path):
+    """
+    Find where a partial export file left off.
+
+    Returns:
+        tuple: (last cursor, "" if none was written yet or None if the
+        export is complete, and the byte length through that cursor's line)
+    """
+    cursor, length, position = None, 0, 0
+    with open(path, "rb") as f:
+        for line in f:
+            position += len(line)
+            if line.startswith(b'{"cursor":'):
+                cursor, length = json.loads(line)["cursor"], position
+    if length and cursor is None:
+        return None, length
+    return cursor or "", length
+
+
+def export(args):
+    """Write the catalog or every track's recommendations as NDJSON"""
+    recommender = _load_model(args, args.artifacts)
+    cursor, mode = args.cursor, "wb"
+    if args.resume and os.path.exists(args.out):
+        cursor, length = _resume_point(args.out)
+        if cursor is None:
+            print(f"{args.out} is already complete")
+            return
+        # Drop any records written after the last cursor, then append
+        with open(args.out, "r+b") as f:
+            f.truncate(length)
+        mode = "ab"
+
+    if args.what == "catalog":
+        chunks = export_catalog(recommender, cursor, args.export_chunk_size)
+    else:
+        chunks = export_recommendations(
+            recommender, args.limit, cursor, args.export_chunk_size
+        )
+    with open(args.out, mode) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    print(args.out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser(
+        "build-artifacts", help="Train the model offline and write its artifact"
+    )
+    _add_model_arguments(build)
+    build.add_argument("--out", default="artifacts")
+    build.set_defaults(func=build_artifacts)
+
+    neighbours = commands.add_parser(
+        "build-neighbours", help="Precompute every track's top-N neighbours"
+    )
+    _add_model_arguments(neighbours)
+    neighbours.add_argument("--artifacts", default="artifacts")
+    neighbours.add_argument("--neighbours", type=int, default=100)
+    neighbours.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    neighbours.add_argument(
+        "--block-size", type=int, default=256, help="Tracks scored per block"
+    )
+    neighbours.set_defaults(func=build_neighbours)
+
+    sweep = commands.add_parser(
+        "sweep-clusters", help="Compare cluster counts by cost and quality"
+    )
+    _add_model_arguments(sweep)
+    sweep.add_argument("--artifacts", default="artifacts")
+    sweep.add_argument(
+        "--cluster-counts", type=int, nargs="+", default=[8, 16, 32, 64, 128]
+    )
+    sweep.add_argument("--mode", choices=CLUSTERING_MODES, default="minibatch")
+    sweep.add_argument(
+        "--passes", type=int, default=3, help="Mini-batch passes over the data"
+    )
+    sweep.add_argument(
+        "--silhouette-sample",
+        type=int,
+        default=10000,
+        help="Training rows sampled for the silhouette score",
+    )
+    sweep.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    sweep.add_argument("--json", help="Also write the results to this JSON file")
+    sweep.set_defaults(func=sweep_clusters)
+
+    agreement = commands.add_parser(
+        "rank-agreement", help="Compare approximate index rankings with a full scan"
+    )
+    _add_model_arguments(agreement)
+    agreement.add_argument("--artifacts", default="artifacts")
+    agreement.add_argument(
+        "--index", choices=["brute", "ivf", "cluster"], default="cluster"
+    )
+    agreement.add_argument("--n-probe", type=int, nargs="+", default=[1, 2, 3])
+    agreement.add_argument("--queries", type=int, default=500)
+    agreement.add_argument("--k", type=int, default=10)
+    agreement.add_argument(
+        "--quantization",
+        choices=QUANTIZATION_MODES,
+        nargs="+",
+        default=["float32"],
+        help="Scanned representations to compare; int8/float16 rescore in full precision",
+    )
+    agreement.set_defaults(func=rank_agreement)
+
+    report = commands.add_parser(
+        "evaluate", help="Generate the evaluation report and metrics offline"
+    )
+    _add_model_arguments(report)
+    report.add_argument("--artifacts", default="artifacts")
+    report.add_argument("--out", default="evaluation_report")
+    report.add_argument(
+        "--silhouette-sample",
+        type=int,
+        default=10000,
+        help="Test rows sampled for the silhouette score (0 = all)",
+    )
+    report.set_defaults(func=evaluate)
+
+    convert = commands.add_parser(
+        "convert-catalog", help="Convert a catalog CSV to per-column .npy files"
+    )
+    convert.add_argument("--data", default="data/spotify_data_cleaned.csv")
+    convert.add_argument("--out", default="data/spotify_data_cleaned.columns")
+    convert.set_defaults(func=convert_catalog)
+
+    dump = commands.add_parser(
+        "export", help="Write the catalog or all recommendations as NDJSON"
+    )
+    _add_model_arguments(dump)
+    dump.add_argument("what", choices=["catalog", "recommendations"])
+    dump.add_argument("--artifacts", default="artifacts")
+    dump.add_argument("--out", required=True)
+    dump.add_argument("--limit", type=int, default=10, help="Recommendations per track")
+    dump.add_argument(
+        "--export-chunk-size",
+        type=int,
+        default=EXPORT_CHUNK_SIZE,
+        help="Rows or seed tracks per chunk; a cursor line follows each",
+    )
+    dump.add_argument("--cursor", help="Resume from a cursor line of a previous run")
+    dump.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue a partial --out file from its last cursor",
+    )
+    dump.set_defaults(func=export)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import multiprocessing
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+CLUSTERING_MODES = ("kmeans", "minibatch")
+
+# K-means restarts per mode; part of the model hyperparameters
+N_INIT = {"kmeans": 10, "minibatch": 1}
+
+# Features shared with forked worker processes by sweep_cluster_counts
+_SWEEP = {}
+
+
+def make_clusterer(
+    mode: str,
+    n_clusters: int,
+    batch_size: int = 4096,
+    random_state: int = 42,
+    init=None,
+):
+    """
+    Create an unfitted clusterer for a training mode.
+
+    "kmeans" is full-batch K-means with 10 restarts. "minibatch" is
+    MiniBatchKMeans fed through partial_fit, initialized with k-means++ on
+    its first batch, or from init, an array of starting centers.
+    scikit-learn is imported here, so only training processes pay for it.
+    """
+    if mode == "kmeans":
+        from sklearn.cluster import KMeans
+
+        return KMeans(
+            n_clusters=n_clusters, random_state=random_state, n_init=N_INIT[mode]
+        )
+    if mode == "minibatch":
+        from sklearn.cluster import MiniBatchKMeans
+
+        return MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=batch_size,
+            n_init=N_INIT[mode],
+            random_state=random_state,
+            init="k-means++" if init is None else init,
+        )
+    raise ValueError(f"Unknown clustering mode {mode!r}, use one of {CLUSTERING_MODES}")
+
+
+def shuffled_batches(
+    features: np.ndarray,
+    batch_size: int,
+    n_passes: int = 3,
+    random_state: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """Yield n_passes shuffled passes over features, batch_size rows at a time"""
+    rng = np.random.default_rng(random_state)
+    for _ in range(n_passes):
+        order = rng.permutation(len(features))
+        for start in range(0, len(order), batch_size):
+            # Sorted indices keep the gather sequential, e.g. on a memmap
+            yield features[np.sort(order[start : start + batch_size])]
+
+
+def partial_fit_batches(clusterer, batches: Iterable[np.ndarray]):
+    """Stream batches through clusterer.partial_fit and return it"""
+    for batch in batches:
+        clusterer.partial_fit(batch)
+    return clusterer
+
+
+def nearest_centers(
+    features: np.ndarray, centers: np.ndarray, chunk_size: int = 65536
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assign each row to its nearest center, a chunk of rows at a time.
+
+    Returns:
+        tuple: (int64 labels, squared distance of each row to its center)
+    """
+    center_norms = (centers**2).sum(axis=1)
+    labels = np.empty(len(features), dtype=np.int64)
+    distances = np.empty(len(features))
+    for start in range(0, len(features), chunk_size):
+        chunk = np.asarray(features[start : start + chunk_size])
+        # |x - c|^2 without the |x|^2 term, which is constant per row
+        partial = center_norms - 2 * chunk @ centers.T
+        chunk_labels = np.argmin(partial, axis=1)
+        labels[start : start + len(chunk)] = chunk_labels
+        distances[start : start + len(chunk)] = np.maximum(
+            partial[np.arange(len(chunk)), chunk_labels] + (chunk**2).sum(axis=1), 0
+        )
+    return labels, distances
+
+
+def _evaluate_cluster_count(n_clusters: int) -> Dict[str, Any]:
+    """Train one configuration and measure its cost and cluster quality"""
+    from sklearn.metrics import silhouette_score
+
+    features = _SWEEP["features"]
+    mode = _SWEEP["mode"]
+    random_state = _SWEEP["random_state"]
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    clusterer = make_clusterer(
+        mode, n_clusters, _SWEEP["batch_size"], random_state=random_state
+    )
+    if mode == "minibatch":
+        partial_fit_batches(
+            clusterer,
+            shuffled_batches(
+                features, _SWEEP["batch_size"], _SWEEP["n_passes"], random_state
+            ),
+        )
+    else:
+        clusterer.fit(features)
+    train_seconds = time.perf_counter() - start_time
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    labels, distances = nearest_centers(features, clusterer.cluster_centers_)
+    sample_size = _SWEEP["sample_size"]
+    silhouette = silhouette_score(
+        features,
+        labels,
+        sample_size=sample_size if sample_size < len(features) else None,
+        random_state=random_state,
+    )
+    return {
+        "n_clusters": n_clusters,
+        "mode": mode,
+        "train_seconds": train_seconds,
+        "peak_memory_mb": peak_bytes / 2**20,
+        "inertia_per_row": float(distances.mean()),
+        "silhouette": float(silhouette),
+        "smallest_cluster": int(np.bincount(labels, minlength=n_clusters).min()),
+    }
+
+
+def sweep_cluster_counts(
+    features: np.ndarray,
+    cluster_counts: List[int],
+    mode: str = "minibatch",
+    batch_size: int = 4096,
+    n_passes: int = 3,
+    sample_size: int = 10000,
+    n_jobs: int = 1,
+    random_state: int = 42,
+) -> List[Dict[str, Any]]:
+    """
+    Train one model per cluster count and report cost and quality of each.
+
+    Configurations run in parallel forked worker processes that share the
+    feature matrix copy-on-write. Memory is the peak traced by tracemalloc
+    while training, which covers NumPy buffers but not the features
+    themselves.
+
+    Args:
+        features (np.ndarray): Scaled training features
+        cluster_counts (list): Cluster counts to try
+        mode (str): One of CLUSTERING_MODES
+        batch_size (int): Rows per mini-batch in "minibatch" mode
+        n_passes (int): Passes over the data in "minibatch" mode
+        sample_size (int): Rows sampled for the silhouette score
+        n_jobs (int): Worker processes; 1 runs in-process
+        random_state (int): Seed for initialization, batching and sampling
+
+    Returns:
+        list: One dict per cluster count with train_seconds, peak_memory_mb,
+        inertia_per_row, silhouette and smallest_cluster
+    """
+    make_clusterer(mode, 2)  # Validate the mode before forking
+    _SWEEP.update(
+        features=features,
+        mode=mode,
+        batch_size=batch_size,
+        n_passes=n_passes,
+        sample_size=sample_size,
+        random_state=random_state,
+    )
+    try:
+        if n_jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(n_jobs, mp_context=context) as pool:
+                return list(pool.map(_evaluate_cluster_count, cluster_counts))
+        return [_evaluate_cluster_count(k) for k in cluster_counts]
+    finally:
+        _SWEEP.clear()
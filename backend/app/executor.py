@@ -0,0 +1,79 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class OverloadedError(Exception):
+    """Raised when the executor has no free slot for a new task."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-bound request work, with admission control.
+
+    At most max_workers tasks run and max_pending more wait in the queue.
+    Anything beyond that is rejected immediately with OverloadedError, so
+    overload shows up as fast failures instead of ever-growing latency.
+    NumPy releases the GIL inside matrix products, so scoring scales across
+    threads.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        """
+        Create the pool.
+
+        Args:
+            max_workers (int): Worker threads
+            max_pending (int): Tasks allowed to queue behind busy workers
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="scoring")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on the pool and await its result.
+
+        Raises:
+            OverloadedError: If all worker and queue slots are taken
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise OverloadedError("Server is overloaded, try again later")
+        with self._lock:
+            self._in_flight += 1
+
+        # The slot is freed when the work actually finishes, even if the
+        # awaiting request is cancelled first
+        future = self._pool.submit(functools.partial(func, *args, **kwargs))
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        """Current load, queue depth and lifetime counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.max_workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,143 @@
+import hashlib
+from typing import Hashable, Iterator, Optional
+
+import numpy as np
+import orjson
+
+from .catalog import gather_records
+
+# Catalog rows, or seed tracks, per exported chunk; a cursor follows each
+EXPORT_CHUNK_SIZE = 1000
+# Peak float32 score matrix of one recommendation scoring block
+SCORE_BUDGET_BYTES = 64 * 2**20
+
+
+class StaleCursorError(ValueError):
+    """Raised when a cursor was issued for a different catalog or model."""
+
+
+def _version_tag(version: Hashable) -> str:
+    return hashlib.blake2b(repr(version).encode(), digest_size=6).hexdigest()
+
+
+def encode_cursor(version: Hashable, offset: int) -> str:
+    """Opaque resume token: the export version and the next offset"""
+    return f"{_version_tag(version)}.{offset}"
+
+
+def decode_cursor(cursor: Optional[str], version: Hashable, total: int) -> int:
+    """
+    Resolve a cursor to the offset to resume from.
+
+    Args:
+        cursor (str): Token from a previous export, or None to start over
+        version (Hashable): Version the export is running against
+        total (int): Number of exportable items
+
+    Returns:
+        int: Offset of the first item to export
+    """
+    if not cursor:
+        return 0
+    tag, _, offset = cursor.partition(".")
+    if not offset.isdigit() or int(offset) > total:
+        raise ValueError(f"Malformed export cursor {cursor!r}")
+    if tag != _version_tag(version):
+        raise StaleCursorError(
+            "The catalog or model changed since this cursor was issued; "
+            "restart the export without a cursor"
+        )
+    return int(offset)
+
+
+def _chunks(version: Hashable, total: int, start: int, chunk_size: int, lines):
+    """
+    Yield NDJSON chunks, each followed by a {"cursor": ...} line.
+
+    lines(start, stop) returns the serialized items of one chunk. The last
+    cursor is null, so a complete export can be told from a cut-off one.
+    """
+    for offset in range(start, total, chunk_size):
+        stop = min(offset + chunk_size, total)
+        cursor = orjson.dumps({"cursor": encode_cursor(version, stop)})
+        yield b"".join(lines(offset, stop)) + cursor + b"\n"
+    yield b'{"cursor":null}\n'
+
+
+def export_catalog(
+    recommender, cursor: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Stream every catalog row as NDJSON song records, in catalog order.
+
+    The cursor is validated before the first chunk, so a bad one fails the
+    request instead of cutting off the stream. Only one chunk of records is
+    materialized at a time.
+
+    Args:
+        recommender (HybridRecommender): Model whose catalog is exported;
+            cursors are tied to its model_version
+        cursor (str): Resume after the chunk that printed this cursor
+        chunk_size (int): Rows per chunk
+
+    Returns:
+        Iterator[bytes]: NDJSON chunks
+    """
+    df = recommender.dataset
+    version = recommender.model_version
+    start = decode_cursor(cursor, version, len(df))
+
+    def lines(offset, stop):
+        records = gather_records(df, np.arange(offset, stop))
+        return [orjson.dumps(record) + b"\n" for record in records]
+
+    return _chunks(version, len(df), start, chunk_size, lines)
+
+
+def export_recommendations(
+    recommender,
+    n_recommendations: int = 10,
+    cursor: Optional[str] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    score_budget: int = SCORE_BUDGET_BYTES,
+) -> Iterator[bytes]:
+    """
+    Stream every track's recommendations as NDJSON, one track per line.
+
+    Each chunk of seeds goes through get_recommendations_batch, so lines
+    match the batch endpoint. Seeds are scored in blocks sized to keep the
+    block x training rows score matrix within score_budget, which bounds
+    memory however large the catalog grows.
+
+    Args:
+        recommender (HybridRecommender): Model to export; cursors are tied
+            to its result_version
+        n_recommendations (int): Recommendations per track
+        cursor (str): Resume after the chunk that printed this cursor
+        chunk_size (int): Seed tracks per chunk
+        score_budget (int): Bytes of float32 scores per scoring block
+
+    Returns:
+        Iterator[bytes]: NDJSON chunks of {"track_id", "recommendations"}
+    """
+    version = recommender.result_version
+    # One seed per distinct track, in order of first appearance
+    track_ids = recommender.dataset["track_id"].to_numpy()
+    positions = recommender.track_index.canonical_positions()
+    start = decode_cursor(cursor, version, len(positions))
+    block_size = max(
+        1, min(chunk_size, score_budget // (4 * len(recommender.train_data)))
+    )
+
+    def lines(offset, stop):
+        seeds = track_ids[positions[offset:stop]].tolist()
+        results = recommender.get_recommendations_batch(
+            seeds, n_recommendations, block_size=block_size
+        )
+        return [
+            orjson.dumps({"track_id": track_id, "recommendations": results[track_id]})
+            + b"\n"
+            for track_id in seeds
+        ]
+
+    return _chunks(version, len(positions), start, chunk_size, lines)
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Popularity (0-100) is indexed in bands of this width
+POPULARITY_BAND = 10
+
+
+class TrackFilter(NamedTuple):
+    """
+    Constraints on the tracks a search or recommendation may return.
+
+    Values within a field are ORed (any of the genres, any of the keys) and
+    fields are ANDed; empty fields do not constrain. Hashable, so it can be
+    part of a cache key.
+    """
+
+    genres: Tuple[str, ...] = ()
+    explicit: Optional[bool] = None
+    keys: Tuple[int, ...] = ()
+    mode: Optional[int] = None
+    min_popularity: Optional[int] = None
+    max_popularity: Optional[int] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self == TrackFilter()
+
+
+def bitmap_contains(bitmap: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Boolean mask of which rows are set in a packed bitmap"""
+    rows = np.asarray(rows)
+    return ((bitmap[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+
+class FilterIndex:
+    """
+    Packed bitmaps of catalog rows by genre, explicit, key, mode and popularity band.
+
+    Each bitmap holds one bit per row (np.packbits order), so a filter is
+    resolved with a few byte-wise ORs and ANDs over n / 8 bytes instead of
+    comparisons over the catalog columns. Popularity bounds that fall inside
+    a band are finished with an exact comparison on that band's rows only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Build the bitmaps.
+
+        Args:
+            df (pd.DataFrame): Rows to index, e.g. the training partition
+        """
+        self.n_rows = len(df)
+        self.popularity = df["popularity"].to_numpy()
+        genre_codes, genres = pd.factorize(df["track_genre"])
+        self.genres = self._bitmaps(genre_codes, range(len(genres)), list(genres))
+        self.explicit = self._bitmaps(df["explicit"].to_numpy(), (False, True))
+        self.keys = self._bitmaps(df["key"].to_numpy(), range(12))
+        self.modes = self._bitmaps(df["mode"].to_numpy(), (0, 1))
+        bands = np.minimum(self.popularity // POPULARITY_BAND, 100 // POPULARITY_BAND)
+        self.bands = self._bitmaps(bands, range(100 // POPULARITY_BAND + 1))
+
+    @staticmethod
+    def _bitmaps(values: np.ndarray, codes, names=None) -> Dict:
+        names = list(codes) if names is None else names
+        return {name: np.packbits(values == code) for code, name in zip(codes, names)}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            bitmap.nbytes
+            for group in (self.genres, self.explicit, self.keys, self.modes, self.bands)
+            for bitmap in group.values()
+        )
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def _any_of(self, group: Dict, values) -> np.ndarray:
+        bitmap = self._empty()
+        for value in values:
+            if value in group:
+                bitmap |= group[value]
+        return bitmap
+
+    def _popularity(self, low: int, high: int) -> np.ndarray:
+        """Rows with low <= popularity <= high"""
+        inner, edges = [], []
+        for band in range(low // POPULARITY_BAND, high // POPULARITY_BAND + 1):
+            start = band * POPULARITY_BAND
+            inside = low <= start and start + POPULARITY_BAND - 1 <= high
+            (inner if inside else edges).append(band)
+        bitmap = self._any_of(self.bands, inner)
+        if edges:
+            rows = np.flatnonzero(
+                np.unpackbits(self._any_of(self.bands, edges), count=self.n_rows)
+            )
+            popularity = self.popularity[rows]
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[rows[(popularity >= low) & (popularity <= high)]] = True
+            bitmap |= np.packbits(mask)
+        return bitmap
+
+    def bitmap(self, track_filter: Optional[TrackFilter]) -> Optional[np.ndarray]:
+        """
+        Resolve a filter to the packed bitmap of eligible rows.
+
+        Returns:
+            np.ndarray: Packed bitmap, or None when the filter is empty
+        """
+        if track_filter is None or track_filter.is_empty:
+            return None
+        parts = []
+        if track_filter.genres:
+            parts.append(self._any_of(self.genres, track_filter.genres))
+        if track_filter.explicit is not None:
+            parts.append(self.explicit[bool(track_filter.explicit)])
+        if track_filter.keys:
+            parts.append(self._any_of(self.keys, track_filter.keys))
+        if track_filter.mode is not None:
+            parts.append(self._any_of(self.modes, [track_filter.mode]))
+        if (
+            track_filter.min_popularity is not None
+            or track_filter.max_popularity is not None
+        ):
+            low = track_filter.min_popularity or 0
+            high = (
+                100
+                if track_filter.max_popularity is None
+                else track_filter.max_popularity
+            )
+            parts.append(self._popularity(low, high))
+
+        bitmap = parts[0].copy()
+        for part in parts[1:]:
+            bitmap &= part
+        return bitmap
+
+    def rows(self, track_filter: Optional[TrackFilter]) -> Optional[np.ndarray]:
+        """Ascending eligible rows, or None when the filter is empty"""
+        bitmap = self.bitmap(track_filter)
+        if bitmap is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
@@ -0,0 +1,247 @@
+import hashlib
+import zlib
+from typing import Callable, Hashable, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+
+try:
+    import brotli
+except ImportError:  # Optional; responses fall back to gzip
+    brotli = None
+
+# Content types worth compressing; already-compressed media is left alone
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def negotiate_encoding(headers: Headers) -> Optional[str]:
+    """The content coding a response to these request headers would use"""
+    accepted = set()
+    for part in headers.get("accept-encoding", "").lower().split(","):
+        coding, _, params = part.replace(" ", "").partition(";")
+        try:
+            weight = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            weight = 1.0
+        if weight > 0:
+            accepted.add(coding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def make_etag(version: Hashable, path: str, query_string: bytes, encoding) -> str:
+    """
+    Strong entity tag for a GET response.
+
+    Query parameters are sorted so equivalent URLs share a tag, and the
+    negotiated coding is included because compressed and identity bodies
+    are different representations.
+    """
+    query = urlencode(sorted(parse_qsl(query_string.decode("latin-1"), True)))
+    key = repr((version, path, query, encoding)).encode()
+    return '"' + hashlib.blake2b(key, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header's entity tags against a tag.
+
+    "*" is not a tag and never matches here; it depends on whether the
+    resource exists, which only the handler knows.
+    """
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+class ETagMiddleware:
+    """
+    ASGI middleware adding ETag and Cache-Control to deterministic GET routes.
+
+    A response is fully determined by the catalog/model version and the
+    request, so the tag is computed before the request reaches the app and
+    a matching If-None-Match is answered with 304 without searching or
+    scoring. The version is read before the handler runs, so a catalog
+    swap mid-request can only make a tag stale, never wrong.
+    """
+
+    def __init__(
+        self,
+        app,
+        version: Callable[[], Optional[Hashable]],
+        routes: Iterable[str],
+        max_age: int = 60,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI app
+            version (callable): Current result version, or None before startup
+            routes (iterable): Route templates to tag, e.g. "/api/songs/{track_id}"
+            max_age (int): Seconds clients and shared caches may reuse a response
+        """
+        self.app = app
+        self.version = version
+        self.routes = set(routes)
+        self.cache_control = f"public, max-age={max_age}"
+
+    @staticmethod
+    def _match_route(scope):
+        """The route the router will dispatch to, and its child scope"""
+        for route in scope["app"].router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return route, child_scope
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or "app" not in scope:
+            await self.app(scope, receive, send)
+            return
+        route, child_scope = self._match_route(scope)
+        version = self.version()
+        if getattr(route, "path", None) not in self.routes or version is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        etag = make_etag(
+            version, scope["path"], scope["query_string"], negotiate_encoding(headers)
+        )
+        cache_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", self.cache_control.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+        if_none_match = headers.get("if-none-match", "")
+        if etag_matches(if_none_match, etag):
+            # Label the request with its route, as the router would have
+            scope.update(child_scope)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": cache_headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # "*" matches any current representation, so it becomes a 304 only
+        # once the handler has produced a 200
+        match_any = if_none_match.strip() == "*"
+        not_modified = False
+
+        async def send_with_etag(message):
+            nonlocal not_modified
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                if match_any:
+                    not_modified = True
+                    message = {**message, "status": 304, "headers": cache_headers}
+                else:
+                    response_headers = MutableHeaders(scope=message)
+                    response_headers["etag"] = etag
+                    response_headers["cache-control"] = self.cache_control
+                    response_headers.add_vary_header("Accept-Encoding")
+            elif message["type"] == "http.response.body" and not_modified:
+                if message.get("more_body", False):
+                    return
+                message = {"type": "http.response.body", "body": b""}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON and text responses with brotli or gzip.
+
+    Unlike starlette's GZipMiddleware the output is deterministic (no gzip
+    timestamp), so a strong ETag keeps naming exactly one byte sequence.
+    Streamed responses are compressed chunk by chunk and flushed, so each
+    chunk reaches the client as soon as it is produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, level: int = 6):
+        """
+        Args:
+            app: The wrapped ASGI app
+            minimum_size (int): Smaller single-message bodies are sent as is
+            level (int): gzip level 1-9; brotli uses a matching quality
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    def _compressor(self, encoding: str):
+        """Return (compress, flush, finish) callables for one response"""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=min(self.level, 11))
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return (
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = "content-encoding" in headers or not headers.get(
+                    "content-type", ""
+                ).startswith(COMPRESSIBLE_TYPES)
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start_message)
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compress, flush, finish = compressor = self._compressor(encoding)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["content-length"]
+                    body = compress(body) + flush()
+                else:
+                    body = compress(body) + finish()
+                    headers["content-length"] = str(len(body))
+                await send(start_message)
+                await send({**message, "body": body})
+                return
+
+            compress, flush, finish = compressor
+            body = compress(body) + (flush() if more_body else finish())
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,323 @@
+import bisect
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from 50 microseconds to 10 seconds
+DEFAULT_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """
+    Cumulative latency histogram with one series per label combination.
+
+    Rendered in the Prometheus text exposition format, so p50/p99 can be
+    derived with histogram_quantile() on the scraping side.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        """Record one observation for the given label values, in labelnames order"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum
+                series = self._series[labelvalues] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            snapshot = [(k, list(v[0]), v[1]) for k, v in sorted(self._series.items())]
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, labelvalues, le=le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render_stats(
+    prefix: str, stats: Dict[str, float], counters: Iterable[str] = ()
+) -> List[str]:
+    """
+    Render a stats() dict as Prometheus gauges, or counters for keys in counters.
+
+    Counter samples get the conventional _total suffix.
+    """
+    counters = set(counters)
+    lines = []
+    for key, value in stats.items():
+        if value is None:
+            continue
+        kind = "counter" if key in counters else "gauge"
+        name = f"{prefix}_{key}_total" if kind == "counter" else f"{prefix}_{key}"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return lines
+
+
+STAGE_SECONDS = Histogram(
+    "predictify_stage_seconds",
+    "Time spent in each stage of a request",
+    labelnames=("operation", "stage"),
+)
+OPERATION_SECONDS = Histogram(
+    "predictify_operation_seconds",
+    "Time spent handling a search, lookup or recommendation call",
+    labelnames=("operation",),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "predictify_http_request_seconds",
+    "HTTP request latency including time queued for a worker",
+    labelnames=("method", "route", "status"),
+)
+
+
+class Trace:
+    """Stage timings of one request, accumulated by span()"""
+
+    __slots__ = ("operation", "stages", "profile")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.stages: Dict[str, float] = {}
+        self.profile: Optional[cProfile.Profile] = None
+
+
+class SlowRequestProfiler:
+    """
+    Report requests slower than a threshold, optionally with a cProfile dump.
+
+    Stage timings are always collected, so every slow request is reported
+    with its per-stage breakdown. Additionally a random sample_rate share of
+    requests runs under cProfile, which costs several times the request
+    time; when a sampled request turns out slow, its top functions by
+    cumulative time are included. Reports go to the hook, which logs them
+    by default.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 0,
+        sample_rate: float = 0.0,
+        hook: Optional[Callable[[Dict], None]] = None,
+        top_functions: int = 15,
+    ):
+        """
+        Configure the profiler.
+
+        Args:
+            threshold_ms (float): Report requests taking longer; 0 disables
+            sample_rate (float): Share of requests run under cProfile
+            hook (callable): Receives one report dict per slow request;
+                defaults to logging it as a warning
+            top_functions (int): Functions listed from a cProfile dump
+        """
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.hook = hook or self._log
+        self.top_functions = top_functions
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def should_profile(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def finish(self, trace: Trace, elapsed: float):
+        """Report the trace if it was slow"""
+        elapsed_ms = elapsed * 1000
+        if not self.enabled or elapsed_ms < self.threshold_ms:
+            return
+        report = {
+            "operation": trace.operation,
+            "elapsed_ms": elapsed_ms,
+            "stages_ms": {s: t * 1000 for s, t in trace.stages.items()},
+        }
+        if trace.profile is not None:
+            out = io.StringIO()
+            stats = pstats.Stats(trace.profile, stream=out)
+            stats.sort_stats("cumulative").print_stats(self.top_functions)
+            report["profile"] = out.getvalue()
+        try:
+            self.hook(report)
+        except Exception as e:
+            logger.error(f"Slow request hook failed: {str(e)}")
+
+    @staticmethod
+    def _log(report: Dict):
+        stages = ", ".join(f"{s} {t:.2f} ms" for s, t in report["stages_ms"].items())
+        message = (
+            f"Slow {report['operation']}: {report['elapsed_ms']:.1f} ms ({stages})"
+        )
+        if "profile" in report:
+            message += "\n" + report["profile"]
+        logger.warning(message)
+
+
+profiler = SlowRequestProfiler()
+
+_local = threading.local()
+
+
+@contextmanager
+def trace(operation: str):
+    """
+    Time one request and collect the span() timings recorded inside it.
+
+    Traces are per thread: a request runs start to finish on one worker
+    thread. A nested trace on the same thread is folded into the outer one.
+    """
+    if getattr(_local, "trace", None) is not None:
+        yield _local.trace
+        return
+    current = _local.trace = Trace(operation)
+    if profiler.should_profile():
+        current.profile = cProfile.Profile()
+        current.profile.enable()
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = time.perf_counter() - start
+        if current.profile is not None:
+            current.profile.disable()
+        _local.trace = None
+        OPERATION_SECONDS.observe(elapsed, operation)
+        profiler.finish(current, elapsed)
+
+
+class span:
+    """
+    Time one stage of the current request, as a context manager.
+
+    A plain class rather than a generator context manager, since it wraps
+    every stage of every request; outside a trace, e.g. in offline jobs, it
+    only costs an attribute lookup.
+    """
+
+    __slots__ = ("stage", "trace", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.trace = getattr(_local, "trace", None)
+        if self.trace is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            elapsed = time.perf_counter() - self.start
+            stages = self.trace.stages
+            stages[self.stage] = stages.get(self.stage, 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, self.trace.operation, self.stage)
+        return False
+
+
+def render_histograms() -> List[str]:
+    """Exposition lines of every request latency histogram"""
+    return (
+        HTTP_REQUEST_SECONDS.render()
+        + OPERATION_SECONDS.render()
+        + STAGE_SECONDS.render()
+    )
+
+
+class LatencyMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_SECONDS by route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route, so paths with IDs share a series
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+            )
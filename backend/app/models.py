@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional
 
 class Song(BaseModel):
     track_id: str
@@ -22,10 +22,45 @@ class Song(BaseModel):
     valence: float
     tempo: float
     time_signature: int
+    similarity_score: Optional[float] = None
 
 class SongResponse(BaseModel):
     songs: List[Song]
     total: int
 
 class ErrorResponse(BaseModel):
-    detail: str
\ No newline at end of file
+    detail: str
+
+class Completion(BaseModel):
+    track_id: str
+    track_name: str
+    artists: str
+    popularity: int
+    matched_field: str
+
+class AutocompleteResponse(BaseModel):
+    completions: List[Completion]
+    total: int
+
+class BatchRecommendationRequest(BaseModel):
+    track_ids: List[str] = Field(..., min_length=1, max_length=500)
+    limit: int = 5
+    merge: bool = False
+
+class BatchRecommendationResponse(BaseModel):
+    results: Dict[str, List[Song]] = {}
+    playlist: Optional[List[Song]] = None
+    missing: List[str] = []
+
+class CatalogUpdateRequest(BaseModel):
+    add: List[Song] = Field(default=[], max_length=10000)
+    remove: List[str] = Field(default=[], max_length=10000)
+
+class CatalogUpdateResponse(BaseModel):
+    # model_version is part of the API, not a pydantic "model_" attribute
+    model_config = ConfigDict(protected_namespaces=())
+
+    rows_added: int
+    rows_removed: int
+    total_rows: int
+    model_version: str
\ No newline at end of file
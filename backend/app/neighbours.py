@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .artifacts import ARTIFACT_VERSION, META_FILE, load_artifact
+from .ranking import top_k_indices
+
+# Recommender shared with forked worker processes by build_neighbour_table
+_JOB = {}
+
+
+def neighbour_table_key(model_version: str, n_neighbours: int) -> str:
+    """Artifact key of the top-n_neighbours table for a model version"""
+    return f"{model_version}-top{n_neighbours}"
+
+
+class NeighbourTable:
+    """
+    Precomputed top-N hybrid neighbours of every track in the catalog.
+
+    Row i holds the N best training rows for the track with TrackIndex
+    ordinal i, best first, and their normalized scores. Neighbours are ranked
+    without excluding the seed itself, so callers filter it out at lookup
+    time; the remaining order is exactly what live scoring with the seed
+    excluded returns. Scores are float16, i.e. accurate to about 5e-4.
+    """
+
+    def __init__(self, rows: np.ndarray, scores: np.ndarray, n_train_rows: int):
+        """
+        Wrap the table arrays.
+
+        Args:
+            rows (np.ndarray): int32 training rows, shape (tracks, N)
+            scores (np.ndarray): float16 normalized scores, shape (tracks, N)
+            n_train_rows (int): Training rows of the model the table was
+                computed for
+        """
+        self.rows = rows
+        self.scores = scores
+        self.n_neighbours = rows.shape[1]
+        # A table holding every training row can answer any limit
+        self.exhaustive = self.n_neighbours >= n_train_rows
+
+    @classmethod
+    def load(cls, directory: str, key: str) -> Optional["NeighbourTable"]:
+        """Memory-map a table written by build_neighbour_table, or None"""
+        artifact = load_artifact(directory, key)
+        if artifact is None:
+            return None
+        arrays = artifact["arrays"]
+        return cls(arrays["rows"], arrays["scores"], artifact["meta"]["n_train_rows"])
+
+    def lookup(
+        self, ordinal: int, excluded_rows: np.ndarray, limit: int
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the top-limit neighbours of a track, skipping excluded rows.
+
+        Returns:
+            tuple | None: (training rows, float64 scores), or None when the
+            table holds fewer than limit neighbours after exclusion
+        """
+        rows = self.rows[ordinal]
+        scores = self.scores[ordinal]
+        if len(excluded_rows):
+            keep = ~np.isin(rows, excluded_rows)
+            rows, scores = rows[keep], scores[keep]
+        if len(rows) < limit and not self.exhaustive:
+            return None
+        # Shortest float16 repr, so 0.989 is not reported as 0.98876953125
+        return np.asarray(rows[:limit]), scores[:limit].astype(str).astype(np.float64)
+
+
+def _compute_block(bounds):
+    """Score one block of tracks and write their neighbours into the table"""
+    start, stop = bounds
+    recommender = _JOB["recommender"]
+    n_neighbours = _JOB["n_neighbours"]
+    rows_out = np.load(_JOB["rows_path"], mmap_mode="r+")
+    scores_out = np.load(_JOB["scores_path"], mmap_mode="r+")
+
+    positions = _JOB["positions"][start:stop]
+    scaled_inputs, genres = recommender._seed_inputs(positions)
+    block_scores = recommender._score_train_rows_batch(scaled_inputs, genres)
+    for i, hybrid_scores in enumerate(block_scores):
+        score_min = float(hybrid_scores.min())
+        score_range = float(hybrid_scores.max()) - score_min + 1e-6
+        top_indices = top_k_indices(hybrid_scores, n_neighbours)
+        rows_out[start + i] = top_indices
+        scores_out[start + i] = (
+            hybrid_scores[top_indices].astype(np.float64) - score_min
+        ) / score_range
+    rows_out.flush()
+    scores_out.flush()
+    return stop - start
+
+
+def build_neighbour_table(
+    recommender, n_neighbours: int = 100, n_jobs: int = 1, block_size: int = 256
+) -> str:
+    """
+    Precompute the neighbour table of a trained recommender into its artifact_dir.
+
+    Tracks are scored in blocks of block_size with one matrix-matrix multiply
+    each, spread over n_jobs forked worker processes that write straight into
+    memory-mapped output arrays. The table is staged in a temporary directory
+    and renamed into place once complete.
+
+    Args:
+        recommender (HybridRecommender): Trained model with an artifact_dir
+        n_neighbours (int): Neighbours kept per track (N)
+        n_jobs (int): Worker processes; 1 computes in-process
+        block_size (int): Tracks scored per block; bounds per-worker memory
+            to block_size x training rows float32 scores
+
+    Returns:
+        str: Path of the written table
+    """
+    directory = recommender.artifact_dir
+    key = neighbour_table_key(recommender.model_version, n_neighbours)
+    positions = recommender.track_index.canonical_positions()
+    n_train_rows = len(recommender.train_data)
+    n_neighbours = min(n_neighbours, n_train_rows)
+    shape = (len(positions), n_neighbours)
+
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, key)
+    staging = tempfile.mkdtemp(prefix=f".{key}-", dir=directory)
+    try:
+        rows_path = os.path.join(staging, "rows.npy")
+        scores_path = os.path.join(staging, "scores.npy")
+        for path, dtype in [(rows_path, np.int32), (scores_path, np.float16)]:
+            np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+        _JOB.update(
+            recommender=recommender,
+            n_neighbours=n_neighbours,
+            positions=positions,
+            rows_path=rows_path,
+            scores_path=scores_path,
+        )
+        blocks = [
+            (start, min(start + block_size, len(positions)))
+            for start in range(0, len(positions), block_size)
+        ]
+        start_time = time.time()
+        if n_jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(n_jobs, mp_context=context) as pool:
+                list(pool.map(_compute_block, blocks))
+        else:
+            for block in blocks:
+                _compute_block(block)
+        recommender.logger.info(
+            f"Neighbour table for {len(positions)} tracks computed in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+
+        meta = {
+            "version": ARTIFACT_VERSION,
+            "key": key,
+            "arrays": ["rows", "scores"],
+            "model_version": recommender.model_version,
+            "n_neighbours": n_neighbours,
+            "n_train_rows": n_train_rows,
+            "created": time.time(),
+        }
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    finally:
+        _JOB.clear()
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
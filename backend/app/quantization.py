@@ -0,0 +1,92 @@
+import numpy as np
+from typing import Optional
+
+QUANTIZATION_MODES = ("float32", "float16", "int8")
+
+
+class QuantizedFeatures:
+    """
+    Compact copy of the weighted, normalized training matrix for scanning.
+
+    "float16" stores each value as a half-precision float. "int8" maps each
+    feature's [min, max] range linearly onto 256 levels, so a value decodes
+    as code * scale + offset, and for a query q
+
+        q . x ~= (q * scale) . code + q . offset
+
+    is one product over the codes plus a precomputed bias. Dot products are
+    approximate, to about half a quantization step per feature, so callers
+    rescore their shortlist against the full-precision matrix.
+
+    Codes are stored feature-major, one contiguous array per feature, and
+    scanned in blocks of rows that are widened to float32 just before the
+    product, which keeps the int8 scan as fast as the float32 one.
+    """
+
+    def __init__(self, features: np.ndarray, mode: str, block_rows: int = 16384):
+        """
+        Quantize a feature matrix block by block.
+
+        Args:
+            features (np.ndarray): Full-precision matrix, shape (n, n_features);
+                may be memory-mapped
+            mode (str): "float16" or "int8"
+            block_rows (int): Rows widened to float32 at a time when scanning
+        """
+        if mode not in ("float16", "int8"):
+            raise ValueError(f"Unknown quantization mode {mode!r}, use float16 or int8")
+        n_rows, n_features = features.shape
+        self.mode = mode
+        self.block_rows = block_rows
+        self.scale = np.ones(n_features, dtype=np.float32)
+        self.offset = np.zeros(n_features, dtype=np.float32)
+
+        if mode == "int8":
+            low = np.zeros(n_features, dtype=np.float32)
+            high = np.zeros(n_features, dtype=np.float32)
+            if n_rows:
+                low[:], high[:] = np.inf, -np.inf
+            for start in range(0, n_rows, block_rows):
+                block = np.asarray(features[start : start + block_rows])
+                low = np.minimum(low, block.min(axis=0))
+                high = np.maximum(high, block.max(axis=0))
+            step = (high - low) / 255
+            step[step == 0] = 1.0  # Constant features decode exactly to low
+            self.scale[:] = step
+            self.offset[:] = low + 128 * step
+
+        self.codes = np.empty((n_features, n_rows), dtype=mode)
+        for start in range(0, n_rows, block_rows):
+            block = np.asarray(features[start : start + block_rows], dtype=np.float32)
+            if mode == "int8":
+                block = np.rint((block - low) / step) - 128
+                np.clip(block, -128, 127, out=block)
+            self.codes[:, start : start + len(block)] = block.T
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scale.nbytes + self.offset.nbytes
+
+    def dot(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Approximate queries @ features[rows].T.
+
+        Args:
+            queries (np.ndarray): Query vectors, shape (b, n_features)
+            rows (np.ndarray): Rows to score; all rows if None
+
+        Returns:
+            np.ndarray: float32 similarities, shape (b, scored rows)
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        weights = queries * self.scale
+        bias = queries @ self.offset
+
+        codes = self.codes if rows is None else self.codes[:, rows]
+        n_rows = codes.shape[1]
+        out = np.empty((len(queries), n_rows), dtype=np.float32)
+        for start in range(0, n_rows, self.block_rows):
+            block = codes[:, start : start + self.block_rows].astype(np.float32)
+            np.matmul(weights, block, out=out[:, start : start + block.shape[1]])
+        out += bias[:, None]
+        return out
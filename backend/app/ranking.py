@@ -0,0 +1,38 @@
+import numpy as np
+from typing import Optional
+
+
+def top_k_indices(
+    scores: np.ndarray, k: int, tiebreak: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, best first.
+
+    Uses a partial selection instead of a full sort, so the cost is O(n) plus
+    sorting the (usually tiny) candidate slice. Ties are broken towards the
+    higher index, which is exactly the order of
+    ``np.argsort(scores, kind="stable")[::-1][:k]``.
+
+    Args:
+        scores (np.ndarray): 1-D array of scores
+        k (int): Number of indices to return
+        tiebreak (np.ndarray): Per-score keys that replace the index when
+            breaking ties (higher key first), e.g. the training row of each
+            score when scores cover an unordered subset of rows
+
+    Returns:
+        np.ndarray: Up to k indices into scores
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        kth_largest = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= kth_largest)
+
+    keys = candidates if tiebreak is None else tiebreak[candidates]
+    order = np.lexsort((-keys, -scores[candidates]))
+    return candidates[order[:k]]
@@ -1,31 +1,152 @@
+# scikit-learn, matplotlib and seaborn are imported where they are used, so
+# a worker serving a restored artifact starts without loading them
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import silhouette_score
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
-import seaborn as sns
+import copy
 import time
 import logging
 import os
 
+from .ann_index import BruteForceIndex, build_index, check_n_probe
+from .artifacts import artifact_key, load_artifact, save_artifact
+from .cache import RecommendationCache
+from .catalog import append_rows, catalog_fingerprint, gather_records, load_catalog
+from .clustering import (
+    CLUSTERING_MODES,
+    N_INIT,
+    make_clusterer,
+    nearest_centers,
+    partial_fit_batches,
+    shuffled_batches,
+)
+from .filters import FilterIndex
+from .metrics import span
+from .neighbours import NeighbourTable, neighbour_table_key
+from .quantization import QUANTIZATION_MODES, QuantizedFeatures
+from .ranking import top_k_indices
+from .scaling import FeatureScaler
+from .track_index import TrackIndex
+
+TRAINING_MODES = ("memory", "chunked")
+
+
+def mean_pairwise_cosine_similarity(features):
+    """
+    Mean of the full cosine similarity matrix of features, in O(n) memory.
+
+    With u_i the L2-normalized rows, sum_ij u_i . u_j = |sum_i u_i|^2, so the
+    mean over all n^2 pairs (diagonal included, as np.mean(cosine_similarity(X))
+    computes it) is the squared norm of the mean unit vector.
+    """
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    mean_unit_vector = (features / norms).mean(axis=0)
+    return float(mean_unit_vector @ mean_unit_vector)
+
 
 class HybridRecommender:
-    def __init__(self, n_clusters=8, test_size=0.2):
+    def __init__(
+        self,
+        n_clusters=8,
+        test_size=0.2,
+        data_path="data/spotify_data.csv",
+        index="brute",
+        n_probe=2,
+        artifact_dir=None,
+        catalog=None,
+        batch_block_size=64,
+        cache_size=10000,
+        cache_ttl=None,
+        n_neighbours=100,
+        clustering="kmeans",
+        minibatch_size=4096,
+        training="memory",
+        chunk_size=100000,
+        quantization="float32",
+        rescore_factor=4,
+    ):
         """
         Initialize the hybrid recommendation system.
 
         Args:
             n_clusters (int): Number of clusters for K-means
             test_size (float): Proportion of data to use for testing
+            data_path (str): Path to the training dataset, a CSV or a
+                columnar catalog directory
+            index (str): Candidate index, "brute" (exact), "ivf", or
+                "cluster" to score only the nearest clusters' contiguous
+                sub-matrices
+            n_probe (int): Clusters probed per query by the "ivf" and
+                "cluster" indexes
+            artifact_dir (str): Directory of persisted model artifacts. When
+                set, a matching artifact is loaded instead of retraining, and
+                a freshly trained model is saved there.
+            catalog (pd.DataFrame): The catalog already loaded from data_path,
+                to share one in-memory copy with the caller
+            batch_block_size (int): Seeds scored per matrix-matrix multiply in
+                get_recommendations_batch; bounds its memory to
+                batch_block_size x training rows float32 scores
+            cache_size (int): Seed tracks whose recommendations are cached;
+                0 disables the cache
+            cache_ttl (float): Seconds a cached result stays valid, or None
+                to keep it until evicted or the model version changes
+            n_neighbours (int): Neighbours per track of the precomputed table
+                served from artifact_dir, when one has been built with
+                `python -m app.cli build-neighbours`
+            clustering (str): "kmeans" for full-batch K-means, or "minibatch"
+                to stream shuffled mini-batches through MiniBatchKMeans, which
+                scales to millions of rows and larger cluster counts
+            minibatch_size (int): Rows per mini-batch in "minibatch" mode
+            training (str): "memory" to train on the loaded catalog, or
+                "chunked" to stream data_path through train_out_of_core into
+                artifact_dir before the catalog is loaded, for catalogs whose
+                feature matrices do not fit in memory alongside it. Chunked
+                training needs artifact_dir and "minibatch" clustering.
+            chunk_size (int): Catalog rows per chunk in "chunked" training
+            quantization (str): "float32" scans the full-precision matrix;
+                "float16" or "int8" scan a QuantizedFeatures copy of it, 1/2
+                or 1/4 of the bytes, and rescore the best rows in full
+                precision. Applies to the "brute" and "ivf" indexes and
+                batch scoring.
+            rescore_factor (int): With quantization, rows rescored per
+                requested recommendation
         """
+        if clustering not in CLUSTERING_MODES:
+            raise ValueError(
+                f"Unknown clustering mode {clustering!r}, use one of {CLUSTERING_MODES}"
+            )
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization {quantization!r}, use one of {QUANTIZATION_MODES}"
+            )
+        check_n_probe(n_probe)
+        if training not in TRAINING_MODES:
+            raise ValueError(
+                f"Unknown training mode {training!r}, use one of {TRAINING_MODES}"
+            )
+        if training == "chunked" and (not artifact_dir or clustering != "minibatch"):
+            raise ValueError(
+                "Chunked training needs an artifact_dir and minibatch clustering"
+            )
+
         self.n_clusters = n_clusters
         self.test_size = test_size
-        self.scaler = StandardScaler()
-        self.kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        self.data_path = data_path
+        self.index_kind = index
+        self.n_probe = n_probe
+        self.artifact_dir = artifact_dir
+        self.batch_block_size = batch_block_size
+        self.n_neighbours = n_neighbours
+        self.clustering = clustering
+        self.minibatch_size = minibatch_size
+        self.training = training
+        self.chunk_size = chunk_size
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.random_state = 42
+        # Fitted by _train or restored from an artifact
+        self.scaler = None
+        self.kmeans = None  # The fitted clusterer, only when trained in-process
 
         # Core audio features for recommendation
         self.feature_names = [
@@ -50,227 +171,1079 @@ class HybridRecommender:
         # Weights for hybrid scoring
         self.cluster_weight = 0.4  # Cluster influence
         self.content_weight = 0.6  # Content similarity influence
+        self.genre_boost = 0.2  # Bonus for sharing the input song's genre
 
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
         # Initialize data storage
-        self.dataset = None
+        self.dataset = catalog
         self.train_data = None
+        self.train_positions = None
         self.test_data = None
         self.scaled_features_train = None
         self.scaled_features_test = None
+        self.cluster_centers = None
+        self.model_version = None
+
+        # Precomputed scoring state, built once at train time
+        self.feature_weight_vector = np.array(
+            [self.feature_weights[f] for f in self.feature_names]
+        )
+        self.weighted_features_train = None
+        self.quantized_features = None
+        self.cluster_labels_train = None
+        self.genre_codes_train = None
+        self.genre_to_code = None
+        self.filter_index = None
+        self.track_index = None
+        self.ann_index = None
+        self.cache = RecommendationCache(max_entries=cache_size, ttl=cache_ttl)
+        self.neighbour_table = None
 
         self.logger.info("Initializing HybridRecommender...")
         self._load_and_train_model()
 
     def _load_and_train_model(self):
-        """Load dataset and train the model with train-test split"""
+        """Load dataset and train the model, or restore it from an artifact"""
         try:
             start_time = time.time()
 
+            self.model_version = artifact_key(
+                catalog_fingerprint(self.data_path), self._hyperparameters()
+            )
+            artifact = None
+            if self.artifact_dir:
+                artifact = load_artifact(self.artifact_dir, self.model_version)
+                if artifact is None and self.training == "chunked":
+                    from .training import train_out_of_core
+
+                    # Before the catalog is loaded, so the two never coexist
+                    self.logger.info(f"Training out of core from {self.data_path}...")
+                    train_out_of_core(self, self.chunk_size)
+                    artifact = load_artifact(self.artifact_dir, self.model_version)
+
             # Load dataset
-            self.logger.info("Loading dataset...")
-            self.dataset = pd.read_csv("data/spotify_data.csv")
+            if self.dataset is None:
+                self.logger.info("Loading dataset...")
+                self.dataset = load_catalog(self.data_path)
             self.logger.info(f"Dataset loaded: {self.dataset.shape} records")
+            if artifact and artifact["meta"]["n_rows"] != len(self.dataset):
+                artifact = None
+
+            if artifact:
+                self.logger.info(f"Loading model artifact {self.model_version}...")
+                self._restore_from_artifact(artifact["arrays"])
+            else:
+                self._train()
+                self._build_scoring_state()
+                if self.artifact_dir:
+                    path = self.save_artifact()
+                    self.logger.info(f"Model artifact saved to {path}")
+
+            if self.artifact_dir:
+                self.load_neighbour_table()
 
-            # Ensure track_id is string type
-            self.dataset["track_id"] = self.dataset["track_id"].astype(str)
-
-            # Split into train and test sets
-            train_indices, test_indices = train_test_split(
-                np.arange(len(self.dataset)), test_size=self.test_size, random_state=42
+            # Log cluster distribution
+            cluster_sizes = np.bincount(
+                self.cluster_labels_train, minlength=self.n_clusters
             )
+            for i, cluster_size in enumerate(cluster_sizes):
+                self.logger.info(f"Cluster {i} size: {cluster_size} songs")
 
-            self.train_data = self.dataset.iloc[train_indices].reset_index(drop=True)
-            self.test_data = self.dataset.iloc[test_indices].reset_index(drop=True)
+            self.logger.info(f"Model ready in {time.time() - start_time:.2f} seconds")
 
-            # Scale features
-            self.logger.info("Scaling features...")
-            train_features = self.train_data[self.feature_names]
-            test_features = self.test_data[self.feature_names]
+        except Exception as e:
+            self.logger.error(f"Error in _load_and_train_model: {str(e)}")
+            raise
 
-            self.scaled_features_train = self.scaler.fit_transform(train_features)
-            self.scaled_features_test = self.scaler.transform(test_features)
+    def load_neighbour_table(self):
+        """
+        Serve recommendations from the precomputed table for this model, if built.
 
-            # Train K-means
-            self.logger.info("Training K-means clustering...")
+        Returns:
+            bool: Whether a table was found
+        """
+        self.neighbour_table = NeighbourTable.load(
+            self.artifact_dir,
+            neighbour_table_key(self.model_version, self.n_neighbours),
+        )
+        if self.neighbour_table is not None:
+            self.logger.info(
+                f"Loaded top-{self.neighbour_table.n_neighbours} neighbour table"
+            )
+        return self.neighbour_table is not None
+
+    def _hyperparameters(self):
+        """Everything besides the dataset that determines the trained model"""
+        return {
+            "n_clusters": self.n_clusters,
+            "test_size": self.test_size,
+            "random_state": self.random_state,
+            "n_init": N_INIT[self.clustering],
+            "clustering": self.clustering,
+            "minibatch_size": self.minibatch_size,
+            "training": self.training,
+            "feature_names": self.feature_names,
+            "feature_weights": self.feature_weights,
+        }
+
+    def _split(self, train_indices, test_indices):
+        """Materialize the train/test split and the track index"""
+        self.train_positions = np.asarray(train_indices, dtype=np.intp)
+        self.train_data = self.dataset.iloc[train_indices].reset_index(drop=True)
+        self.test_data = self.dataset.iloc[test_indices].reset_index(drop=True)
+        self.track_index = TrackIndex(
+            self.dataset["track_id"], train_indices, test_indices
+        )
+
+    def _train(self):
+        """Split the dataset, fit the scaler and train K-means"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+
+        # Split into train and test sets
+        train_indices, test_indices = train_test_split(
+            np.arange(len(self.dataset)),
+            test_size=self.test_size,
+            random_state=self.random_state,
+        )
+        self._split(train_indices, test_indices)
+
+        # Scale features
+        self.logger.info("Scaling features...")
+        train_features = self.train_data[self.feature_names]
+        test_features = self.test_data[self.feature_names]
+
+        scaler = StandardScaler()
+        self.scaled_features_train = scaler.fit_transform(train_features)
+        self.scaled_features_test = scaler.transform(test_features)
+        self.scaler = FeatureScaler(scaler.mean_, scaler.scale_)
+
+        # Train K-means
+        self.logger.info(f"Training K-means clustering ({self.clustering})...")
+        self.kmeans = make_clusterer(
+            self.clustering,
+            self.n_clusters,
+            self.minibatch_size,
+            random_state=self.random_state,
+        )
+        if self.clustering == "minibatch":
+            partial_fit_batches(
+                self.kmeans,
+                shuffled_batches(
+                    self.scaled_features_train,
+                    self.minibatch_size,
+                    random_state=self.random_state,
+                ),
+            )
+            self.cluster_centers = self.kmeans.cluster_centers_
+            self.cluster_labels_train = self._predict_clusters(
+                self.scaled_features_train
+            ).astype(np.int32)
+        else:
             self.kmeans.fit(self.scaled_features_train)
+            self.cluster_centers = self.kmeans.cluster_centers_
+            self.cluster_labels_train = self.kmeans.labels_.astype(np.int32)
+
+    def _restore_from_artifact(self, arrays):
+        """Restore a trained model from memory-mapped artifact arrays"""
+        self._split(arrays["train_indices"], arrays["test_indices"])
+
+        self.scaler = FeatureScaler(arrays["scaler_mean"], arrays["scaler_scale"])
+
+        if "scaled_features_train" in arrays:
+            # Written by train_out_of_core; used memory-mapped as-is
+            self.scaled_features_train = arrays["scaled_features_train"]
+            self.scaled_features_test = arrays["scaled_features_test"]
+        else:
+            self.scaled_features_train = self.scaler.transform(
+                self.train_data[self.feature_names]
+            )
+            self.scaled_features_test = self.scaler.transform(
+                self.test_data[self.feature_names]
+            )
 
-            # Log cluster distribution
-            labels = self.kmeans.labels_
-            for i in range(self.n_clusters):
-                cluster_size = np.sum(labels == i)
-                self.logger.info(f"Cluster {i} size: {cluster_size} songs")
+        self.cluster_centers = np.asarray(arrays["cluster_centers"])
+        self.cluster_labels_train = arrays["cluster_labels"]
+        self._build_scoring_state(arrays["weighted_features"])
+
+    def save_artifact(self):
+        """
+        Persist the trained model under artifact_dir.
+
+        Returns:
+            str: Path of the written artifact directory
+        """
+        arrays = {
+            "train_indices": self.track_index.partition_positions(TrackIndex.TRAIN),
+            "test_indices": self.track_index.partition_positions(TrackIndex.TEST),
+            "scaler_mean": self.scaler.mean_,
+            "scaler_scale": self.scaler.scale_,
+            "cluster_centers": self.cluster_centers,
+            "cluster_labels": self.cluster_labels_train,
+            "weighted_features": self.weighted_features_train,
+        }
+        meta = {
+            "params": self._hyperparameters(),
+            "data_path": os.path.abspath(self.data_path),
+            "n_rows": len(self.dataset),
+        }
+        return save_artifact(self.artifact_dir, self.model_version, arrays, meta)
+
+    def update_tracks(self, add=None, remove=None):
+        """
+        Return a new recommender with tracks appended and/or removed, without retraining.
+
+        The fitted scaler and cluster centers are kept: new tracks are scaled
+        with them, assigned to their nearest existing cluster and join the
+        training partition, so they are recommendable at once. This instance
+        is left untouched, so concurrent readers keep a consistent model
+        until the caller swaps in the returned one. The precomputed neighbour
+        table no longer matches and is dropped; the result cache is shared
+        and invalidated by the new model_version.
+
+        Args:
+            add (pd.DataFrame | list): New catalog rows
+            remove (list): Track IDs whose rows are removed (before adding)
+
+        Returns:
+            HybridRecommender: The updated model
+        """
+        try:
+            dataset = self.dataset
+            train_positions = self.train_positions
+            test_positions = self.track_index.partition_positions(TrackIndex.TEST)
+            scaled_train = self.scaled_features_train
+            scaled_test = self.scaled_features_test
+            weighted = self.weighted_features_train
+            labels = self.cluster_labels_train
+            removed = []
+
+            if remove:
+                keep = ~dataset["track_id"].isin([str(t) for t in remove]).to_numpy()
+                removed = sorted(set(dataset["track_id"][~keep]))
+                new_positions = np.cumsum(keep) - 1
+                train_keep = keep[train_positions]
+                test_keep = keep[test_positions]
+                train_positions = new_positions[train_positions[train_keep]]
+                test_positions = new_positions[test_positions[test_keep]]
+                scaled_train = scaled_train[train_keep]
+                scaled_test = scaled_test[test_keep]
+                weighted = weighted[train_keep]
+                labels = labels[train_keep]
+                dataset = dataset[keep].reset_index(drop=True)
+
+            added = []
+            if add is not None and len(add):
+                n_rows = len(dataset)
+                dataset = append_rows(dataset, add)
+                new_rows = dataset.iloc[n_rows:]
+                added = new_rows["track_id"].tolist()
+                scaled_new = self.scaler.transform(new_rows[self.feature_names])
+                train_positions = np.concatenate(
+                    [train_positions, np.arange(n_rows, len(dataset))]
+                )
+                scaled_train = np.vstack([scaled_train, scaled_new])
+                weighted = np.vstack([weighted, self._weighted_inputs(scaled_new)])
+                labels = np.concatenate(
+                    [labels, self._predict_clusters(scaled_new).astype(np.int32)]
+                )
 
+            updated = copy.copy(self)
+            updated.dataset = dataset
+            updated._split(train_positions, test_positions)
+            updated.scaled_features_train = scaled_train
+            updated.scaled_features_test = scaled_test
+            updated.cluster_labels_train = labels
+            updated._build_scoring_state(weighted)
+            updated.neighbour_table = None
+            updated.model_version = artifact_key(
+                self.model_version, {"add": added, "remove": removed}
+            )
             self.logger.info(
-                f"Model training completed in {time.time() - start_time:.2f} seconds"
+                f"Catalog updated: {len(added)} rows added, "
+                f"{len(self.dataset) + len(added) - len(dataset)} rows removed"
             )
+            return updated
 
         except Exception as e:
-            self.logger.error(f"Error in _load_and_train_model: {str(e)}")
+            self.logger.error(f"Error in update_tracks: {str(e)}")
             raise
 
-    def get_recommendations(self, track_id: str, n_recommendations: int = 5) -> list:
+    def refit_clusters(self, batch_size=1024, n_passes=3):
         """
-        Get song recommendations based on a track ID.
+        Return a new recommender with cluster centers refined on the current data.
+
+        Runs MiniBatchKMeans passes starting from the current centers, so
+        clusters follow tracks added since training at a fraction of the cost
+        of a full K-means fit. Like update_tracks, this instance is unchanged.
 
         Args:
-            track_id (str): The ID of the track to base recommendations on
-            n_recommendations (int): Number of recommendations to return
+            batch_size (int): Training rows per mini-batch
+            n_passes (int): Passes over the training rows
 
         Returns:
-            list: List of recommended songs with similarity scores
+            HybridRecommender: The refitted model
         """
         try:
-            self.logger.info(f"Fetching recommendations for track ID: {track_id}")
+            start_time = time.time()
+            scaled_train = self.scaled_features_train
+            minibatch = make_clusterer(
+                "minibatch",
+                self.n_clusters,
+                batch_size,
+                random_state=self.random_state,
+                init=self.cluster_centers,
+            )
+            partial_fit_batches(
+                minibatch,
+                shuffled_batches(
+                    scaled_train, batch_size, n_passes, random_state=self.random_state
+                ),
+            )
 
-            # First try to find the song in training data
-            song = self.train_data[self.train_data["track_id"] == str(track_id)]
-            in_test = False
+            updated = copy.copy(self)
+            updated.cluster_centers = minibatch.cluster_centers_
+            updated.cluster_labels_train = updated._predict_clusters(
+                scaled_train
+            ).astype(np.int32)
+            updated._build_scoring_state(self.weighted_features_train)
+            updated.neighbour_table = None
+            updated.model_version = artifact_key(
+                self.model_version, {"refit": updated.cluster_centers.tolist()}
+            )
+            self.logger.info(
+                f"Clusters refitted in {time.time() - start_time:.2f} seconds"
+            )
+            return updated
 
-            if song.empty:
-                # If not in training data, check test data
-                song = self.test_data[self.test_data["track_id"] == str(track_id)]
-                in_test = True
-                if song.empty:
-                    raise ValueError(f"Track ID {track_id} not found in dataset")
+        except Exception as e:
+            self.logger.error(f"Error in refit_clusters: {str(e)}")
+            raise
+
+    def _build_scoring_state(self, weighted_features=None):
+        """
+        Precompute everything per-request scoring needs from the training set.
 
-            # Get the song's features
-            song_features = song[self.feature_names]
-            scaled_features = self.scaler.transform(song_features)
+        The weighted features are L2-normalized once so that cosine similarity
+        against an input reduces to a single matrix-vector product, and genres
+        are integer-coded so the genre boost is one vectorized comparison.
 
-            # Get recommendations
-            recommendations = self._get_hybrid_recommendations(
-                scaled_features,
-                n_recommendations=n_recommendations,
-                exclude_ids=[track_id],
-                input_song=song.iloc[0],
+        Args:
+            weighted_features (np.ndarray): Previously computed weighted,
+                normalized feature matrix, e.g. memory-mapped from an artifact
+        """
+        if weighted_features is None:
+            weighted = self.scaled_features_train * self.feature_weight_vector
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0  # cosine_similarity scores zero vectors as 0
+            weighted_features = (weighted / norms).astype(np.float32)
+        self.weighted_features_train = weighted_features
+        self.quantized_features = None
+        if self.quantization != "float32":
+            self.quantized_features = QuantizedFeatures(
+                weighted_features, self.quantization
+            )
+
+        genre_codes, genres = pd.factorize(self.train_data["track_genre"])
+        self.genre_codes_train = genre_codes.astype(np.int32)
+        self.genre_to_code = {genre: code for code, genre in enumerate(genres)}
+        self.filter_index = FilterIndex(self.train_data)
+
+        self.ann_index = build_index(
+            self.index_kind,
+            self.cluster_centers,
+            self.cluster_labels_train,
+            n_probe=self.n_probe,
+            features=self.weighted_features_train,
+            genre_codes=self.genre_codes_train,
+        )
+
+    def set_index(self, index, n_probe=None):
+        """
+        Switch the candidate index used by get_recommendations.
+
+        Args:
+            index (str): "brute", "ivf" or "cluster"
+            n_probe (int): Clusters probed per query; unchanged if None
+        """
+        if n_probe is not None:
+            self.n_probe = check_n_probe(n_probe)
+        self.index_kind = index
+        self.ann_index = build_index(
+            self.index_kind,
+            self.cluster_centers,
+            self.cluster_labels_train,
+            n_probe=self.n_probe,
+            features=self.weighted_features_train,
+            genre_codes=self.genre_codes_train,
+        )
+
+    def set_quantization(self, quantization):
+        """
+        Switch the representation scanned by live scoring.
+
+        Args:
+            quantization (str): "float32", "float16" or "int8"
+        """
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization {quantization!r}, use one of {QUANTIZATION_MODES}"
+            )
+        self.quantization = quantization
+        self.quantized_features = None
+        if quantization != "float32":
+            self.quantized_features = QuantizedFeatures(
+                self.weighted_features_train, quantization
+            )
+
+    @property
+    def result_version(self):
+        """
+        Identify everything besides the request that determines a result.
+
+        Approximate indexes and quantized scans rank differently, so their
+        results are versioned apart from exact ones.
+
+        Returns:
+            tuple: Model version, index kind, probes and quantization
+        """
+        return (self.model_version, self.index_kind, self.n_probe, self.quantization)
+
+    def _predict_clusters(self, scaled_features):
+        """Assign each row of scaled features to its nearest cluster center"""
+        return nearest_centers(scaled_features, self.cluster_centers)[0]
+
+    def _weighted_inputs(self, scaled_inputs):
+        """Weight and L2-normalize scaled input rows like the training matrix"""
+        weighted = scaled_inputs * self.feature_weight_vector
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (weighted / norms).astype(np.float32)
+
+    def _score_train_rows_batch(self, scaled_inputs, input_genres):
+        """
+        Compute raw hybrid scores of every training row against several inputs.
+
+        Args:
+            scaled_inputs (np.ndarray): Scaled input features, shape (b, n_features)
+            input_genres (list): Genre of each input
+
+        Returns:
+            np.ndarray: Un-normalized hybrid scores, shape (b, training rows)
+        """
+        with span("scaling"):
+            weighted_inputs = self._weighted_inputs(scaled_inputs)
+            clusters = self._predict_clusters(scaled_inputs)
+
+        with span("similarity"):
+            if self.quantized_features is not None:
+                hybrid_scores = self.quantized_features.dot(weighted_inputs)
+            else:
+                hybrid_scores = weighted_inputs @ self.weighted_features_train.T
+            hybrid_scores *= self.content_weight
+            np.add(
+                hybrid_scores,
+                self.cluster_weight,
+                out=hybrid_scores,
+                where=self.cluster_labels_train == clusters[:, None],
             )
 
+        with span("genre_boost"):
+            genre_codes = np.array(
+                [self.genre_to_code.get(genre, -1) for genre in input_genres]
+            )
+            np.add(
+                hybrid_scores,
+                self.genre_boost,
+                out=hybrid_scores,
+                where=self.genre_codes_train == genre_codes[:, None],
+            )
+        return hybrid_scores
+
+    def _score_train_rows(
+        self, scaled_input, input_genre=None, rows=None, full_precision=False
+    ):
+        """
+        Compute raw hybrid scores of training rows against one input.
+
+        Args:
+            scaled_input (np.ndarray): Scaled features of the input, shape (1, n_features)
+            input_genre (str): Genre of the input song, if known
+            rows (np.ndarray): Training rows to score; all rows if None
+            full_precision (bool): Scan the full-precision matrix even when
+                quantized features are available
+
+        Returns:
+            np.ndarray: Un-normalized hybrid score per scored row
+        """
+        quantized = None if full_precision else self.quantized_features
+        labels = self.cluster_labels_train
+        genre_codes = self.genre_codes_train
+        if rows is not None:
+            labels = labels[rows]
+            genre_codes = genre_codes[rows]
+
+        with span("scaling"):
+            weighted_input = self._weighted_inputs(scaled_input)[0]
+            cluster = self._predict_clusters(scaled_input)[0]
+
+        with span("similarity"):
+            if quantized is not None:
+                similarities = quantized.dot(weighted_input[None], rows)[0]
+            elif rows is not None:
+                similarities = self.weighted_features_train[rows] @ weighted_input
+            else:
+                similarities = self.weighted_features_train @ weighted_input
+            hybrid_scores = self.content_weight * similarities
+            hybrid_scores[labels == cluster] += self.cluster_weight
+
+        if input_genre is not None:
+            with span("genre_boost"):
+                genre_code = self.genre_to_code.get(input_genre)
+                if genre_code is not None:
+                    hybrid_scores[genre_codes == genre_code] += self.genre_boost
+
+        return hybrid_scores
+
+    def _seed(self, track_id):
+        """
+        Look up a seed track.
+
+        Returns:
+            tuple: (song row, scaled features of shape (1, n_features))
+        """
+        position = self.track_index.get(track_id)
+        if position is None:
+            raise ValueError(f"Track ID {track_id} not found in dataset")
+
+        # Features are already scaled for whichever split holds the song
+        row = self.track_index.partition_row[position]
+        if self.track_index.partition[position] == TrackIndex.TRAIN:
+            return self.train_data.iloc[row], self.scaled_features_train[row : row + 1]
+        return self.test_data.iloc[row], self.scaled_features_test[row : row + 1]
+
+    def _seed_inputs(self, positions):
+        """
+        Gather the scaled features and genres of catalog rows for batch scoring.
+
+        Returns:
+            tuple: (scaled features of shape (len(positions), n_features),
+            list of genres)
+        """
+        partition = self.track_index.partition[positions]
+        rows = self.track_index.partition_row[positions]
+        in_train = partition == TrackIndex.TRAIN
+        scaled_inputs = np.empty((len(positions), len(self.feature_names)))
+        scaled_inputs[in_train] = self.scaled_features_train[rows[in_train]]
+        scaled_inputs[~in_train] = self.scaled_features_test[rows[~in_train]]
+        genres = self.dataset["track_genre"].iloc[positions].tolist()
+        return scaled_inputs, genres
+
+    def _table_recommendations(self, track_id, n_recommendations):
+        """Answer from the neighbour table, or None if live scoring is needed"""
+        if self.neighbour_table is None:
+            return None
+        with span("lookup"):
+            ordinal = self.track_index.ordinal(track_id)
+            if ordinal is None:
+                return None
+            excluded = self.track_index.partition_rows([track_id], TrackIndex.TRAIN)
+            neighbours = self.neighbour_table.lookup(
+                ordinal, excluded, n_recommendations
+            )
+        if neighbours is None:
+            return None
+        return self._build_recommendations(*neighbours)
+
+    def get_recommendations(
+        self, track_id: str, n_recommendations: int = 5, track_filter=None
+    ) -> list:
+        """
+        Get song recommendations based on a track ID.
+
+        A filter restricts scoring to the eligible rows from the filter
+        index. Every eligible row is a candidate and the 0.1 score threshold
+        is not applied, so the page is full unless fewer tracks match.
+
+        Args:
+            track_id (str): The ID of the track to base recommendations on
+            n_recommendations (int): Number of recommendations to return
+            track_filter (TrackFilter): Constraints on the recommended tracks
+
+        Returns:
+            list: List of recommended songs with similarity scores
+        """
+        try:
+            eligible_rows = None
+            cache_key = track_id
+            if track_filter is not None and not track_filter.is_empty:
+                with span("filter"):
+                    eligible_rows = self.filter_index.rows(track_filter)
+                if not len(eligible_rows):
+                    raise ValueError("No tracks match the filter")
+                cache_key = (track_id, track_filter)
+            # A quantized shortlist and the filtered candidate fallback both
+            # grow with the limit, so a longer list is not an extension of a
+            # shorter one there: cache each limit on its own
+            if self.quantized_features is not None or eligible_rows is not None:
+                cache_key = (cache_key, n_recommendations)
+
+            cache_version = self.result_version
+            with span("cache"):
+                cached = self.cache.get(cache_key, n_recommendations, cache_version)
+            if cached is not None:
+                return cached
+
+            # Precomputed neighbours, falling back to live scoring for
+            # unknown tracks, limits beyond the table or filtered requests
+            recommendations = None
+            if eligible_rows is None:
+                recommendations = self._table_recommendations(
+                    track_id, n_recommendations
+                )
+            if recommendations is None:
+                with span("lookup"):
+                    song, scaled_features = self._seed(track_id)
+                recommendations = self._get_hybrid_recommendations(
+                    scaled_features,
+                    n_recommendations=n_recommendations,
+                    exclude_ids=[track_id],
+                    input_song=song,
+                    eligible_rows=eligible_rows,
+                )
+
             if not recommendations:
                 raise ValueError("No recommendations generated")
 
+            self.cache.put(cache_key, n_recommendations, cache_version, recommendations)
             return recommendations
 
         except Exception as e:
             self.logger.error(f"Error in get_recommendations: {str(e)}")
             raise
 
+    def _score_clusters(self, index, scaled_input, input_genre=None):
+        """
+        Compute raw hybrid scores of the probed clusters' rows against one input.
+
+        Each probed cluster is a contiguous slice of the index's layout, so
+        it scores with one matrix-vector product; the cluster bonus applies
+        to the whole slice of the input's own cluster and the genre boost to
+        the genre's sub-range of each slice.
+
+        Returns:
+            tuple: (training row of each score, un-normalized hybrid scores)
+        """
+        with span("scaling"):
+            weighted_input = self._weighted_inputs(scaled_input)[0]
+            cluster = int(self._predict_clusters(scaled_input)[0])
+            # Always score the input's own cluster, then the nearest others
+            cells = [cluster] + [
+                int(c) for c in index.nearest_cells(scaled_input) if c != cluster
+            ][: index.n_probe - 1]
+        genre_code = None
+        if input_genre is not None:
+            genre_code = self.genre_to_code.get(input_genre)
+
+        rows, scores = [], []
+        for cell in cells:
+            start, stop = index.cell_range(cell)
+            with span("similarity"):
+                cell_scores = index.features[start:stop] @ weighted_input
+                cell_scores *= self.content_weight
+                if cell == cluster:
+                    cell_scores += self.cluster_weight
+            if genre_code is not None:
+                with span("genre_boost"):
+                    genre_start, genre_stop = index.genre_range(cell, genre_code)
+                    cell_scores[
+                        genre_start - start : genre_stop - start
+                    ] += self.genre_boost
+            rows.append(index.cell_rows(cell))
+            scores.append(cell_scores)
+        return np.concatenate(rows), np.concatenate(scores)
+
+    def _rescore(self, hybrid_scores, scaled_input, n_candidates, rows=None):
+        """
+        Correct the best scores of a quantized scan to full precision, in place.
+
+        Args:
+            hybrid_scores (np.ndarray): Scores from a quantized scan
+            scaled_input (np.ndarray): Scaled input features, shape (1, n_features)
+            n_candidates (int): Shortlist size
+            rows (np.ndarray): Training row of each score; all rows if None
+
+        Returns:
+            np.ndarray: Indices into hybrid_scores of the rescored shortlist
+        """
+        with span("rescoring"):
+            shortlist = top_k_indices(hybrid_scores, n_candidates, tiebreak=rows)
+            train_rows = shortlist if rows is None else rows[shortlist]
+            weighted_input = self._weighted_inputs(scaled_input)
+            exact = self.weighted_features_train[train_rows] @ weighted_input[0]
+            approximate = self.quantized_features.dot(weighted_input, train_rows)[0]
+            hybrid_scores[shortlist] += self.content_weight * (exact - approximate)
+        return shortlist
+
+    def _shortlist_size(self, n_recommendations, exclude_ids=None):
+        """
+        Rows a quantized scan shortlists for full-precision rescoring.
+
+        Single and batch requests share this, so they rescore the same rows
+        and return the same recommendations for a seed.
+        """
+        n_excluded = 0
+        if exclude_ids:
+            n_excluded = len(
+                self.track_index.partition_rows(exclude_ids, TrackIndex.TRAIN)
+            )
+        return n_recommendations * self.rescore_factor + n_excluded
+
+    @staticmethod
+    def _top_k(hybrid_scores, k, rows=None, shortlist=None):
+        """top_k_indices, restricted to the shortlist when scores were rescored"""
+        if shortlist is None:
+            return top_k_indices(hybrid_scores, k, tiebreak=rows)
+        keys = shortlist if rows is None else rows[shortlist]
+        return shortlist[top_k_indices(hybrid_scores[shortlist], k, tiebreak=keys)]
+
     def _get_hybrid_recommendations(
-        self, scaled_input, n_recommendations=5, exclude_ids=None, input_song=None
+        self,
+        scaled_input,
+        n_recommendations=5,
+        exclude_ids=None,
+        input_song=None,
+        ann_index=None,
+        full_precision=False,
+        eligible_rows=None,
     ):
         try:
-            # Weight the features
-            weighted_features_train = self.scaled_features_train * np.array(
-                [self.feature_weights[f] for f in self.feature_names]
-            )
-            weighted_input = scaled_input * np.array(
-                [self.feature_weights[f] for f in self.feature_names]
+            input_genre = None
+            if input_song is not None:
+                input_genre = input_song["track_genre"]
+
+            # Candidate rows from the index; None means every training row
+            index = ann_index or self.ann_index
+            if eligible_rows is not None and not len(eligible_rows):
+                return []
+            if eligible_rows is not None:
+                # Only eligible rows are scored: those the index would probe,
+                # or all of them when the probed ones cannot fill the page
+                candidate_rows = index.candidates(scaled_input)
+                if candidate_rows is None:
+                    candidate_rows = eligible_rows
+                else:
+                    candidate_rows = np.intersect1d(
+                        candidate_rows, eligible_rows, assume_unique=True
+                    )
+                    if len(candidate_rows) < n_recommendations + len(exclude_ids or ()):
+                        candidate_rows = eligible_rows
+                hybrid_scores = self._score_train_rows(
+                    scaled_input, input_genre, candidate_rows, full_precision
+                )
+            elif index.kind == "cluster":
+                candidate_rows, hybrid_scores = self._score_clusters(
+                    index, scaled_input, input_genre
+                )
+            else:
+                candidate_rows = index.candidates(scaled_input)
+                hybrid_scores = self._score_train_rows(
+                    scaled_input, input_genre, candidate_rows, full_precision
+                )
+
+            # A quantized scan only shortlists: rank among rescored rows
+            shortlist = None
+            if (
+                self.quantized_features is not None
+                and (index.kind != "cluster" or eligible_rows is not None)
+                and not full_precision
+            ):
+                shortlist = self._rescore(
+                    hybrid_scores,
+                    scaled_input,
+                    self._shortlist_size(n_recommendations, exclude_ids),
+                    candidate_rows,
+                )
+
+            with span("ranking"):
+                # Normalization bounds cover every scored row, including excluded ones
+                score_min = float(hybrid_scores.min())
+                score_max = float(hybrid_scores.max())
+
+                # Exclude specified tracks
+                if exclude_ids:
+                    excluded = self.track_index.partition_rows(
+                        exclude_ids, TrackIndex.TRAIN
+                    )
+                    if candidate_rows is not None:
+                        excluded = np.flatnonzero(np.isin(candidate_rows, excluded))
+                    hybrid_scores[excluded] = -np.inf
+
+                # Get top recommendations, normalizing only the selected slice
+                # Ties resolve by training row, as in a full scan
+                top_indices = self._top_k(
+                    hybrid_scores, n_recommendations, candidate_rows, shortlist
+                )
+                top_scores = (
+                    hybrid_scores[top_indices].astype(np.float64) - score_min
+                ) / (score_max - score_min + 1e-6)
+                if candidate_rows is not None:
+                    top_indices = candidate_rows[top_indices]
+            return self._build_recommendations(
+                top_indices, top_scores, 0.1 if eligible_rows is None else None
             )
 
-            # Get cluster-based scores
-            cluster = self.kmeans.predict(scaled_input)[0]
-            cluster_mask = self.kmeans.labels_ == cluster
+        except Exception as e:
+            self.logger.error(f"Error in _get_hybrid_recommendations: {str(e)}")
+            raise
 
-            # Calculate weighted cosine similarity
-            similarities = cosine_similarity(weighted_input, weighted_features_train)[0]
+    def rank_agreement(self, track_ids, n_recommendations=10):
+        """
+        Compare the configured index and quantization with an exact full scan.
 
-            # Initialize cluster scores
-            cluster_scores = np.zeros_like(similarities)
-            cluster_scores[cluster_mask] = 1.0
+        Args:
+            track_ids (list): Seed tracks to compare on
+            n_recommendations (int): Length of the compared lists (k)
 
-            # Calculate hybrid scores
-            hybrid_scores = (
-                self.cluster_weight * cluster_scores
-                + self.content_weight * similarities
+        Returns:
+            dict: recall_at_k (mean share of the full-scan top-k found),
+            exact_match (share of seeds with identical ordered lists),
+            top1_match, mean latency_ms of the configured path and of the
+            full scan, and scan_bytes, the size of the matrix scanned by the
+            configured path, against full_precision_bytes
+        """
+        full_scan = BruteForceIndex()
+        recall, exact, top1 = [], [], []
+        latency, full_latency = 0.0, 0.0
+        for track_id in track_ids:
+            song, scaled_features = self._seed(track_id)
+            start = time.perf_counter()
+            approximate = self._get_hybrid_recommendations(
+                scaled_features, n_recommendations, [track_id], song
+            )
+            latency += time.perf_counter() - start
+            start = time.perf_counter()
+            expected = self._get_hybrid_recommendations(
+                scaled_features,
+                n_recommendations,
+                [track_id],
+                song,
+                full_scan,
+                full_precision=True,
+            )
+            full_latency += time.perf_counter() - start
+
+            approximate = [r["track_id"] for r in approximate]
+            expected = [r["track_id"] for r in expected]
+            # A track can appear once per genre row, so compare distinct IDs
+            expected_ids = set(expected)
+            recall.append(
+                len(set(approximate) & expected_ids) / max(len(expected_ids), 1)
             )
+            exact.append(approximate == expected)
+            top1.append(approximate[:1] == expected[:1])
+
+        n = max(len(recall), 1)
+        return {
+            "index": self.index_kind,
+            "n_probe": self.n_probe,
+            "quantization": self.quantization,
+            "queries": len(recall),
+            "recall_at_k": sum(recall) / n,
+            "exact_match": sum(exact) / n,
+            "top1_match": sum(top1) / n,
+            "latency_ms": latency * 1000 / n,
+            "full_scan_latency_ms": full_latency * 1000 / n,
+            "scan_bytes": (
+                self.quantized_features or self.weighted_features_train
+            ).nbytes,
+            "full_precision_bytes": self.weighted_features_train.nbytes,
+        }
 
-            # Add genre boost if we have the input song
-            if input_song is not None:
-                input_genre = input_song["track_genre"]
-                genre_boost = np.array(
-                    [
-                        (
-                            0.2
-                            if self.train_data.iloc[i]["track_genre"] == input_genre
-                            else 0
+    def get_recommendations_batch(
+        self, track_ids, n_recommendations=5, block_size=None, merge=False
+    ):
+        """
+        Get recommendations for many seed tracks at once.
+
+        Seeds are scored against the full training matrix in blocks of
+        block_size with one matrix-matrix multiply per block, so peak memory
+        stays at block_size x training rows scores. With an ivf or cluster
+        index each seed is instead scored over its probed rows, as a single
+        request is; the merged playlist always uses the full scan. The
+        neighbour table is never consulted, so where get_recommendations
+        answers from it the two can differ under an approximate index or
+        quantized scan.
+
+        Args:
+            track_ids (list): Seed track IDs; unknown IDs are skipped
+            n_recommendations (int): Number of recommendations per seed, or
+                for the merged playlist
+            block_size (int): Seeds per block; defaults to batch_block_size
+            merge (bool): Return one playlist ranked by the mean normalized
+                score across all seeds instead of per-seed lists
+
+        Returns:
+            dict | list: track_id -> recommendations, or the merged playlist
+        """
+        try:
+            seeds = [
+                track_id
+                for track_id in dict.fromkeys(str(t) for t in track_ids)
+                if track_id in self.track_index
+            ]
+            if not seeds:
+                raise ValueError("None of the track IDs were found in dataset")
+            block_size = block_size or self.batch_block_size
+
+            results = {}
+            merged_scores = np.zeros(len(self.train_data)) if merge else None
+            probed = self.ann_index.kind != "brute" and not merge
+            for start in range(0, len(seeds), block_size):
+                block = seeds[start : start + block_size]
+                with span("lookup"):
+                    positions = np.array([self.track_index.get(t) for t in block])
+                    scaled_inputs, genres = self._seed_inputs(positions)
+                if probed:
+                    # Probing differs per seed, so seeds score one at a time
+                    for i, track_id in enumerate(block):
+                        results[track_id] = self._get_hybrid_recommendations(
+                            scaled_inputs[i : i + 1],
+                            n_recommendations,
+                            [track_id],
+                            {"track_genre": genres[i]},
                         )
-                        for i in range(len(self.train_data))
-                    ]
-                )
-                hybrid_scores += genre_boost
-
-            # Normalize scores
-            hybrid_scores = (hybrid_scores - hybrid_scores.min()) / (
-                hybrid_scores.max() - hybrid_scores.min() + 1e-6
-            )
-
-            # Exclude specified tracks
-            if exclude_ids:
-                exclude_mask = ~self.train_data["track_id"].isin(exclude_ids)
-                hybrid_scores = hybrid_scores * exclude_mask
-
-            # Get top recommendations
-            top_indices = np.argsort(hybrid_scores)[::-1][:n_recommendations]
-            recommendations = []
-
-            for idx in top_indices:
-                if (
-                    hybrid_scores[idx] > 0.1
-                ):  # Only include if similarity is significant
-                    song = self.train_data.iloc[idx]
-                    recommendations.append(
-                        {
-                            "track_id": str(song["track_id"]),
-                            "track_name": str(song["track_name"]),
-                            "artists": str(song["artists"]),
-                            "album_name": str(song["album_name"]),
-                            "track_genre": str(song["track_genre"]),
-                            "similarity_score": float(hybrid_scores[idx]),
-                            "audio_features": {
-                                "danceability": float(song["danceability"]),
-                                "energy": float(song["energy"]),
-                                "valence": float(song["valence"]),
-                                "acousticness": float(song["acousticness"]),
-                                "instrumentalness": float(song["instrumentalness"]),
-                                "liveness": float(song["liveness"]),
-                            },
-                        }
-                    )
+                    continue
+                block_scores = self._score_train_rows_batch(scaled_inputs, genres)
+                ranked = []
+
+                for i, (track_id, hybrid_scores) in enumerate(zip(block, block_scores)):
+                    # The merged playlist ranks quantized scores as they are
+                    shortlist = None
+                    if self.quantized_features is not None and not merge:
+                        shortlist = self._rescore(
+                            hybrid_scores,
+                            scaled_inputs[i : i + 1],
+                            self._shortlist_size(n_recommendations, [track_id]),
+                        )
+                    with span("ranking"):
+                        score_min = float(hybrid_scores.min())
+                        score_range = float(hybrid_scores.max()) - score_min + 1e-6
+                        if merge:
+                            merged_scores += (hybrid_scores - score_min) / score_range
+                            continue
+
+                        excluded = self.track_index.partition_rows(
+                            [track_id], TrackIndex.TRAIN
+                        )
+                        hybrid_scores[excluded] = -np.inf
+                        top_indices = self._top_k(
+                            hybrid_scores, n_recommendations, shortlist=shortlist
+                        )
+                        top_scores = (
+                            hybrid_scores[top_indices].astype(np.float64) - score_min
+                        ) / score_range
+                    ranked.append((top_indices, top_scores))
 
-            # Add logging for debugging
-            self.logger.info(f"Generated recommendations: {recommendations}")
+                if not merge:
+                    results.update(zip(block, self._build_recommendation_lists(ranked)))
 
-            return recommendations
+            if not merge:
+                return results
+
+            with span("ranking"):
+                merged_scores /= len(seeds)
+                excluded = self.track_index.partition_rows(seeds, TrackIndex.TRAIN)
+                merged_scores[excluded] = -np.inf
+                top_indices = top_k_indices(merged_scores, n_recommendations)
+            return self._build_recommendations(top_indices, merged_scores[top_indices])
 
         except Exception as e:
-            self.logger.error(f"Error in _get_hybrid_recommendations: {str(e)}")
+            self.logger.error(f"Error in get_recommendations_batch: {str(e)}")
             raise
 
-    def evaluate_model(self):
+    def _build_recommendations(self, train_rows, scores, min_score=0.1):
+        """Turn ranked training rows and normalized scores into response dicts"""
+        return self._build_recommendation_lists([(train_rows, scores)], min_score)[0]
+
+    def _build_recommendation_lists(self, ranked, min_score=0.1):
+        """
+        Build the response dicts of several ranked lists with one catalog gather.
+
+        Args:
+            ranked (list): (training rows, normalized scores) per list
+            min_score (float): Keep scores above this; None keeps every
+                finite score
+
+        Returns:
+            list: One list of recommendation dicts per ranked list
+        """
+        with span("materialization"):
+            kept_rows, kept_scores = [], []
+            for train_rows, scores in ranked:
+                scores = np.asarray(scores, dtype=np.float64)
+                if min_score is None:
+                    # Excluded rows score -inf
+                    significant = np.isfinite(scores)
+                else:
+                    # Only include if similarity is significant
+                    significant = scores > min_score
+                kept_rows.append(np.asarray(train_rows, dtype=np.intp)[significant])
+                kept_scores.append(scores[significant])
+
+            positions = self.train_positions[np.concatenate(kept_rows)]
+            records = gather_records(self.dataset, positions)
+            for record, score in zip(records, np.concatenate(kept_scores).tolist()):
+                record["similarity_score"] = score
+            bounds = np.cumsum([0] + [len(rows) for rows in kept_rows]).tolist()
+            return [records[a:b] for a, b in zip(bounds, bounds[1:])]
+
+    def evaluate_model(self, silhouette_sample_size=None):
         """
         Evaluate the model using the test set.
 
+        Neither metric materializes an n x n matrix unless asked to: the
+        silhouette score can be computed on a random sample of the test set,
+        and intra-cluster cosine similarity uses a closed form over the
+        normalized cluster sum.
+
+        Args:
+            silhouette_sample_size (int): Number of test rows to sample for
+                the O(n^2) silhouette score; None uses the whole test set
+
         Returns:
             dict: Dictionary containing evaluation metrics
         """
+        from sklearn.metrics import silhouette_score
+
         self.logger.info("Evaluating model performance...")
 
         try:
             # Calculate silhouette score on test data
-            test_clusters = self.kmeans.predict(self.scaled_features_test)
-            silhouette_test = silhouette_score(self.scaled_features_test, test_clusters)
+            test_clusters = self._predict_clusters(self.scaled_features_test)
+            if silhouette_sample_size and silhouette_sample_size < len(test_clusters):
+                silhouette_test = silhouette_score(
+                    self.scaled_features_test,
+                    test_clusters,
+                    sample_size=silhouette_sample_size,
+                    random_state=self.random_state,
+                )
+            else:
+                silhouette_test = silhouette_score(
+                    self.scaled_features_test, test_clusters
+                )
 
             # Calculate mean cosine similarity within clusters
             mean_similarities = []
             for i in range(self.n_clusters):
                 mask = test_clusters == i
                 if np.sum(mask) > 1:
-                    cluster_features = self.scaled_features_test[mask]
-                    similarities = cosine_similarity(cluster_features)
-                    mean_similarities.append(np.mean(similarities))
+                    mean_similarities.append(
+                        mean_pairwise_cosine_similarity(self.scaled_features_test[mask])
+                    )
 
             avg_cluster_similarity = np.mean(mean_similarities)
 
@@ -297,7 +1270,7 @@ class HybridRecommender:
         """
         try:
             feature_importances = {}
-            cluster_centers = self.kmeans.cluster_centers_
+            cluster_centers = self.cluster_centers
 
             for i, feature in enumerate(self.feature_names):
                 variation = np.std(cluster_centers[:, i])
@@ -313,20 +1286,30 @@ class HybridRecommender:
             self.logger.error(f"Error in get_feature_importances: {str(e)}")
             raise
 
-    def generate_evaluation_report(self, save_path="evaluation_report"):
+    def generate_evaluation_report(
+        self, save_path="evaluation_report", silhouette_sample_size=None
+    ):
         """
         Generate evaluation report with visualizations.
 
         Args:
             save_path (str): Directory to save evaluation files
+            silhouette_sample_size (int): Passed through to evaluate_model
         """
+        import matplotlib
+
+        matplotlib.use("Agg")  # reports are only written to files, possibly off-thread
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from sklearn.decomposition import PCA
+
         os.makedirs(save_path, exist_ok=True)
         self.logger.info(f"Generating evaluation report in {save_path}")
 
         try:
             # 1. Generate Cluster Distribution Plot
             plt.figure(figsize=(10, 6))
-            cluster_labels = self.kmeans.labels_
+            cluster_labels = self.cluster_labels_train
             cluster_sizes = pd.Series(cluster_labels).value_counts().sort_index()
             sns.barplot(x=cluster_sizes.index, y=cluster_sizes.values)
             plt.title("Distribution of Songs Across Clusters")
@@ -365,7 +1348,7 @@ class HybridRecommender:
             plt.scatter(
                 pca_features[:, 0],
                 pca_features[:, 1],
-                c=self.kmeans.labels_,
+                c=self.cluster_labels_train,
                 cmap="viridis",
                 alpha=0.6,
             )
@@ -376,7 +1359,7 @@ class HybridRecommender:
             plt.close()
 
             # 5. Save Evaluation Metrics
-            metrics = self.evaluate_model()
+            metrics = self.evaluate_model(silhouette_sample_size)
             with open(f"{save_path}/evaluation_metrics.txt", "w") as f:
                 f.write(
                     f"Test Set Silhouette Score: {metrics['silhouette_score']:.3f}\n"
@@ -0,0 +1,24 @@
+import numpy as np
+
+
+class FeatureScaler:
+    """
+    Fitted standardization, (x - mean) / scale, without scikit-learn.
+
+    Training fits a StandardScaler; serving only ever applies it, which this
+    does with the same arithmetic (including keeping float32 input float32),
+    so the API process never has to import scikit-learn.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, features) -> np.ndarray:
+        """Standardize rows of features, an array or DataFrame of shape (n, n_features)"""
+        features = np.asarray(features)
+        dtype = np.float32 if features.dtype == np.float32 else np.float64
+        scaled = np.array(features, dtype=dtype)
+        scaled -= self.mean_
+        scaled /= self.scale_
+        return scaled
@@ -0,0 +1,166 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import Iterator, List, Optional, Sequence
+
+from .filters import bitmap_contains
+
+# Characters at or below this codepoint delimit fields and rows; n-grams
+# never span them
+BOUNDARY = 0x1F
+FIELD_SEPARATOR = "\x1f"
+ROW_SEPARATOR = "\x1e"
+CODEPOINT_BITS = 21
+
+
+def _gram_codes(codepoints: np.ndarray, size: int):
+    """Pack every window of size codepoints into one integer per window"""
+    n_windows = len(codepoints) - size + 1
+    if n_windows <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=bool)
+    codes = np.zeros(n_windows, dtype=np.uint64)
+    valid = np.ones(n_windows, dtype=bool)
+    for offset in range(size):
+        window = codepoints[offset : offset + n_windows].astype(np.uint64)
+        codes = (codes << np.uint64(CODEPOINT_BITS)) | window
+        valid &= window > BOUNDARY
+    return codes, valid
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+class _GramTable:
+    """Inverted index from one n-gram size to sorted int32 row posting lists."""
+
+    def __init__(self, codepoints: np.ndarray, row_ids: np.ndarray, size: int):
+        self.size = size
+        codes, valid = _gram_codes(codepoints, size)
+        rows = row_ids[: len(codes)][valid]
+        codes = codes[valid]
+
+        # Sort by (gram, row) and drop repeats of a gram within a row
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+        self.keys, starts = np.unique(codes, return_index=True)
+        self.offsets = np.append(starts, len(codes)).astype(np.int64)
+        self.postings = rows.astype(np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.offsets.nbytes + self.postings.nbytes
+
+    def postings_for(self, query: str) -> List[np.ndarray]:
+        """Posting lists of every n-gram in query, shortest first"""
+        codes, _ = _gram_codes(_codepoints(query), self.size)
+        lists = []
+        for code in np.unique(codes):
+            i = np.searchsorted(self.keys, code)
+            if i == len(self.keys) or self.keys[i] != code:
+                return [np.empty(0, dtype=np.int32)]
+            lists.append(self.postings[self.offsets[i] : self.offsets[i + 1]])
+        return sorted(lists, key=len)
+
+
+class SearchIndex:
+    """
+    Case-insensitive substring search over catalog text columns.
+
+    Rows are indexed by the bigrams and trigrams of their lowercased fields.
+    A query intersects the posting lists of its n-grams to get candidate rows
+    in catalog order, then verifies each candidate with a plain substring test
+    until limit hits are found. Results match scanning the columns with
+    str.contains and taking head(limit).
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Sequence[str], logger=None):
+        """
+        Build the index.
+
+        Args:
+            df (pd.DataFrame): Catalog to index
+            columns (Sequence[str]): String columns to search
+            logger (logging.Logger): Optional logger for build statistics
+        """
+        start_time = time.time()
+
+        lowered = df[columns[0]].astype(str).str.lower()
+        for column in columns[1:]:
+            lowered = lowered + FIELD_SEPARATOR + df[column].astype(str).str.lower()
+        self.texts = lowered.tolist()
+
+        lengths = np.fromiter((len(t) + 1 for t in self.texts), dtype=np.int64)
+        codepoints = _codepoints(ROW_SEPARATOR.join(self.texts) + ROW_SEPARATOR)
+        row_ids = np.repeat(np.arange(len(self.texts), dtype=np.int32), lengths)
+
+        self.tables = {size: _GramTable(codepoints, row_ids, size) for size in (2, 3)}
+
+        if logger is not None:
+            logger.info(
+                f"Search index built over {len(self.texts)} rows in "
+                f"{time.time() - start_time:.2f} seconds, "
+                f"{self.nbytes / 2**20:.1f} MiB of posting lists"
+            )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(table.nbytes for table in self.tables.values())
+
+    def candidates(self, query: str, chunk_size: int = 256) -> Iterator[np.ndarray]:
+        """
+        Yield ascending chunks of rows holding every n-gram of query.
+
+        The shortest posting list is walked chunk by chunk and each chunk is
+        filtered against the other lists by binary search, so a caller that
+        stops early never pays for the full intersection.
+        """
+        if len(query) < 2:
+            yield np.arange(len(self.texts))
+            return
+        lists = self.tables[min(len(query), 3)].postings_for(query)
+        shortest, others = lists[0], lists[1:]
+        for start in range(0, len(shortest), chunk_size):
+            rows = shortest[start : start + chunk_size]
+            for postings in others:
+                found = np.searchsorted(postings, rows)
+                found[found == len(postings)] = 0
+                rows = rows[postings[found] == rows]
+                if len(rows) == 0:
+                    break
+            if len(rows):
+                yield rows
+
+    def search(
+        self, query: str, limit: int = 10, eligible: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """
+        Return up to limit row positions whose fields contain query.
+
+        Args:
+            query (str): Substring to look for, case-insensitive
+            limit (int): Maximum number of rows to return
+            eligible (np.ndarray): Packed bitmap of the rows that may match,
+                from FilterIndex.bitmap; candidates outside it are skipped
+                before the substring test
+
+        Returns:
+            List[int]: Matching row positions in catalog order
+        """
+        query = query.lower()
+        hits = []
+        if limit <= 0 or FIELD_SEPARATOR in query or ROW_SEPARATOR in query:
+            return hits
+        for rows in self.candidates(query):
+            if eligible is not None:
+                rows = rows[bitmap_contains(eligible, rows)]
+            for row in rows.tolist():
+                if query in self.texts[row]:
+                    hits.append(row)
+                    if len(hits) == limit:
+                        return hits
+        return hits
@@ -1,74 +1,216 @@
+import logging
+import threading
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional
+from .autocomplete import AutocompleteIndex
+from .catalog import gather_records, load_catalog
+from .export import EXPORT_CHUNK_SIZE, export_catalog, export_recommendations
+from .filters import FilterIndex, TrackFilter
+from .metrics import span, trace
 from .recommendation_model import HybridRecommender
+from .search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot(NamedTuple):
+    """Catalog, model and indexes that are always replaced together"""
+
+    df: pd.DataFrame
+    recommender: HybridRecommender
+    search_index: SearchIndex
+    autocomplete_index: AutocompleteIndex
+    filter_index: FilterIndex
 
 
 class SongHandler:
-    def __init__(self, csv_path: str):
-        """Initialize SongHandler with the path to the CSV file"""
-        self.df = pd.read_csv(csv_path)
-        self.recommender = HybridRecommender(n_clusters=8)
+    def __init__(
+        self,
+        csv_path: str,
+        artifact_dir: Optional[str] = None,
+        cache_size: int = 10000,
+        cache_ttl: Optional[float] = None,
+        n_clusters: int = 8,
+        clustering: str = "kmeans",
+        index: str = "brute",
+        n_probe: int = 2,
+        training: str = "memory",
+        quantization: str = "float32",
+        n_neighbours: int = 100,
+    ):
+        """Initialize SongHandler from a catalog CSV or columnar directory"""
+        df = load_catalog(csv_path)
+        recommender = HybridRecommender(
+            n_clusters=n_clusters,
+            data_path=csv_path,
+            catalog=df,
+            artifact_dir=artifact_dir,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            clustering=clustering,
+            index=index,
+            n_probe=n_probe,
+            training=training,
+            quantization=quantization,
+            n_neighbours=n_neighbours,
+        )
+        # Readers take self._snapshot once per call; updates build a new
+        # snapshot off to the side and swap it in with a single assignment
+        self._snapshot = self._build_snapshot(recommender)
+        self._update_lock = threading.Lock()
+        self.updates_since_refit = 0
+
+    @staticmethod
+    def _build_snapshot(recommender: HybridRecommender) -> CatalogSnapshot:
+        df = recommender.dataset
+        return CatalogSnapshot(
+            df=df,
+            recommender=recommender,
+            search_index=SearchIndex(
+                df, ["track_name", "artists", "album_name"], logger=logger
+            ),
+            autocomplete_index=AutocompleteIndex(df, logger=logger),
+            filter_index=FilterIndex(df),
+        )
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._snapshot.df
+
+    @property
+    def recommender(self) -> HybridRecommender:
+        return self._snapshot.recommender
+
+    @property
+    def track_index(self):
+        return self._snapshot.recommender.track_index
+
+    @property
+    def search_index(self) -> SearchIndex:
+        return self._snapshot.search_index
 
-        # Convert explicit column to boolean
-        self.df["explicit"] = self.df["explicit"].map({"True": True, "False": False})
+    @property
+    def autocomplete_index(self) -> AutocompleteIndex:
+        return self._snapshot.autocomplete_index
 
-        # Convert string columns to string type
-        string_columns = ["track_name", "artists", "album_name", "track_genre"]
-        for col in string_columns:
-            self.df[col] = self.df[col].astype(str)
+    def update_catalog(
+        self,
+        add: Optional[List[Dict[str, Any]]] = None,
+        remove: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Remove and/or append tracks and swap in the updated catalog"""
+        with self._update_lock:
+            current = self._snapshot
+            recommender = current.recommender.update_tracks(add=add, remove=remove)
+            self._snapshot = self._build_snapshot(recommender)
+            self.updates_since_refit += 1
+            return {
+                "rows_added": len(add or []),
+                "rows_removed": len(current.df)
+                + len(add or [])
+                - len(recommender.dataset),
+                "total_rows": len(recommender.dataset),
+                "model_version": recommender.model_version,
+            }
 
-    def search_songs(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def refit_clusters(self) -> bool:
+        """Refit clusters in place of the live model if tracks changed since"""
+        with self._update_lock:
+            if not self.updates_since_refit:
+                return False
+            current = self._snapshot
+            recommender = current.recommender.refit_clusters()
+            # Catalog and text indexes are unchanged
+            self._snapshot = current._replace(recommender=recommender)
+            self.updates_since_refit = 0
+            return True
+
+    def search_songs(
+        self, query: str, limit: int = 10, track_filter: Optional[TrackFilter] = None
+    ) -> List[Dict[str, Any]]:
         """Search songs by track name, artist, or album name"""
-        query = query.lower()
-        mask = (
-            self.df["track_name"].str.lower().str.contains(query, na=False)
-            | self.df["artists"].str.lower().str.contains(query, na=False)
-            | self.df["album_name"].str.lower().str.contains(query, na=False)
-        )
-        matching_songs = self.df[mask].head(limit)
-        return [self._convert_row_to_dict(row) for _, row in matching_songs.iterrows()]
+        with trace("search"):
+            snapshot = self._snapshot
+            with span("filter"):
+                eligible = snapshot.filter_index.bitmap(track_filter)
+            with span("search"):
+                positions = snapshot.search_index.search(query, limit, eligible)
+            with span("materialization"):
+                return gather_records(snapshot.df, positions)
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Complete a typed prefix to the most popular matching tracks"""
+        with trace("autocomplete"):
+            snapshot = self._snapshot
+            with span("search"):
+                matches = snapshot.autocomplete_index.complete(prefix, limit)
+            with span("materialization"):
+                completions = gather_records(
+                    snapshot.df,
+                    [position for position, _ in matches],
+                    ["track_id", "track_name", "artists", "popularity"],
+                )
+                for completion, (_, field) in zip(completions, matches):
+                    completion["matched_field"] = field
+            return completions
 
     def get_recommendations(
-        self, track_id: str, n_recommendations: int = 5
+        self,
+        track_id: str,
+        n_recommendations: int = 5,
+        track_filter: Optional[TrackFilter] = None,
     ) -> List[Dict[str, Any]]:
         """Get song recommendations using the hybrid recommender"""
         try:
-            recommendations = self.recommender.get_recommendations(
-                track_id=track_id, n_recommendations=n_recommendations
-            )
-            return recommendations
+            with trace("recommendations"):
+                return self.recommender.get_recommendations(
+                    track_id=track_id,
+                    n_recommendations=n_recommendations,
+                    track_filter=track_filter,
+                )
         except Exception as e:
             raise ValueError(f"Error getting recommendations: {str(e)}")
 
-    def _convert_row_to_dict(self, row: pd.Series) -> Dict[str, Any]:
-        """Convert a DataFrame row to a dictionary"""
-        return {
-            "track_id": str(row["track_id"]),
-            "artists": str(row["artists"]),
-            "album_name": str(row["album_name"]),
-            "track_name": str(row["track_name"]),
-            "popularity": int(row["popularity"]),
-            "duration_ms": int(row["duration_ms"]),
-            "explicit": bool(row["explicit"]),
-            "track_genre": str(row["track_genre"]),
-            "danceability": float(row["danceability"]),
-            "energy": float(row["energy"]),
-            "key": int(row["key"]),
-            "loudness": float(row["loudness"]),
-            "mode": int(row["mode"]),
-            "speechiness": float(row["speechiness"]),
-            "acousticness": float(row["acousticness"]),
-            "instrumentalness": float(row["instrumentalness"]),
-            "liveness": float(row["liveness"]),
-            "valence": float(row["valence"]),
-            "tempo": float(row["tempo"]),
-            "time_signature": int(row["time_signature"]),
-        }
+    def get_recommendations_batch(
+        self, track_ids: List[str], n_recommendations: int = 5, merge: bool = False
+    ):
+        """Get recommendations for many seed tracks in one blocked pass"""
+        try:
+            with trace("batch"):
+                return self.recommender.get_recommendations_batch(
+                    track_ids=track_ids,
+                    n_recommendations=n_recommendations,
+                    merge=merge,
+                )
+        except Exception as e:
+            raise ValueError(f"Error getting recommendations: {str(e)}")
 
     def get_song_by_id(self, track_id: str) -> Dict[str, Any]:
         """Get a single song by its track_id"""
-        song = self.df[self.df["track_id"] == track_id]
-        if song.empty:
-            raise ValueError(f"Song with track_id {track_id} not found")
-        return self._convert_row_to_dict(song.iloc[0])
+        with trace("get_song"):
+            snapshot = self._snapshot
+            with span("lookup"):
+                position = snapshot.recommender.track_index.get(track_id)
+            if position is None:
+                raise ValueError(f"Song with track_id {track_id} not found")
+            with span("materialization"):
+                return gather_records(snapshot.df, [position])[0]
+
+    def export_catalog(
+        self, cursor: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Stream the catalog as NDJSON chunks, resumable from a cursor"""
+        # The stream keeps the snapshot it started on, even across a swap
+        return export_catalog(self._snapshot.recommender, cursor, chunk_size)
+
+    def export_recommendations(
+        self,
+        n_recommendations: int = 10,
+        cursor: Optional[str] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Stream every track's recommendations as NDJSON chunks"""
+        return export_recommendations(
+            self._snapshot.recommender, n_recommendations, cursor, chunk_size
+        )
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional
+
+
+class TrackIndex:
+    """
+    O(1) track_id lookup over a catalog.
+
+    The Spotify CSV repeats a track once per genre, so a track_id can map to
+    several catalog rows. Lookups resolve deterministically to the first
+    occurrence in catalog order, while positions() exposes every row.
+    Optionally each row carries a train/test partition flag and its row
+    number inside that partition.
+    """
+
+    TRAIN = 0
+    TEST = 1
+    NONE = -1
+
+    def __init__(
+        self, track_ids: Iterable[str], train_positions=None, test_positions=None
+    ):
+        """
+        Build the index.
+
+        Args:
+            track_ids (Iterable[str]): track_id of every catalog row, in order
+            train_positions (np.ndarray): Catalog positions of the training
+                rows, in training-set order
+            test_positions (np.ndarray): Catalog positions of the test rows,
+                in test-set order. If either is omitted, no partition is
+                recorded.
+        """
+        codes, unique_ids = pd.factorize(pd.Series(track_ids, dtype=str))
+        self._code_by_id = {track_id: code for code, track_id in enumerate(unique_ids)}
+
+        # CSR layout: rows of code c are _rows[_offsets[c]:_offsets[c + 1]],
+        # ascending, so the first one is the canonical row
+        self._rows = np.argsort(codes, kind="stable").astype(np.int32)
+        self._offsets = np.searchsorted(
+            codes[self._rows], np.arange(len(unique_ids) + 1)
+        ).astype(np.int32)
+
+        n_rows = len(codes)
+        self.partition = np.full(n_rows, self.NONE, dtype=np.int8)
+        self.partition_row = np.full(n_rows, -1, dtype=np.int32)
+        if train_positions is not None and test_positions is not None:
+            self.partition[test_positions] = self.TEST
+            self.partition[train_positions] = self.TRAIN
+            self.partition_row[train_positions] = np.arange(len(train_positions))
+            self.partition_row[test_positions] = np.arange(len(test_positions))
+
+    def __len__(self) -> int:
+        return len(self._code_by_id)
+
+    def __contains__(self, track_id) -> bool:
+        return str(track_id) in self._code_by_id
+
+    def get(self, track_id: str) -> Optional[int]:
+        """Return the canonical catalog position of track_id, or None"""
+        code = self._code_by_id.get(str(track_id))
+        if code is None:
+            return None
+        return int(self._rows[self._offsets[code]])
+
+    def ordinal(self, track_id: str) -> Optional[int]:
+        """Return the dense 0..len-1 number of track_id, or None"""
+        return self._code_by_id.get(str(track_id))
+
+    def canonical_positions(self) -> np.ndarray:
+        """Return the canonical catalog position of every track, by ordinal"""
+        return self._rows[self._offsets[:-1]]
+
+    def positions(self, track_id: str) -> np.ndarray:
+        """Return every catalog position holding track_id, ascending"""
+        code = self._code_by_id.get(str(track_id))
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self._rows[self._offsets[code] : self._offsets[code + 1]]
+
+    def partition_positions(self, partition: int) -> np.ndarray:
+        """Return the catalog positions of a partition, in partition-row order"""
+        positions = np.flatnonzero(self.partition == partition)
+        return positions[np.argsort(self.partition_row[positions])]
+
+    def partition_rows(self, track_ids: Iterable[str], partition: int) -> np.ndarray:
+        """Return the partition row numbers of every row holding one of track_ids"""
+        positions = [self.positions(track_id) for track_id in track_ids]
+        if not positions:
+            return np.empty(0, dtype=np.int32)
+        positions = np.concatenate(positions)
+        positions = positions[self.partition[positions] == partition]
+        return self.partition_row[positions]
@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from .artifacts import ARTIFACT_VERSION, META_FILE
+from .catalog import iter_feature_chunks
+from .clustering import (
+    make_clusterer,
+    nearest_centers,
+    partial_fit_batches,
+    shuffled_batches,
+)
+
+PARTITIONS = ("train", "test")
+
+
+def _copy_chunked(source, target, chunk_size, transform=None):
+    """Copy source into target chunk_size rows at a time, optionally transformed"""
+    for start in range(0, len(source), chunk_size):
+        chunk = np.asarray(source[start : start + chunk_size])
+        target[start : start + len(chunk)] = (
+            chunk if transform is None else transform(chunk)
+        )
+    target.flush()
+
+
+def _read_spill(path, dtype, row_shape):
+    """Memory-map a raw spill file of rows of row_shape"""
+    row_bytes = np.dtype(dtype).itemsize * int(np.prod(row_shape))
+    n_rows = os.path.getsize(path) // row_bytes
+    if n_rows == 0:  # mmap cannot map an empty file
+        return np.empty((0, *row_shape), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n_rows, *row_shape))
+
+
+def train_out_of_core(recommender, chunk_size: int = 100000, n_passes: int = 3) -> str:
+    """
+    Train a recommender's model from its data_path straight into an artifact.
+
+    The catalog is streamed chunk_size rows at a time and never loaded as a
+    whole:
+
+    1. Each row is assigned to the train or test split with a seeded random
+       draw, the scaler is fitted with partial_fit on the training rows, and
+       the raw float32 features of both splits are spilled to disk.
+    2. The spilled features are scaled chunk by chunk into float32 .npy files.
+    3. MiniBatchKMeans streams shuffled batches from the memory-mapped
+       training matrix, then labels and the weighted, normalized scoring
+       matrix are written chunk by chunk.
+
+    Peak memory is a few chunks of features plus one int64 shuffle order per
+    training row. The artifact has the same layout as save_artifact writes,
+    plus the scaled feature matrices, so HybridRecommender memory-maps every
+    per-row matrix instead of recomputing it.
+
+    Args:
+        recommender (HybridRecommender): Model whose data_path, artifact_dir,
+            model_version and hyperparameters describe what to train
+        chunk_size (int): Catalog rows read and processed at a time
+        n_passes (int): Mini-batch passes over the training rows
+
+    Returns:
+        str: Path of the written artifact
+    """
+    directory = recommender.artifact_dir
+    key = recommender.model_version
+    n_features = len(recommender.feature_names)
+    rng = np.random.default_rng(recommender.random_state)
+    scaler = StandardScaler()
+
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, key)
+    staging = tempfile.mkdtemp(prefix=f".{key}-", dir=directory)
+
+    def path(name, suffix=".npy"):
+        return os.path.join(staging, f"{name}{suffix}")
+
+    try:
+        start_time = time.time()
+        n_rows = 0
+        with ExitStack() as stack:
+            spills = {
+                (part, kind): stack.enter_context(
+                    open(path(f"{part}_{kind}", ".raw"), "wb")
+                )
+                for part in PARTITIONS
+                for kind in ("features", "indices")
+            }
+            for chunk in iter_feature_chunks(
+                recommender.data_path, recommender.feature_names, chunk_size
+            ):
+                positions = np.arange(n_rows, n_rows + len(chunk), dtype=np.int64)
+                in_test = rng.random(len(chunk)) < recommender.test_size
+                for part, mask in (("train", ~in_test), ("test", in_test)):
+                    chunk[mask].tofile(spills[part, "features"])
+                    positions[mask].tofile(spills[part, "indices"])
+                if not in_test.all():
+                    scaler.partial_fit(chunk[~in_test])
+                n_rows += len(chunk)
+
+        counts = {}
+        for part in PARTITIONS:
+            indices = _read_spill(path(f"{part}_indices", ".raw"), np.int64, ())
+            counts[part] = len(indices)
+            out = np.lib.format.open_memmap(
+                path(f"{part}_indices"), mode="w+", dtype=np.int64, shape=indices.shape
+            )
+            _copy_chunked(indices, out, chunk_size)
+
+            raw = _read_spill(
+                path(f"{part}_features", ".raw"), np.float32, (n_features,)
+            )
+            out = np.lib.format.open_memmap(
+                path(f"scaled_features_{part}"),
+                mode="w+",
+                dtype=np.float32,
+                shape=raw.shape,
+            )
+            _copy_chunked(raw, out, chunk_size, scaler.transform)
+            del raw, indices, out
+            os.remove(path(f"{part}_features", ".raw"))
+            os.remove(path(f"{part}_indices", ".raw"))
+        recommender.logger.info(
+            f"Scaled {n_rows} rows ({counts['train']} train) in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+
+        scaled_train = np.load(path("scaled_features_train"), mmap_mode="r")
+        clusterer = make_clusterer(
+            "minibatch",
+            recommender.n_clusters,
+            recommender.minibatch_size,
+            random_state=recommender.random_state,
+        )
+        partial_fit_batches(
+            clusterer,
+            shuffled_batches(
+                scaled_train,
+                recommender.minibatch_size,
+                n_passes,
+                random_state=recommender.random_state,
+            ),
+        )
+        centers = clusterer.cluster_centers_
+
+        labels = np.lib.format.open_memmap(
+            path("cluster_labels"), mode="w+", dtype=np.int32, shape=(counts["train"],)
+        )
+        _copy_chunked(
+            scaled_train,
+            labels,
+            chunk_size,
+            lambda chunk: nearest_centers(chunk, centers)[0],
+        )
+        weighted = np.lib.format.open_memmap(
+            path("weighted_features"),
+            mode="w+",
+            dtype=np.float32,
+            shape=(counts["train"], n_features),
+        )
+        _copy_chunked(scaled_train, weighted, chunk_size, recommender._weighted_inputs)
+        del scaled_train, labels, weighted
+
+        np.save(path("scaler_mean"), scaler.mean_)
+        np.save(path("scaler_scale"), scaler.scale_)
+        np.save(path("cluster_centers"), centers)
+        meta = {
+            "params": recommender._hyperparameters(),
+            "data_path": os.path.abspath(recommender.data_path),
+            "n_rows": n_rows,
+            "chunk_size": chunk_size,
+            "version": ARTIFACT_VERSION,
+            "key": key,
+            "arrays": sorted(
+                name[: -len(".npy")]
+                for name in os.listdir(staging)
+                if name.endswith(".npy")
+            ),
+            "created": time.time(),
+        }
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+        recommender.logger.info(
+            f"Out-of-core training finished in {time.time() - start_time:.2f} seconds"
+        )
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
@@ -0,0 +1,88 @@
+"""
+Recall@k and latency of the IVF and cluster indexes against exact brute force.
+
+For every index and probe count the same seed tracks are queried and
+compared with the exact top-k, so an operating point can be picked from
+the printed recall/latency table. Latency is that of uncached
+get_recommendations calls, reported as p50/p99 and mean.
+
+Usage:
+    python -m benchmarks.bench_ann --rows 90000 --clusters 32 --k 10
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.recommendation_model import HybridRecommender
+from benchmarks.suite import latency_summary
+from benchmarks.synthetic import write_catalog
+
+
+def request_latencies(recommender, seeds, k):
+    """Latency summary of one uncached get_recommendations call per seed"""
+    latencies = []
+    for track_id in seeds:
+        start = time.perf_counter()
+        recommender.get_recommendations(track_id, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=90_000)
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--clustering", choices=["kmeans", "minibatch"], default="kmeans"
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "catalog.csv"), args.rows)
+        recommender = HybridRecommender(
+            n_clusters=args.clusters,
+            data_path=path,
+            clustering=args.clustering,
+            cache_size=0,
+        )
+
+    rng = np.random.default_rng(0)
+    seeds = recommender.dataset["track_id"].to_numpy()[
+        rng.integers(0, len(recommender.dataset), size=args.queries)
+    ]
+
+    print(f"train rows: {len(recommender.train_data)}, clusters: {args.clusters}")
+    header = f"{'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}"
+    print(f"{'index':>12} {'recall@k':>9} {'exact':>6} {'top1':>6} {header}")
+
+    def row(name, recall, exact, top1, latency):
+        print(
+            f"{name:>12} {recall:9.3f} {exact:6.2f} {top1:6.2f} "
+            f"{latency['p50']:8.2f} {latency['p99']:8.2f} {latency['mean']:8.2f}"
+        )
+
+    request_latencies(recommender, seeds[:3], args.k)  # Warm up
+    row("brute", 1, 1, 1, request_latencies(recommender, seeds, args.k))
+    for kind in ["ivf", "cluster"]:
+        for n_probe in range(1, args.clusters):
+            recommender.set_index(kind, n_probe=n_probe)
+            agreement = recommender.rank_agreement(seeds, args.k)
+            row(
+                f"{kind}/{n_probe}",
+                agreement["recall_at_k"],
+                agreement["exact_match"],
+                agreement["top1_match"],
+                request_latencies(recommender, seeds, args.k),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Latency of AutocompleteIndex prefix queries against a p99 target.
+
+Prefixes of 1-6 characters are cut from random titles and artists, the way
+a typeahead client sends them. Exits non-zero when p99 exceeds the target.
+
+Usage:
+    python -m benchmarks.bench_autocomplete --rows 90000 --p99-ms 1.0
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.autocomplete import AutocompleteIndex
+from benchmarks.synthetic import make_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=90_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--p99-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    df = make_catalog(args.rows)
+    start = time.perf_counter()
+    index = AutocompleteIndex(df)
+    print(f"build: {time.perf_counter() - start:.2f} s, {len(index.keys)} entries")
+
+    rng = np.random.default_rng(0)
+    sources = np.concatenate([df["track_name"].to_numpy(), df["artists"].to_numpy()])[
+        rng.integers(0, 2 * len(df), size=args.queries)
+    ]
+    prefixes = [s[: rng.integers(1, 7)] for s in sources]
+
+    latencies = np.empty(len(prefixes))
+    for i, prefix in enumerate(prefixes):
+        start = time.perf_counter()
+        index.complete(prefix, args.limit)
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {latencies.max():.3f} ms")
+    print(f"single-core capacity: {1000 / latencies.mean():.0f} queries/s")
+    if p99 > args.p99_ms:
+        print(f"FAIL: p99 above the {args.p99_ms} ms target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark for per-request hybrid scoring.
+
+Compares the original per-request implementation (re-weighting the full
+training matrix and building the genre boost row by row) against the
+precomputed scoring state used by HybridRecommender.
+
+Usage:
+    python -m benchmarks.bench_scoring --rows 90000 --requests 20
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.recommendation_model import HybridRecommender
+from benchmarks.synthetic import write_catalog
+
+
+def legacy_hybrid_scores(recommender, scaled_input, input_genre):
+    """Hybrid scores computed the way _get_hybrid_recommendations used to"""
+    weighted_features_train = recommender.scaled_features_train * np.array(
+        [recommender.feature_weights[f] for f in recommender.feature_names]
+    )
+    weighted_input = scaled_input * np.array(
+        [recommender.feature_weights[f] for f in recommender.feature_names]
+    )
+    # Catalog features are float32, the fitted centers may be float64
+    cluster = recommender.kmeans.predict(
+        scaled_input.astype(recommender.kmeans.cluster_centers_.dtype)
+    )[0]
+    cluster_mask = recommender.kmeans.labels_ == cluster
+    similarities = cosine_similarity(weighted_input, weighted_features_train)[0]
+    cluster_scores = np.zeros_like(similarities)
+    cluster_scores[cluster_mask] = 1.0
+    hybrid_scores = (
+        recommender.cluster_weight * cluster_scores
+        + recommender.content_weight * similarities
+    )
+    genre_boost = np.array(
+        [
+            0.2 if recommender.train_data.iloc[i]["track_genre"] == input_genre else 0
+            for i in range(len(recommender.train_data))
+        ]
+    )
+    return hybrid_scores + genre_boost
+
+
+def _time_ms(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=90_000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--legacy-requests", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "catalog.csv"), args.rows)
+        recommender = HybridRecommender(n_clusters=8, data_path=path)
+
+    rng = np.random.default_rng(0)
+    seeds = rng.integers(0, len(recommender.train_data), size=args.requests)
+
+    legacy, current = [], []
+    for i, row in enumerate(seeds):
+        song = recommender.train_data.iloc[row]
+        scaled_input = recommender.scaler.transform(
+            song[recommender.feature_names].to_frame().T
+        )
+        if i < args.legacy_requests:
+            elapsed, expected = _time_ms(
+                legacy_hybrid_scores, recommender, scaled_input, song["track_genre"]
+            )
+            legacy.append(elapsed)
+        elapsed, scores = _time_ms(
+            recommender._score_train_rows, scaled_input, song["track_genre"]
+        )
+        current.append(elapsed)
+        if i < args.legacy_requests:
+            np.testing.assert_allclose(scores, expected, rtol=1e-4, atol=1e-5)
+
+    print(f"train rows: {len(recommender.train_data)}")
+    print(f"legacy scoring:      median {statistics.median(legacy):9.2f} ms")
+    print(f"precomputed scoring: median {statistics.median(current):9.2f} ms")
+    print(f"speedup: {statistics.median(legacy) / statistics.median(current):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
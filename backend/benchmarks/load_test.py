@@ -0,0 +1,109 @@
+"""
+Closed-loop HTTP load test against a running API server.
+
+Each of --concurrency client threads sends requests back to back for
+--duration seconds. Run it against servers started with different
+PREDICTIFY_WORKERS values to see throughput scale across cores, and with a
+small PREDICTIFY_MAX_PENDING to see overload turn into fast 503s.
+
+Usage:
+    PREDICTIFY_WORKERS=4 python main.py &
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 32
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import requests
+
+SEED_QUERIES = ["the", "love", "me", "you", "in", "on", "er", "an"]
+
+
+def _worker(args, track_ids, deadline, latencies, statuses, lock):
+    session = requests.Session()
+    rng = random.Random(threading.get_ident())
+    while time.perf_counter() < deadline:
+        track_id = rng.choice(track_ids)
+        if args.endpoint == "recommendations":
+            url = f"{args.url}/api/songs/recommendations/{track_id}"
+        else:
+            url = f"{args.url}/api/songs/search?q={track_id[:3]}"
+        start = time.perf_counter()
+        try:
+            status = session.get(url, timeout=30).status_code
+        except requests.RequestException:
+            status = "error"
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(elapsed)
+
+
+def _seed_track_ids(url, limit=200):
+    """Search hits for common title words; any hit works as a seed"""
+    track_ids = {}
+    # The API ignores queries shorter than two characters
+    for query in SEED_QUERIES:
+        response = requests.get(
+            f"{url}/api/songs/search", params={"q": query, "limit": limit}
+        )
+        response.raise_for_status()
+        track_ids.update(dict.fromkeys(s["track_id"] for s in response.json()["songs"]))
+        if len(track_ids) >= limit:
+            break
+    return list(track_ids)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument(
+        "--endpoint", choices=["recommendations", "search"], default="recommendations"
+    )
+    parser.add_argument(
+        "--track-ids", help="File with one seed track_id per line", default=None
+    )
+    args = parser.parse_args()
+
+    if args.track_ids:
+        with open(args.track_ids) as f:
+            track_ids = [line.strip() for line in f if line.strip()]
+    else:
+        track_ids = _seed_track_ids(args.url)
+    if not track_ids:
+        sys.exit(
+            "No seed tracks: searches for common words matched nothing; "
+            "pass --track-ids FILE with one track_id per line"
+        )
+
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(
+            target=_worker, args=(args, track_ids, deadline, latencies, statuses, lock)
+        )
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"endpoint: {args.endpoint}, concurrency: {args.concurrency}")
+    print(f"throughput: {statuses[200] / args.duration:.1f} ok requests/s")
+    if latencies:
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"latency: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    print(f"statuses: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Performance regression suite for startup, search, lookup and recommendation.
+
+Each catalog size is measured in a fresh subprocess on a synthetic catalog
+with the Spotify CSV schema, so startup time and peak RSS come from a cold
+process. Results are written as JSON. With --baseline, every metric is
+compared against an earlier run, and the suite exits with status 1 when one
+regresses past its threshold in benchmarks/thresholds.json.
+
+Usage:
+    python -m benchmarks.suite --sizes 10000 100000 1000000 --out bench/HEAD.json
+    python -m benchmarks.suite --sizes 10000 100000 --baseline bench/main.json
+    python -m benchmarks.suite --compare bench/main.json bench/HEAD.json
+"""
+
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import WORDS, write_catalog
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def latency_summary(latencies_ms) -> dict:
+    """Percentiles and mean of a list of latencies in milliseconds"""
+    latencies_ms = np.asarray(latencies_ms)
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "mean": float(latencies_ms.mean()),
+    }
+
+
+def _time_calls(func, calls, warmup=3):
+    """Latency in ms of func(*args) for each args tuple, after warmup calls"""
+    for args in calls[:warmup]:
+        func(*args)
+    latencies = []
+    for args in calls:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def measure(catalog_path: str, queries: int = 200, batch_size: int = 32) -> dict:
+    """
+    Start a SongHandler on a catalog and time its request paths.
+
+    The recommendation cache is disabled so every call is scored. Called in
+    a fresh interpreter, so import_s is the cold import of the serving code.
+
+    Returns:
+        dict: import_s, startup_s, peak_rss_mb and a latency summary per
+        operation
+    """
+    start = time.perf_counter()
+    from app.song_handler import SongHandler
+
+    import_s = time.perf_counter() - start
+    import_rss_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    handler = SongHandler(catalog_path, cache_size=0)
+    startup_s = time.perf_counter() - start
+    startup_rss_mb = peak_rss_mb()
+
+    rng = np.random.default_rng(0)
+    track_ids = handler.df["track_id"].to_numpy()
+    seeds = track_ids[rng.integers(0, len(track_ids), size=queries)].tolist()
+    words = np.array(WORDS)[rng.integers(0, len(WORDS), size=queries)].tolist()
+    batches = [
+        track_ids[rng.integers(0, len(track_ids), size=batch_size)].tolist()
+        for _ in range(max(1, queries // batch_size))
+    ]
+
+    return {
+        "rows": len(handler.df),
+        "import_s": import_s,
+        "import_rss_mb": import_rss_mb,
+        "startup_s": startup_s,
+        "startup_rss_mb": startup_rss_mb,
+        "search_ms": _time_calls(handler.search_songs, [(word, 10) for word in words]),
+        "get_song_ms": _time_calls(handler.get_song_by_id, [(t,) for t in seeds]),
+        "recommendations_ms": _time_calls(
+            handler.get_recommendations, [(t, 10) for t in seeds]
+        ),
+        "batch_ms": _time_calls(
+            handler.get_recommendations_batch, [(b, 10) for b in batches], warmup=1
+        ),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def flatten(result: dict, prefix: str = "") -> dict:
+    """{"search_ms": {"p50": 1.0}} -> {"search_ms.p50": 1.0}"""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _threshold(metric: str, thresholds: dict):
+    """(max ratio, noise floor) of the first pattern in thresholds matching metric"""
+    for rule in thresholds["rules"]:
+        if fnmatch.fnmatch(metric, rule["metric"]):
+            return rule["max_ratio"], rule.get("min_delta", 0)
+    return None, 0
+
+
+def compare_results(baseline: dict, current: dict, thresholds: dict) -> list:
+    """
+    Compare two suite results metric by metric.
+
+    A metric regresses when it grew by more than its max_ratio and by more
+    than its min_delta, which keeps sub-millisecond jitter from failing runs.
+    Metrics whose first matching rule has a null max_ratio (p99, which is
+    too noisy over a few hundred queries) or no rule at all are reported
+    but never fail. Sizes missing from either run are skipped.
+
+    Returns:
+        list: One dict per compared metric with size, metric, baseline,
+        current, ratio and regressed
+    """
+    rows = []
+    for size, result in current["results"].items():
+        if size not in baseline["results"]:
+            continue
+        old = flatten(baseline["results"][size])
+        for metric, value in flatten(result).items():
+            if metric not in old or metric == "rows":
+                continue
+            max_ratio, min_delta = _threshold(metric, thresholds)
+            ratio = value / old[metric] if old[metric] else float("inf")
+            rows.append(
+                {
+                    "size": size,
+                    "metric": metric,
+                    "baseline": old[metric],
+                    "current": value,
+                    "ratio": ratio,
+                    "regressed": max_ratio is not None
+                    and ratio > max_ratio
+                    and value - old[metric] > min_delta,
+                }
+            )
+    return rows
+
+
+def print_comparison(rows: list):
+    print(f"{'rows':>8} {'metric':<24} {'baseline':>10} {'current':>10} {'ratio':>6}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(
+            f"{row['size']:>8} {row['metric']:<24} {row['baseline']:10.3f} "
+            f"{row['current']:10.3f} {row['ratio']:6.2f}{flag}"
+        )
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _run_size(args, catalog_path: str) -> dict:
+    """Measure one catalog in a fresh interpreter"""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.suite",
+            "--measure",
+            catalog_path,
+            "--queries",
+            str(args.queries),
+            "--batch-size",
+            str(args.batch_size),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--catalog-dir",
+        default=os.path.join(tempfile.gettempdir(), "predictify-bench"),
+        help="Synthetic catalogs are generated here once and reused",
+    )
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="Only compare two existing results files",
+    )
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        logging.disable(logging.INFO)
+        print(json.dumps(measure(args.measure, args.queries, args.batch_size)))
+        return 0
+
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+    else:
+        os.makedirs(args.catalog_dir, exist_ok=True)
+        current = {
+            "meta": {
+                "commit": _git_commit(),
+                "created": time.time(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "queries": args.queries,
+                "batch_size": args.batch_size,
+            },
+            "results": {},
+        }
+        for size in args.sizes:
+            path = os.path.join(args.catalog_dir, f"catalog-{size}.csv")
+            if not os.path.exists(path):
+                print(f"Generating {size} row catalog...", file=sys.stderr)
+                write_catalog(path, size, seed=size)
+            print(f"Measuring {size} rows...", file=sys.stderr)
+            result = _run_size(args, path)
+            current["results"][str(size)] = result
+            print(
+                f"{size:>8} rows: import {result['import_s']:.2f} s, "
+                f"startup {result['startup_s']:.2f} s, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB, "
+                f"search p50 {result['search_ms']['p50']:.2f} ms, "
+                f"get_song p50 {result['get_song_ms']['p50']:.3f} ms, "
+                f"recommendations p50 {result['recommendations_ms']['p50']:.2f} ms, "
+                f"batch p50 {result['batch_ms']['p50']:.2f} ms"
+            )
+        if args.out:
+            os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    rows = compare_results(baseline, current, thresholds)
+    print_comparison(rows)
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed past their threshold")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
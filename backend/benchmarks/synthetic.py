@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+TRACK_ID_ALPHABET = np.array(
+    list("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+)
+
+WORDS = [
+    "love",
+    "night",
+    "dance",
+    "summer",
+    "blue",
+    "heart",
+    "fire",
+    "dream",
+    "city",
+    "rain",
+    "gold",
+    "wild",
+    "moon",
+    "sky",
+    "road",
+    "home",
+    "light",
+    "shadow",
+    "river",
+    "storm",
+    "echo",
+    "velvet",
+    "neon",
+    "ocean",
+    "paper",
+]
+
+
+def _random_names(rng: np.random.Generator, n: int, n_words: int) -> np.ndarray:
+    words = np.array(WORDS)
+    picks = rng.integers(0, len(words), size=(n, n_words))
+    suffix = rng.integers(0, 10_000, size=n)
+    names = pd.Series(words[picks[:, 0]])
+    for i in range(1, n_words):
+        names = names + " " + words[picks[:, i]]
+    return (names + " " + pd.Series(suffix).astype(str)).to_numpy()
+
+
+def make_catalog(
+    n_rows: int, n_genres: int = 50, duplicate_fraction: float = 0.05, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate a synthetic catalog with the same schema as the Spotify CSV.
+
+    Args:
+        n_rows (int): Number of rows to generate
+        n_genres (int): Number of distinct genres
+        duplicate_fraction (float): Share of rows that repeat an earlier
+            track_id under a different genre, as in the Kaggle dataset
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Catalog with one row per (track, genre) entry
+    """
+    rng = np.random.default_rng(seed)
+    n_unique = max(1, int(n_rows * (1 - duplicate_fraction)))
+
+    track_ids = pd.Series(
+        TRACK_ID_ALPHABET[rng.integers(0, len(TRACK_ID_ALPHABET), size=(n_unique, 22))]
+        .view("<U22")
+        .ravel()
+    )
+    df = pd.DataFrame(
+        {
+            "track_id": track_ids,
+            "artists": _random_names(rng, n_unique, 1),
+            "album_name": _random_names(rng, n_unique, 2),
+            "track_name": _random_names(rng, n_unique, 2),
+            "popularity": rng.integers(0, 101, size=n_unique),
+            "duration_ms": rng.integers(60_000, 400_000, size=n_unique),
+            "explicit": rng.random(n_unique) < 0.1,
+            "danceability": rng.random(n_unique).round(3),
+            "energy": rng.random(n_unique).round(3),
+            "key": rng.integers(0, 12, size=n_unique),
+            "loudness": (-30 + 30 * rng.random(n_unique)).round(3),
+            "mode": rng.integers(0, 2, size=n_unique),
+            "speechiness": (0.3 * rng.random(n_unique)).round(4),
+            "acousticness": rng.random(n_unique).round(4),
+            "instrumentalness": (rng.random(n_unique) ** 4).round(4),
+            "liveness": (rng.random(n_unique) ** 2).round(4),
+            "valence": rng.random(n_unique).round(3),
+            "tempo": (60 + 140 * rng.random(n_unique)).round(3),
+            "time_signature": rng.choice([3, 4, 4, 4, 5], size=n_unique),
+            "track_genre": np.array([f"genre-{i}" for i in range(n_genres)])[
+                rng.integers(0, n_genres, size=n_unique)
+            ],
+        }
+    )
+
+    n_duplicates = n_rows - n_unique
+    if n_duplicates > 0:
+        duplicates = df.iloc[rng.integers(0, n_unique, size=n_duplicates)].copy()
+        duplicates["track_genre"] = np.array([f"genre-{i}" for i in range(n_genres)])[
+            rng.integers(0, n_genres, size=n_duplicates)
+        ]
+        df = pd.concat([df, duplicates], ignore_index=True)
+
+    return df
+
+
+def write_catalog(path: str, n_rows: int, **kwargs) -> str:
+    """Write a synthetic catalog CSV to path and return the path"""
+    make_catalog(n_rows, **kwargs).to_csv(path, index=False)
+    return path
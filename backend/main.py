@@ -1,9 +1,31 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import (
+    JSONResponse,
+    ORJSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
+from app import http_cache, metrics
+from app.ann_index import check_n_probe
+from app.executor import BoundedExecutor, OverloadedError
+from app.export import EXPORT_CHUNK_SIZE, StaleCursorError
+from app.filters import TrackFilter
 from app.song_handler import SongHandler
-from app.models import SongResponse, Song, ErrorResponse
+from app.models import (
+    SongResponse,
+    Song,
+    ErrorResponse,
+    AutocompleteResponse,
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    CatalogUpdateRequest,
+    CatalogUpdateResponse,
+)
 import os
 import logging
+import threading
+from typing import List, Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +37,26 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Deterministic GET responses carry an ETag derived from the catalog/model
+# version, so repeat polls get a 304 without a search or scoring pass, and
+# may be reused for PREDICTIFY_HTTP_MAX_AGE seconds. JSON bodies of at least
+# PREDICTIFY_COMPRESS_MIN_BYTES are gzip- (or brotli-, if installed) compressed
+app.add_middleware(
+    http_cache.CompressionMiddleware,
+    minimum_size=int(os.environ.get("PREDICTIFY_COMPRESS_MIN_BYTES", "1024")),
+)
+app.add_middleware(
+    http_cache.ETagMiddleware,
+    version=lambda: song_handler and song_handler.recommender.result_version,
+    routes=[
+        "/api/songs/search",
+        "/api/songs/autocomplete",
+        "/api/songs/{track_id}",
+        "/api/songs/recommendations/{track_id}",
+    ],
+    max_age=int(os.environ.get("PREDICTIFY_HTTP_MAX_AGE", "60")),
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -23,51 +65,214 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.LatencyMiddleware)
 
 # Initialize song handler
-csv_path = os.path.join(os.path.dirname(__file__), "data", "spotify_data_cleaned.csv")
+# A CSV, or a columnar directory from `python -m app.cli convert-catalog`
+csv_path = os.environ.get(
+    "PREDICTIFY_CATALOG",
+    os.path.join(os.path.dirname(__file__), "data", "spotify_data_cleaned.csv"),
+)
+artifact_dir = os.environ.get(
+    "PREDICTIFY_ARTIFACT_DIR", os.path.join(os.path.dirname(__file__), "artifacts")
+)
+# Evaluation report generation: "off" (default, use `python -m app.cli evaluate`)
+# or "background" to render it in a thread without delaying readiness
+evaluation_mode = os.environ.get("PREDICTIFY_EVALUATION", "off")
+evaluation_sample_size = int(os.environ.get("PREDICTIFY_SILHOUETTE_SAMPLE", "10000"))
+# Model hyperparameters; must match those used to build offline artifacts
+n_clusters = int(os.environ.get("PREDICTIFY_CLUSTERS", "8"))
+clustering = os.environ.get("PREDICTIFY_CLUSTERING", "kmeans")
+# "chunked" for artifacts built with `app.cli build-artifacts --training chunked`
+training = os.environ.get("PREDICTIFY_TRAINING", "memory")
+# Candidate index: "brute" (exact), or "ivf"/"cluster" scoring only the
+# PREDICTIFY_N_PROBE clusters nearest each seed; see `app.cli rank-agreement`
+index_kind = os.environ.get("PREDICTIFY_INDEX", "brute")
+n_probe = check_n_probe(int(os.environ.get("PREDICTIFY_N_PROBE", "2")))
+# Scanned feature representation: "float32", or "float16"/"int8" with the
+# shortlist rescored in full precision; see `app.cli rank-agreement`
+quantization = os.environ.get("PREDICTIFY_QUANTIZATION", "float32")
+# Neighbours per track of the precomputed table to serve from; must match
+# `python -m app.cli build-neighbours --neighbours`
+n_neighbours = int(os.environ.get("PREDICTIFY_NEIGHBOURS", "100"))
+# Recommendation result cache: seed tracks kept, and optional expiry in seconds
+cache_size = int(os.environ.get("PREDICTIFY_CACHE_SIZE", "10000"))
+cache_ttl = os.environ.get("PREDICTIFY_CACHE_TTL")
+cache_ttl = float(cache_ttl) if cache_ttl else None
+# Catalog updates over the API: off unless PREDICTIFY_INGEST=on. Clusters are
+# refined in the background every PREDICTIFY_REFIT_INTERVAL seconds (0 = never)
+# when tracks changed since the last refit
+ingest_enabled = os.environ.get("PREDICTIFY_INGEST", "off") == "on"
+refit_interval = float(os.environ.get("PREDICTIFY_REFIT_INTERVAL", "600"))
+refit_stop = threading.Event()
+# NDJSON bulk export endpoints: off unless PREDICTIFY_EXPORT=on, since a
+# recommendation export scores the whole catalog
+export_enabled = os.environ.get("PREDICTIFY_EXPORT", "off") == "on"
+# Requests slower than PREDICTIFY_SLOW_MS are logged with per-stage timings;
+# a PREDICTIFY_PROFILE_SAMPLE share of requests also runs under cProfile so
+# slow ones come with a profile
+metrics.profiler.threshold_ms = float(os.environ.get("PREDICTIFY_SLOW_MS", "0"))
+metrics.profiler.sample_rate = float(os.environ.get("PREDICTIFY_PROFILE_SAMPLE", "0"))
 song_handler = None
 
+# Search and scoring run on a bounded thread pool so they never block the
+# event loop; requests beyond workers + pending get a 503
+executor = BoundedExecutor(
+    max_workers=int(os.environ.get("PREDICTIFY_WORKERS", os.cpu_count() or 4)),
+    max_pending=int(os.environ.get("PREDICTIFY_MAX_PENDING", "64")),
+)
+
+
+def refit_clusters_periodically():
+    """Refit clusters after catalog updates; runs in a background thread"""
+    while not refit_stop.wait(refit_interval):
+        try:
+            if song_handler.refit_clusters():
+                logger.info("Swapped in refitted clusters")
+        except Exception as e:
+            logger.error(f"Failed to refit clusters: {str(e)}")
+
+
+def generate_evaluation_report():
+    """Render the evaluation report; runs off the request-serving path"""
+    evaluation_path = os.path.join(os.path.dirname(__file__), "evaluation_report")
+    try:
+        song_handler.recommender.generate_evaluation_report(
+            evaluation_path, silhouette_sample_size=evaluation_sample_size
+        )
+        logger.info(f"Evaluation report saved to {evaluation_path}")
+    except Exception as e:
+        logger.error(f"Failed to generate evaluation report: {str(e)}")
+
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    logger.warning(f"Rejected {request.url.path}: {str(exc)}")
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
 
 @app.on_event("startup")
 async def startup_event():
     global song_handler
     try:
         logger.info("Loading data and initializing model...")
-        song_handler = SongHandler(csv_path)
+        song_handler = SongHandler(
+            csv_path,
+            artifact_dir=artifact_dir,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            n_clusters=n_clusters,
+            clustering=clustering,
+            index=index_kind,
+            n_probe=n_probe,
+            training=training,
+            quantization=quantization,
+            n_neighbours=n_neighbours,
+        )
 
-        # Generate evaluation report
-        logger.info("Generating model evaluation report...")
-        evaluation_path = os.path.join(os.path.dirname(__file__), "evaluation_report")
-        song_handler.recommender.generate_evaluation_report(evaluation_path)
-        logger.info(f"Evaluation report saved to {evaluation_path}")
+        if evaluation_mode == "background":
+            logger.info("Generating model evaluation report in the background...")
+            threading.Thread(
+                target=generate_evaluation_report, name="evaluation", daemon=True
+            ).start()
+
+        if ingest_enabled and refit_interval > 0:
+            threading.Thread(
+                target=refit_clusters_periodically, name="refit", daemon=True
+            ).start()
 
     except Exception as e:
         logger.error(f"Failed to initialize: {str(e)}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    refit_stop.set()
+    executor.shutdown()
+
+
+# Song payloads are built from the typed catalog columns as plain dicts and
+# returned as ORJSONResponse, so FastAPI does not re-validate them through
+# the response_model, which only documents the schema
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Latency histograms, cache and queue stats in Prometheus text format"""
+    lines = metrics.render_histograms()
+    lines += metrics.render_stats(
+        "predictify_cache",
+        song_handler.recommender.cache.stats(),
+        counters=["hits", "misses", "evictions", "expirations", "invalidations"],
+    )
+    lines += metrics.render_stats(
+        "predictify_executor", executor.stats(), counters=["completed", "rejected"]
+    )
+    lines += metrics.render_stats(
+        "predictify_catalog",
+        {
+            "rows": len(song_handler.df),
+            "updates_since_refit": song_handler.updates_since_refit,
+        },
+    )
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=metrics.CONTENT_TYPE)
+
+
+def track_filter(
+    genre: List[str] = Query([], description="Any of these genres"),
+    explicit: Optional[bool] = None,
+    key: List[int] = Query([], description="Any of these pitch classes, 0-11"),
+    mode: Optional[int] = Query(None, ge=0, le=1, description="1 major, 0 minor"),
+    min_popularity: Optional[int] = Query(None, ge=0, le=100),
+    max_popularity: Optional[int] = Query(None, ge=0, le=100),
+) -> TrackFilter:
+    """Filter query parameters shared by search and recommendations"""
+    return TrackFilter(
+        genres=tuple(genre),
+        explicit=explicit,
+        keys=tuple(key),
+        mode=mode,
+        min_popularity=min_popularity,
+        max_popularity=max_popularity,
+    )
+
+
 @app.get("/api/songs/search", response_model=SongResponse)
-async def search_songs(q: str, limit: int = 10):
-    """Search for songs by track name or artist"""
+async def search_songs(
+    q: str, limit: int = 10, filters: TrackFilter = Depends(track_filter)
+):
+    """Search for songs by track name or artist, optionally filtered"""
     logger.info(f"Searching for: {q}")
     if len(q) < 2:
         return SongResponse(songs=[], total=0)
     try:
-        songs = [Song(**song_dict) for song_dict in song_handler.search_songs(q, limit)]
-        return SongResponse(songs=songs, total=len(songs))
+        songs = await executor.run(song_handler.search_songs, q, limit, filters)
+        return ORJSONResponse({"songs": songs, "total": len(songs)})
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/songs/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(q: str, limit: int = 10):
+    """Complete a prefix to the most popular tracks by title or artist"""
+    try:
+        completions = song_handler.autocomplete(q, limit)
+        return AutocompleteResponse(completions=completions, total=len(completions))
+    except Exception as e:
+        logger.error(f"Autocomplete error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/songs/{track_id}", response_model=Song)
 async def get_song(track_id: str):
     """Get a single song by its track_id"""
     logger.info(f"Fetching song: {track_id}")
     try:
-        song_dict = song_handler.get_song_by_id(track_id)
-        return Song(**song_dict)
+        return ORJSONResponse(song_handler.get_song_by_id(track_id))
     except ValueError as e:
         logger.error(f"Song not found: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -77,45 +282,27 @@ async def get_song(track_id: str):
 
 
 @app.get("/api/songs/recommendations/{track_id}", response_model=SongResponse)
-async def get_recommendations(track_id: str, limit: int = 5):
-    """Get song recommendations based on audio features"""
+async def get_recommendations(
+    track_id: str, limit: int = 5, filters: TrackFilter = Depends(track_filter)
+):
+    """
+    Get song recommendations based on audio features.
+
+    With filters, only matching tracks are scored and a full page of limit
+    songs is returned whenever that many match.
+    """
     logger.info(f"Getting recommendations for: {track_id}")
     try:
-        recommendations = song_handler.get_recommendations(track_id, limit)
+        recommendations = await executor.run(
+            song_handler.get_recommendations, track_id, limit, filters
+        )
         if not recommendations:
             raise ValueError("No recommendations found for the given track ID")
 
-        # Convert to list of Songs
-        songs = []
-        for rec in recommendations:
-            audio = rec.get("audio_features", {})
-            song_data = {
-                "track_id": str(rec["track_id"]),
-                "track_name": str(rec["track_name"]),
-                "artists": str(rec["artists"]),
-                "album_name": str(rec["album_name"]),
-                "track_genre": str(rec["track_genre"]),
-                # Add other fields that you don't have from recommendations as defaults if necessary
-                "popularity": 0,
-                "duration_ms": 0,
-                "explicit": False,
-                "danceability": float(audio.get("danceability", 0.0)),
-                "energy": float(audio.get("energy", 0.0)),
-                "key": 0,  # If you don't have these from rec, it's okay to keep them 0 or any default
-                "loudness": 0.0,
-                "mode": 0,
-                "speechiness": 0.0,
-                "acousticness": float(audio.get("acousticness", 0.0)),
-                "instrumentalness": float(audio.get("instrumentalness", 0.0)),
-                "liveness": float(audio.get("liveness", 0.0)),
-                "valence": float(audio.get("valence", 0.0)),
-                "tempo": 0.0,
-                "time_signature": 4,
-            }
-            songs.append(Song(**song_data))
-
-        return SongResponse(songs=songs, total=len(songs))
+        return ORJSONResponse({"songs": recommendations, "total": len(recommendations)})
 
+    except OverloadedError:
+        raise
     except ValueError as e:
         logger.error(f"Error getting recommendations: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -124,6 +311,102 @@ async def get_recommendations(track_id: str, limit: int = 5):
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+@app.post(
+    "/api/songs/recommendations/batch", response_model=BatchRecommendationResponse
+)
+async def get_recommendations_batch(request: BatchRecommendationRequest):
+    """Get recommendations for many seed tracks, or one merged playlist"""
+    logger.info(f"Getting batch recommendations for {len(request.track_ids)} tracks")
+    try:
+        results = await executor.run(
+            song_handler.get_recommendations_batch,
+            request.track_ids,
+            request.limit,
+            merge=request.merge,
+        )
+        missing = [t for t in request.track_ids if t not in song_handler.track_index]
+        if request.merge:
+            return ORJSONResponse(
+                {"results": {}, "playlist": results, "missing": missing}
+            )
+        return ORJSONResponse(
+            {"results": results, "playlist": None, "missing": missing}
+        )
+
+    except OverloadedError:
+        raise
+    except ValueError as e:
+        logger.error(f"Error getting batch recommendations: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error getting batch recommendations: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@app.post("/api/catalog/tracks", response_model=CatalogUpdateResponse)
+def update_catalog(request: CatalogUpdateRequest):
+    """Remove and/or add tracks; they are searchable and recommendable at once"""
+    if not ingest_enabled:
+        raise HTTPException(status_code=403, detail="Catalog updates are disabled")
+    logger.info(
+        f"Updating catalog: {len(request.add)} to add, {len(request.remove)} to remove"
+    )
+    try:
+        # Runs on FastAPI's thread pool; readers keep the previous snapshot
+        # until the update is swapped in
+        return song_handler.update_catalog(
+            add=[song.model_dump() for song in request.add], remove=request.remove
+        )
+    except ValueError as e:
+        logger.error(f"Invalid catalog update: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error updating catalog: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def _export_response(export, *args):
+    """Validate an export's cursor up front, then stream its NDJSON chunks"""
+    if not export_enabled:
+        raise HTTPException(status_code=403, detail="Exports are disabled")
+    try:
+        chunks = export(*args)
+    except StaleCursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Chunks are generated on the thread pool as the client reads them
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
+@app.get("/api/export/catalog")
+def export_catalog(
+    cursor: Optional[str] = None,
+    chunk_size: int = Query(EXPORT_CHUNK_SIZE, ge=1, le=100000),
+):
+    """
+    Stream every catalog row as NDJSON.
+
+    Each chunk of records is followed by a {"cursor": ...} line; pass the
+    last one back as ?cursor= to resume. The final cursor line is null.
+    """
+    logger.info(f"Exporting catalog from cursor {cursor}")
+    return _export_response(song_handler.export_catalog, cursor, chunk_size)
+
+
+@app.get("/api/export/recommendations")
+def export_recommendations(
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    chunk_size: int = Query(EXPORT_CHUNK_SIZE, ge=1, le=100000),
+):
+    """Stream every track's recommendations as NDJSON, resumable like the catalog"""
+    logger.info(f"Exporting recommendations from cursor {cursor}")
+    return _export_response(
+        song_handler.export_recommendations, limit, cursor, chunk_size
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
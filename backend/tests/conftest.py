@@ -0,0 +1,15 @@
+import pytest
+
+from app.recommendation_model import HybridRecommender
+from benchmarks.synthetic import write_catalog
+
+
+@pytest.fixture(scope="session")
+def catalog_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "spotify_data.csv"
+    return str(write_catalog(str(path), 3000, seed=7))
+
+
+@pytest.fixture(scope="session")
+def recommender(catalog_path):
+    return HybridRecommender(n_clusters=8, data_path=catalog_path)
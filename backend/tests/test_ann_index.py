@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.ann_index import BruteForceIndex, ClusterIndex, IVFIndex, build_index
+from app.recommendation_model import HybridRecommender
+
+
+def test_ivf_candidates_are_probed_cells():
+    centroids = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    labels = np.array([0, 1, 2, 0, 1, 2, 0])
+    index = IVFIndex(centroids, labels, n_probe=2)
+
+    query = np.array([[1.0, 2.0]])
+    np.testing.assert_array_equal(index.nearest_cells(query), [0, 2])
+    np.testing.assert_array_equal(index.candidates(query), [0, 2, 3, 5, 6])
+
+    index.n_probe = 3
+    assert index.candidates(query) is None
+
+
+def test_build_index():
+    assert isinstance(build_index("brute", None, None), BruteForceIndex)
+    with pytest.raises(ValueError):
+        build_index("hnsw", None, None)
+
+
+def test_ivf_recall_against_brute_force(recommender):
+    seeds = recommender.dataset["track_id"].iloc[:20]
+    exact = [
+        {r["track_id"] for r in recommender.get_recommendations(t, 10)} for t in seeds
+    ]
+
+    try:
+        recommender.set_index("ivf", n_probe=3)
+        approximate = [
+            {r["track_id"] for r in recommender.get_recommendations(t, 10)}
+            for t in seeds
+        ]
+    finally:
+        recommender.set_index("brute")
+
+    recall = np.mean([len(a & e) / len(e) for a, e in zip(approximate, exact)])
+    assert recall >= 0.9
+
+
+def test_cluster_layout_is_contiguous_by_cluster_and_genre():
+    centroids = np.array([[0.0, 0.0], [10.0, 0.0]])
+    labels = np.array([1, 0, 1, 0, 1, 0])
+    genre_codes = np.array([2, 0, 0, 2, 2, 0])
+    features = np.arange(12, dtype=np.float32).reshape(6, 2)
+    index = ClusterIndex(centroids, labels, features, genre_codes, n_probe=1)
+
+    assert index.cell_range(0) == (0, 3)
+    np.testing.assert_array_equal(index.cell_rows(0), [1, 5, 3])
+    np.testing.assert_array_equal(index.cell_rows(1), [2, 0, 4])
+    assert index.genre_range(1, 2) == (4, 6)
+    assert index.genre_range(1, 1) == (4, 4)
+    np.testing.assert_array_equal(index.features[0], features[1])
+
+
+def test_cluster_scoring_agrees_with_full_scan(recommender):
+    seeds = recommender.dataset["track_id"].iloc[:40]
+    try:
+        # Probing every cluster is exact
+        recommender.set_index("cluster", n_probe=recommender.n_clusters)
+        agreement = recommender.rank_agreement(seeds, 10)
+        assert agreement["exact_match"] == 1.0
+
+        recommender.set_index("cluster", n_probe=3)
+        agreement = recommender.rank_agreement(seeds, 10)
+        assert agreement["recall_at_k"] >= 0.9
+        assert agreement["queries"] == 40
+    finally:
+        recommender.set_index("brute", n_probe=2)
+
+
+@pytest.mark.parametrize("n_probe", [0, -1, 1.5])
+def test_invalid_n_probe_is_rejected(recommender, n_probe):
+    with pytest.raises(ValueError, match="n_probe"):
+        recommender.set_index("cluster", n_probe=n_probe)
+    assert recommender.n_probe >= 1
+    with pytest.raises(ValueError, match="n_probe"):
+        HybridRecommender(n_probe=n_probe)
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from app.artifacts import ARTIFACT_VERSION, load_artifact, save_artifact
+from app.recommendation_model import HybridRecommender
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    arrays = {"a": np.arange(5, dtype=np.int32), "b": np.ones((2, 3))}
+    path = save_artifact(str(tmp_path), "abc", arrays, {"n_rows": 5})
+
+    artifact = load_artifact(str(tmp_path), "abc")
+    assert artifact["meta"]["version"] == ARTIFACT_VERSION
+    assert artifact["meta"]["n_rows"] == 5
+    assert isinstance(artifact["arrays"]["a"], np.memmap)
+    np.testing.assert_array_equal(artifact["arrays"]["b"], arrays["b"])
+    assert load_artifact(str(tmp_path), "missing") is None
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_recommender_restores_from_artifact(catalog_path, tmp_path):
+    trained = HybridRecommender(data_path=catalog_path, artifact_dir=str(tmp_path))
+    assert os.path.isdir(tmp_path / trained.model_version)
+
+    restored = HybridRecommender(data_path=catalog_path, artifact_dir=str(tmp_path))
+    assert restored.model_version == trained.model_version
+    assert not hasattr(restored.kmeans, "cluster_centers_")  # no retraining
+    assert isinstance(restored.weighted_features_train, np.memmap)
+
+    for track_id in trained.dataset["track_id"].iloc[:10]:
+        assert restored.get_recommendations(
+            track_id, 10
+        ) == trained.get_recommendations(track_id, 10)
+
+
+def test_artifact_key_tracks_hyperparameters(catalog_path, tmp_path):
+    a = HybridRecommender(n_clusters=4, data_path=catalog_path)
+    b = HybridRecommender(n_clusters=5, data_path=catalog_path)
+    assert a.model_version != b.model_version
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from app.autocomplete import AutocompleteIndex, normalize
+from benchmarks.synthetic import make_catalog
+
+
+def _brute_force(df, prefix, limit):
+    prefix = normalize(prefix)
+    tracks = df.drop_duplicates("track_id")
+    matches = tracks["track_name"].map(normalize).str.startswith(prefix) | tracks[
+        "artists"
+    ].map(lambda a: any(normalize(x).startswith(prefix) for x in a.split(";")))
+    ranked = tracks[matches].sort_values("popularity", ascending=False, kind="stable")
+    return ranked["popularity"].head(limit).tolist()
+
+
+def test_completions_ranked_by_popularity():
+    df = make_catalog(3000, seed=5)
+    df.loc[10, "artists"] = "Queen;David Bowie"
+    index = AutocompleteIndex(df)
+
+    for prefix in ["l", "Lo", "night s", "david", "sky 1", "nope"]:
+        completions = index.complete(prefix, 10)
+        assert [df["popularity"].iloc[row] for row, _ in completions] == (
+            _brute_force(df, prefix, 10)
+        )
+        track_ids = [df["track_id"].iloc[row] for row, _ in completions]
+        assert len(set(track_ids)) == len(track_ids)
+
+
+def test_matched_field_and_multi_artist():
+    df = pd.DataFrame(
+        {
+            "track_id": ["a", "b", "c", "a"],
+            "track_name": ["Under Pressure", "Heroes", "Queen Bee", "Under Pressure"],
+            "artists": ["Queen;David Bowie", "David Bowie", "Someone", "Queen"],
+            "popularity": [80, 70, 90, 80],
+        }
+    )
+    index = AutocompleteIndex(df)
+
+    assert index.complete("queen", 10) == [(2, "track_name"), (0, "artists")]
+    assert index.complete("  DAVID  b", 1) == [(0, "artists")]
+    assert index.complete("", 10) == []
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def seeds(recommender):
+    return recommender.dataset["track_id"].iloc[:40].tolist()
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64])
+def test_batch_matches_single_requests(recommender, seeds, block_size):
+    results = recommender.get_recommendations_batch(
+        seeds + ["missing"], 10, block_size=block_size
+    )
+
+    assert list(results) == list(dict.fromkeys(seeds))
+    for track_id in results:
+        single = recommender.get_recommendations(track_id, 10)
+        assert [r["track_id"] for r in results[track_id]] == [
+            r["track_id"] for r in single
+        ]
+        assert [r["similarity_score"] for r in results[track_id]] == pytest.approx(
+            [r["similarity_score"] for r in single], abs=1e-5
+        )
+
+
+def test_merged_playlist_excludes_seeds(recommender, seeds):
+    playlist = recommender.get_recommendations_batch(seeds[:5], 20, merge=True)
+
+    assert len(playlist) == 20
+    assert not {r["track_id"] for r in playlist} & set(seeds[:5])
+    scores = [r["similarity_score"] for r in playlist]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_unknown_seeds_only(recommender):
+    with pytest.raises(ValueError):
+        recommender.get_recommendations_batch(["missing"])
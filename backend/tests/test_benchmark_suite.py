@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+
+from benchmarks.bench_scoring import legacy_hybrid_scores
+from benchmarks.suite import DEFAULT_THRESHOLDS, compare_results, measure
+
+
+def _result(**metrics):
+    return {"results": {"10000": metrics}}
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    with open(DEFAULT_THRESHOLDS) as f:
+        thresholds = json.load(f)
+    baseline = _result(
+        startup_s=10.0,
+        peak_rss_mb=500.0,
+        search_ms={"p50": 0.1, "p99": 1.0},
+        recommendations_ms={"p50": 3.0, "p99": 5.0},
+    )
+    current = _result(
+        startup_s=11.0,  # within 1.3x
+        peak_rss_mb=700.0,  # past 1.15x
+        search_ms={"p50": 0.2, "p99": 9.0},  # 2x but under the noise floor; p99
+        recommendations_ms={"p50": 4.5, "p99": 5.0},  # past 1.25x
+    )
+
+    rows = compare_results(baseline, current, thresholds)
+    assert sorted(r["metric"] for r in rows if r["regressed"]) == [
+        "peak_rss_mb",
+        "recommendations_ms.p50",
+    ]
+    unchanged = compare_results(baseline, baseline, thresholds)
+    assert unchanged and not any(r["regressed"] for r in unchanged)
+
+
+def test_measure_reports_every_operation(catalog_path):
+    result = measure(catalog_path, queries=20, batch_size=8)
+
+    assert result["rows"] == 3000
+    assert result["startup_s"] > 0 and result["peak_rss_mb"] > 0
+    for operation in ["search_ms", "get_song_ms", "recommendations_ms", "batch_ms"]:
+        assert set(result[operation]) == {"p50", "p95", "p99", "mean"}
+
+
+def test_legacy_scoring_benchmark_matches_the_model(recommender):
+    row = 5
+    scaled_input = recommender.scaled_features_train[row : row + 1]
+    genre = recommender.train_data["track_genre"].iloc[row]
+    np.testing.assert_allclose(
+        recommender._score_train_rows(scaled_input, genre),
+        legacy_hybrid_scores(recommender, scaled_input, genre),
+        rtol=1e-4,
+        atol=1e-5,
+    )
@@ -0,0 +1,75 @@
+import pytest
+
+from app.cache import RecommendationCache
+
+
+def _recs(n):
+    return [{"track_id": f"t{i}"} for i in range(n)]
+
+
+def test_smaller_limits_are_served_from_larger_lists():
+    cache = RecommendationCache(max_entries=10)
+    cache.put("a", 10, "v1", _recs(10))
+
+    assert cache.get("a", 3, "v1") == _recs(3)
+    assert cache.get("a", 20, "v1") is None
+    # A list that came back short is complete for any limit
+    cache.put("b", 10, "v1", _recs(4))
+    assert cache.get("b", 50, "v1") == _recs(4)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = RecommendationCache(max_entries=2)
+    cache.put("a", 5, "v1", _recs(5))
+    cache.put("b", 5, "v1", _recs(5))
+    cache.get("a", 5, "v1")
+    cache.put("c", 5, "v1", _recs(5))
+
+    assert cache.get("b", 5, "v1") is None
+    assert cache.get("a", 5, "v1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = RecommendationCache(ttl=30)
+    cache.put("a", 5, "v1", _recs(5))
+
+    now[0] = 129.0
+    assert cache.get("a", 5, "v1") is not None
+    now[0] = 130.0
+    assert cache.get("a", 5, "v1") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_new_version_invalidates():
+    cache = RecommendationCache()
+    cache.put("a", 5, "v1", _recs(5))
+
+    assert cache.get("a", 5, "v2") is None
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cached_results_match_fresh_scoring(recommender):
+    track_id = recommender.dataset["track_id"].iloc[11]
+    recommender.cache.clear()
+    full = recommender.get_recommendations(track_id, 10)
+    hits = recommender.cache.hits
+
+    assert recommender.get_recommendations(track_id, 4) == full[:4]
+    assert recommender.cache.hits == hits + 1
+
+    recommender.cache.clear()
+    assert recommender.get_recommendations(track_id, 4) == full[:4]
+
+
+def test_missing_track_is_not_cached(recommender):
+    with pytest.raises(ValueError):
+        recommender.get_recommendations("missing", 5)
+    with pytest.raises(ValueError):
+        recommender.get_recommendations("missing", 5)
+    assert "missing" not in recommender.cache._entries
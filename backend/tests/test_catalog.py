@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from app.catalog import (
+    SONG_COLUMNS,
+    catalog_fingerprint,
+    convert_to_columnar,
+    gather_records,
+    load_catalog,
+    to_python_float,
+)
+
+
+def test_csv_is_loaded_with_compact_dtypes(catalog_path):
+    df = load_catalog(catalog_path)
+
+    assert df["danceability"].dtype == np.float32
+    assert df["key"].dtype == np.int8
+    assert df["explicit"].dtype == bool
+    assert isinstance(df["track_genre"].dtype, pd.CategoricalDtype)
+    assert df["track_id"].map(type).eq(str).all()
+
+
+def test_gather_records_matches_row_conversion(catalog_path):
+    df = load_catalog(catalog_path)
+    positions = [17, 3, 17, 2999]
+
+    records = gather_records(df, positions)
+
+    assert len(records) == 4
+    for record, position in zip(records, positions):
+        row = df.iloc[position]
+        assert list(record) == SONG_COLUMNS
+        assert record["track_id"] == row["track_id"]
+        assert record["track_genre"] == row["track_genre"]
+        assert record["tempo"] == to_python_float(row["tempo"])
+        assert record["popularity"] == int(row["popularity"])
+        assert type(record["explicit"]) is bool
+        assert type(record["key"]) is int
+    assert gather_records(df, []) == []
+
+
+def test_columnar_roundtrip(catalog_path, tmp_path):
+    out = convert_to_columnar(catalog_path, str(tmp_path / "catalog.columns"))
+
+    columnar = load_catalog(out)
+    pd.testing.assert_frame_equal(columnar, load_catalog(catalog_path))
+    assert isinstance(columnar["energy"].to_numpy().base, np.memmap)
+    assert catalog_fingerprint(out) == catalog_fingerprint(catalog_path)
+
+
+def test_missing_names_and_float32_repr(tmp_path):
+    path = tmp_path / "tiny.csv"
+    pd.DataFrame(
+        {
+            "Unnamed: 0": [0],
+            "track_id": ["x"],
+            "artists": [None],
+            "album_name": ["A"],
+            "track_name": ["T"],
+            "popularity": [50],
+            "duration_ms": [1000],
+            "explicit": [True],
+            "danceability": [0.756],
+            "energy": [0.5],
+            "key": [1],
+            "loudness": [-16.627],
+            "mode": [1],
+            "speechiness": [0.1],
+            "acousticness": [0.1],
+            "instrumentalness": [0.0],
+            "liveness": [0.1],
+            "valence": [0.2],
+            "tempo": [120.155],
+            "time_signature": [4],
+            "track_genre": ["pop"],
+        }
+    ).to_csv(path, index=False)
+
+    df = load_catalog(str(path))
+    assert "Unnamed: 0" not in df.columns
+    assert df["artists"].iloc[0] == ""
+    assert to_python_float(df["loudness"].iloc[0]) == -16.627
@@ -0,0 +1,83 @@
+import pytest
+
+from app.catalog import gather_records
+from app.song_handler import SongHandler
+
+
+def _new_track(recommender, position, track_id, track_name="fresh release"):
+    track = gather_records(recommender.dataset, [position])[0]
+    return {**track, "track_id": track_id, "track_name": track_name}
+
+
+def test_added_tracks_are_recommended_immediately(recommender):
+    seed = recommender.dataset["track_id"].iloc[10]
+    updated = recommender.update_tracks(add=[_new_track(recommender, 10, "new-1")])
+
+    # Same features and genre as the seed, so it is the best match
+    assert updated.get_recommendations(seed, 5)[0]["track_id"] == "new-1"
+    assert updated.get_recommendations("new-1", 5)[0]["track_id"] == seed
+    assert len(updated.dataset) == len(recommender.dataset) + 1
+    assert updated.model_version != recommender.model_version
+
+    # The original model is untouched
+    assert "new-1" not in recommender.track_index
+    assert "new-1" not in {
+        r["track_id"] for r in recommender.get_recommendations(seed, 5)
+    }
+
+
+def test_removed_tracks_disappear(recommender):
+    seed = recommender.dataset["track_id"].iloc[20]
+    before = [r["track_id"] for r in recommender.get_recommendations(seed, 10)]
+    updated = recommender.update_tracks(remove=[before[0], before[3]])
+
+    after = [r["track_id"] for r in updated.get_recommendations(seed, 5)]
+    assert after == [t for t in before if t not in (before[0], before[3])][:5]
+    assert before[0] not in updated.track_index
+    with pytest.raises(ValueError):
+        updated.get_recommendations(before[0], 5)
+
+
+def test_new_genres_are_scored(recommender):
+    track = _new_track(recommender, 30, "new-genre-track")
+    track["track_genre"] = "brand new genre"
+    updated = recommender.update_tracks(add=[track])
+
+    assert updated.genre_to_code["brand new genre"] >= 0
+    assert updated.get_recommendations("new-genre-track", 3)
+
+
+def test_refit_clusters(recommender):
+    additions = [_new_track(recommender, i, f"refit-{i}") for i in range(0, 600, 3)]
+    updated = recommender.update_tracks(add=additions)
+    refitted = updated.refit_clusters()
+
+    assert refitted.model_version != updated.model_version
+    assert refitted.cluster_centers.shape == updated.cluster_centers.shape
+    assert (
+        refitted.cluster_labels_train
+        == refitted._predict_clusters(refitted.scaled_features_train)
+    ).all()
+    assert len(refitted.get_recommendations("refit-3", 5)) == 5
+
+
+def test_song_handler_swaps_snapshots(catalog_path):
+    handler = SongHandler(catalog_path)
+    before = handler._snapshot
+    track = _new_track(handler.recommender, 5, "handler-new", "zyzzyva anthem")
+
+    summary = handler.update_catalog(
+        add=[track], remove=[handler.df["track_id"].iloc[7]]
+    )
+
+    assert summary["rows_added"] == 1
+    assert summary["total_rows"] == len(handler.df)
+    assert handler.search_songs("zyzzyva", 5)[0]["track_id"] == "handler-new"
+    assert handler.get_song_by_id("handler-new")["track_name"] == "zyzzyva anthem"
+    assert handler.autocomplete("zyzzyva", 5)[0]["track_id"] == "handler-new"
+    # Readers holding the previous snapshot still see a consistent catalog
+    assert "handler-new" not in before.recommender.track_index
+    assert before.search_index.search("zyzzyva", 5) == []
+
+    assert handler.refit_clusters()
+    assert not handler.refit_clusters()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.clustering import (
+    make_clusterer,
+    nearest_centers,
+    shuffled_batches,
+    sweep_cluster_counts,
+)
+from app.recommendation_model import HybridRecommender
+
+
+def test_shuffled_batches_cover_every_row_each_pass():
+    features = np.arange(10)[:, None]
+    batches = list(shuffled_batches(features, 4, n_passes=2, random_state=0))
+
+    assert [len(b) for b in batches] == [4, 4, 2, 4, 4, 2]
+    assert sorted(np.concatenate(batches[:3]).ravel()) == list(range(10))
+    assert sorted(np.concatenate(batches[3:]).ravel()) == list(range(10))
+
+
+def test_nearest_centers_matches_brute_force():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(1000, 6))
+    centers = rng.normal(size=(7, 6))
+
+    labels, distances = nearest_centers(features, centers, chunk_size=128)
+
+    brute = ((features[:, None, :] - centers[None]) ** 2).sum(axis=2)
+    np.testing.assert_array_equal(labels, brute.argmin(axis=1))
+    np.testing.assert_allclose(distances, brute.min(axis=1), atol=1e-9)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        make_clusterer("dbscan", 8)
+
+
+def test_minibatch_training_mode(catalog_path):
+    recommender = HybridRecommender(
+        n_clusters=12,
+        data_path=catalog_path,
+        clustering="minibatch",
+        minibatch_size=512,
+    )
+
+    assert recommender.cluster_centers.shape == (12, 6)
+    assert len(np.unique(recommender.cluster_labels_train)) == 12
+    assert recommender._hyperparameters()["clustering"] == "minibatch"
+    track_id = recommender.dataset["track_id"].iloc[0]
+    assert len(recommender.get_recommendations(track_id, 5)) == 5
+
+
+def test_sweep_reports_every_configuration(recommender):
+    results = sweep_cluster_counts(
+        recommender.scaled_features_train,
+        [4, 8],
+        batch_size=256,
+        sample_size=500,
+        n_jobs=2,
+    )
+
+    assert [r["n_clusters"] for r in results] == [4, 8]
+    for r in results:
+        assert r["train_seconds"] > 0
+        assert r["peak_memory_mb"] > 0
+        assert -1 <= r["silhouette"] <= 1
+    # More clusters always fit the data at least as tightly
+    assert results[1]["inertia_per_row"] < results[0]["inertia_per_row"]
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from app.scaling import FeatureScaler
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_feature_scaler_matches_standard_scaler():
+    rng = np.random.default_rng(5)
+    features = rng.normal(3.0, 2.0, size=(500, 9))
+    fitted = StandardScaler().fit(features)
+    scaler = FeatureScaler(fitted.mean_, fitted.scale_)
+
+    np.testing.assert_array_equal(
+        scaler.transform(features), fitted.transform(features)
+    )
+    as_float32 = features.astype(np.float32)
+    scaled = scaler.transform(as_float32)
+    assert scaled.dtype == np.float32
+    np.testing.assert_array_equal(scaled, fitted.transform(as_float32))
+
+
+def test_serving_imports_skip_training_and_plotting_dependencies():
+    code = (
+        "import sys, main\n"
+        "loaded = [m for m in ('sklearn', 'matplotlib', 'seaborn') if m in sys.modules]\n"
+        "print(','.join(loaded))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.strip() == ""
+
+
+def test_importing_main_emits_no_user_warnings():
+    completed = subprocess.run(
+        [sys.executable, "-W", "error::UserWarning", "-c", "import main"],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,23 @@
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.recommendation_model import mean_pairwise_cosine_similarity
+
+
+def test_mean_pairwise_cosine_matches_dense_matrix():
+    rng = np.random.default_rng(3)
+    features = rng.normal(size=(400, 6))
+    features[7] = 0.0  # zero rows score 0 against everything
+
+    assert np.isclose(
+        mean_pairwise_cosine_similarity(features),
+        np.mean(cosine_similarity(features)),
+    )
+
+
+def test_evaluate_model_with_sampled_silhouette(recommender):
+    full = recommender.evaluate_model()
+    sampled = recommender.evaluate_model(silhouette_sample_size=200)
+
+    assert sampled["avg_cluster_similarity"] == full["avg_cluster_similarity"]
+    assert abs(sampled["silhouette_score"] - full["silhouette_score"]) < 0.1
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.executor import BoundedExecutor, OverloadedError
+
+
+def test_runs_work_off_the_event_loop():
+    executor = BoundedExecutor(max_workers=2, max_pending=0)
+
+    async def main():
+        return await executor.run(threading.current_thread)
+
+    worker = asyncio.run(main())
+    assert worker is not threading.current_thread()
+    assert worker.name.startswith("scoring")
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+def test_rejects_beyond_workers_and_queue():
+    executor = BoundedExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(OverloadedError):
+            await executor.run(release.wait)
+        assert executor.stats()["in_flight"] == 2
+
+        release.set()
+        await asyncio.gather(running, queued)
+        return await executor.run(lambda: "ok")
+
+    assert asyncio.run(main()) == "ok"
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    executor.shutdown()
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from app.filters import FilterIndex, TrackFilter, bitmap_contains
+
+
+def _expected_rows(df, track_filter):
+    mask = np.ones(len(df), dtype=bool)
+    if track_filter.genres:
+        mask &= df["track_genre"].isin(track_filter.genres).to_numpy()
+    if track_filter.explicit is not None:
+        mask &= (df["explicit"] == track_filter.explicit).to_numpy()
+    if track_filter.keys:
+        mask &= df["key"].isin(track_filter.keys).to_numpy()
+    if track_filter.mode is not None:
+        mask &= (df["mode"] == track_filter.mode).to_numpy()
+    if track_filter.min_popularity is not None:
+        mask &= (df["popularity"] >= track_filter.min_popularity).to_numpy()
+    if track_filter.max_popularity is not None:
+        mask &= (df["popularity"] <= track_filter.max_popularity).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def test_filter_index_matches_column_comparisons(recommender):
+    df = recommender.dataset
+    index = FilterIndex(df)
+    genres = tuple(df["track_genre"].unique()[:2])
+    filters = [
+        TrackFilter(genres=genres),
+        TrackFilter(explicit=False, min_popularity=50),
+        TrackFilter(keys=(0, 7), mode=1),
+        # Bounds inside a popularity band, and a band-aligned range
+        TrackFilter(min_popularity=37, max_popularity=62),
+        TrackFilter(min_popularity=20, max_popularity=39),
+        TrackFilter(genres=genres + ("no-such-genre",), explicit=True, keys=(5,)),
+    ]
+    for track_filter in filters:
+        expected = _expected_rows(df, track_filter)
+        np.testing.assert_array_equal(index.rows(track_filter), expected)
+        in_bitmap = bitmap_contains(index.bitmap(track_filter), np.arange(len(df)))
+        np.testing.assert_array_equal(np.flatnonzero(in_bitmap), expected)
+
+    assert index.rows(TrackFilter()) is None
+    assert len(index.rows(TrackFilter(genres=("no-such-genre",)))) == 0
+
+
+@pytest.mark.parametrize("index", ["brute", "ivf"])
+def test_filtered_recommendations_fill_the_page(recommender, index):
+    track_filter = TrackFilter(explicit=False, keys=(0, 2, 4), min_popularity=30)
+    eligible = set(
+        recommender.dataset["track_id"].iloc[
+            _expected_rows(recommender.dataset, track_filter)
+        ]
+    )
+    seeds = recommender.dataset["track_id"].iloc[:10]
+    try:
+        recommender.set_index(index, n_probe=1)
+        for track_id in seeds:
+            recommendations = recommender.get_recommendations(
+                track_id, 20, track_filter
+            )
+            assert len(recommendations) == 20
+            assert {r["track_id"] for r in recommendations} <= eligible
+            assert track_id not in [r["track_id"] for r in recommendations]
+    finally:
+        recommender.set_index("brute")
+
+
+def test_filtered_cache_does_not_slice_longer_lists(recommender):
+    # A longer page falls back to every eligible row sooner than a short
+    # one, so the cache must not answer limit 10 with a limit-50 list
+    track_filter = TrackFilter(min_popularity=85)
+    seeds = recommender.dataset["track_id"].iloc[:30]
+    try:
+        recommender.set_index("ivf", n_probe=1)
+        for track_id in seeds:
+            recommender.cache.clear()
+            recommender.get_recommendations(track_id, 50, track_filter)
+            warm = recommender.get_recommendations(track_id, 10, track_filter)
+            recommender.cache.clear()
+            cold = recommender.get_recommendations(track_id, 10, track_filter)
+            assert warm == cold
+    finally:
+        recommender.set_index("brute")
+        recommender.cache.clear()
+
+
+def test_filtered_recommendations_rank_like_unfiltered(recommender):
+    track_id = recommender.dataset["track_id"].iloc[3]
+    unfiltered = recommender.get_recommendations(track_id, 50)
+    genre = unfiltered[0]["track_genre"]
+    filtered = recommender.get_recommendations(
+        track_id, 5, TrackFilter(genres=(genre,))
+    )
+    # Eligible rows keep their relative order; the unfiltered page may hold
+    # fewer of them than the filtered one
+    expected = [r["track_id"] for r in unfiltered if r["track_genre"] == genre][:5]
+    assert len(filtered) == 5
+    assert [r["track_id"] for r in filtered][: len(expected)] == expected
+
+
+def test_filter_matching_no_tracks(recommender):
+    track_id = recommender.dataset["track_id"].iloc[0]
+    for track_filter in [
+        TrackFilter(genres=("no-such-genre",)),
+        TrackFilter(min_popularity=80, max_popularity=20),
+    ]:
+        with pytest.raises(ValueError, match="No tracks match the filter"):
+            recommender.get_recommendations(track_id, 5, track_filter)
+    _, scaled_features = recommender._seed(track_id)
+    assert (
+        recommender._get_hybrid_recommendations(
+            scaled_features, 5, [track_id], eligible_rows=np.empty(0, dtype=np.intp)
+        )
+        == []
+    )
@@ -0,0 +1,57 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.http_cache import (
+    CompressionMiddleware,
+    etag_matches,
+    make_etag,
+    negotiate_encoding,
+)
+
+
+def test_etags_and_negotiation():
+    etag = make_etag(("v1", "brute"), "/api/songs/x", b"b=2&a=1", "gzip")
+    assert etag == make_etag(("v1", "brute"), "/api/songs/x", b"a=1&b=2", "gzip")
+    assert etag != make_etag(("v2", "brute"), "/api/songs/x", b"a=1&b=2", "gzip")
+    assert etag != make_etag(("v1", "brute"), "/api/songs/x", b"a=1&b=2", None)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert not etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+
+    def encoding(accept):
+        return negotiate_encoding(Headers({"accept-encoding": accept}))
+
+    assert encoding("gzip, deflate") == "gzip"
+    assert encoding("deflate, gzip;q=0") is None
+    assert encoding("") is None
+
+
+def test_compression_is_deterministic_and_streams():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    lines = [f'{{"row": {i}}}\n'.encode() for i in range(500)]
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(lines), media_type="application/x-ndjson")
+
+    client = TestClient(app)
+    headers = {"Accept-Encoding": "gzip"}
+    assert "content-encoding" not in client.get("/small", headers=headers).headers
+
+    bodies = []
+    for _ in range(2):
+        with client.stream("GET", "/stream", headers=headers) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+            bodies.append(b"".join(response.iter_raw()))
+    assert bodies[0] == bodies[1]
+    assert gzip.decompress(bodies[0]) == b"".join(lines)
@@ -0,0 +1,39 @@
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+def _reference_scores(recommender, scaled_input, input_genre):
+    weights = np.array(
+        [recommender.feature_weights[f] for f in recommender.feature_names]
+    )
+    similarities = cosine_similarity(
+        scaled_input * weights, recommender.scaled_features_train * weights
+    )[0]
+    cluster = recommender.kmeans.predict(scaled_input)[0]
+    cluster_scores = (recommender.kmeans.labels_ == cluster).astype(float)
+    genre_boost = np.where(recommender.train_data["track_genre"] == input_genre, 0.2, 0)
+    return (
+        recommender.cluster_weight * cluster_scores
+        + recommender.content_weight * similarities
+        + genre_boost
+    )
+
+
+def test_precomputed_scores_match_reference(recommender):
+    for row in [0, 17, 423]:
+        song = recommender.test_data.iloc[[row]]
+        scaled_input = recommender.scaler.transform(song[recommender.feature_names])
+        genre = song["track_genre"].iloc[0]
+
+        scores = recommender._score_train_rows(scaled_input, genre)
+
+        assert scores.shape == (len(recommender.train_data),)
+        np.testing.assert_allclose(
+            scores, _reference_scores(recommender, scaled_input, genre), atol=1e-5
+        )
+
+
+def test_scoring_state_is_compact(recommender):
+    assert recommender.weighted_features_train.dtype == np.float32
+    norms = np.linalg.norm(recommender.weighted_features_train, axis=1)
+    np.testing.assert_allclose(norms, 1.0, atol=1e-5)
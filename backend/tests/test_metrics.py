@@ -0,0 +1,48 @@
+from app import metrics
+from app.metrics import Histogram, SlowRequestProfiler, render_stats, span, trace
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("t_seconds", "Test", labelnames=("stage",), buckets=(0.1, 1))
+    for value in [0.05, 0.5, 0.5, 5]:
+        histogram.observe(value, "scoring")
+
+    lines = histogram.render()
+    assert 't_seconds_bucket{stage="scoring",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="scoring",le="1"} 3' in lines
+    assert 't_seconds_bucket{stage="scoring",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="scoring"} 4' in lines
+    assert 't_seconds_sum{stage="scoring"} 6.05' in lines
+
+
+def test_render_stats_marks_counters():
+    lines = render_stats("c", {"entries": 3, "hits": 7}, counters=["hits"])
+    assert lines == [
+        "# TYPE c_entries gauge",
+        "c_entries 3",
+        "# TYPE c_hits_total counter",
+        "c_hits_total 7",
+    ]
+
+
+def test_spans_accumulate_into_the_current_trace(monkeypatch):
+    reports = []
+    monkeypatch.setattr(
+        metrics, "profiler", SlowRequestProfiler(1e-6, 1.0, hook=reports.append)
+    )
+    with span("outside"):  # no active trace: not recorded
+        pass
+    with trace("recommendations") as current:
+        for _ in range(2):
+            with span("similarity"):
+                sum(range(1000))
+        with trace("nested") as inner:
+            assert inner is current
+
+    assert list(current.stages) == ["similarity"]
+    assert reports[0]["operation"] == "recommendations"
+    assert "similarity" in reports[0]["stages_ms"]
+    assert "function calls" in reports[0]["profile"]
+    rendered = "\n".join(metrics.render_histograms())
+    assert 'operation="recommendations",stage="similarity"' in rendered
+    assert 'stage="outside"' not in rendered
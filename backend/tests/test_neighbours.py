@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from app.neighbours import NeighbourTable, build_neighbour_table
+from app.recommendation_model import HybridRecommender
+from app.song_handler import SongHandler
+
+
+@pytest.fixture(scope="module")
+def table_recommender(catalog_path, tmp_path_factory):
+    artifact_dir = str(tmp_path_factory.mktemp("artifacts"))
+    recommender = HybridRecommender(
+        data_path=catalog_path,
+        artifact_dir=artifact_dir,
+        cache_size=0,
+        n_neighbours=20,
+    )
+    assert recommender.neighbour_table is None
+    build_neighbour_table(recommender, n_neighbours=20, n_jobs=2, block_size=128)
+    assert recommender.load_neighbour_table()
+    return recommender
+
+
+def _live(recommender, track_id, limit):
+    table, recommender.neighbour_table = recommender.neighbour_table, None
+    try:
+        return recommender.get_recommendations(track_id, limit)
+    finally:
+        recommender.neighbour_table = table
+
+
+def test_table_matches_live_scoring(table_recommender, monkeypatch):
+    table = table_recommender.neighbour_table
+    assert table.rows.dtype == np.int32 and table.scores.dtype == np.float16
+    assert table.rows.shape == (len(table_recommender.track_index), 20)
+
+    # Seeds from both partitions, including duplicated track_ids
+    track_ids = table_recommender.dataset["track_id"]
+    seeds = list(track_ids.iloc[:30]) + list(track_ids[track_ids.duplicated()][:10])
+    live = {track_id: _live(table_recommender, track_id, 10) for track_id in seeds}
+
+    def no_live_scoring(*args, **kwargs):
+        raise AssertionError("served by live scoring")
+
+    monkeypatch.setattr(
+        table_recommender, "_get_hybrid_recommendations", no_live_scoring
+    )
+    for track_id in seeds:
+        served = table_recommender.get_recommendations(track_id, 10)
+        assert [r["track_id"] for r in served] == [
+            r["track_id"] for r in live[track_id]
+        ]
+        assert [r["similarity_score"] for r in served] == pytest.approx(
+            [r["similarity_score"] for r in live[track_id]], abs=1e-3
+        )
+
+
+def test_limits_beyond_the_table_fall_back(table_recommender):
+    track_id = table_recommender.dataset["track_id"].iloc[5]
+    served = table_recommender.get_recommendations(track_id, 50)
+
+    assert served == _live(table_recommender, track_id, 50)
+
+
+def test_reloads_with_the_model(table_recommender, catalog_path):
+    reloaded = HybridRecommender(
+        data_path=catalog_path,
+        artifact_dir=table_recommender.artifact_dir,
+        n_neighbours=20,
+    )
+    assert reloaded.neighbour_table is not None
+    assert NeighbourTable.load(reloaded.artifact_dir, "missing") is None
+
+
+def test_song_handler_serves_a_table_of_any_size(table_recommender, catalog_path):
+    handler = SongHandler(
+        catalog_path, artifact_dir=table_recommender.artifact_dir, n_neighbours=20
+    )
+    assert handler.recommender.neighbour_table.n_neighbours == 20
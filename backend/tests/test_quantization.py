@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from app.quantization import QuantizedFeatures
+
+
+@pytest.mark.parametrize("mode, tolerance", [("float16", 2e-3), ("int8", 2e-2)])
+def test_quantized_dot_approximates_full_precision(mode, tolerance):
+    rng = np.random.default_rng(11)
+    features = rng.normal(size=(5000, 6)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    features[:, 5] = 0.25  # A constant feature decodes exactly
+    queries = features[:3]
+    quantized = QuantizedFeatures(features, mode, block_rows=1000)
+
+    assert quantized.codes.dtype == mode
+    assert quantized.codes.nbytes == features.nbytes // (2 if mode == "float16" else 4)
+    np.testing.assert_allclose(
+        quantized.dot(queries), queries @ features.T, atol=tolerance
+    )
+    rows = np.array([4999, 7, 1200])
+    np.testing.assert_allclose(
+        quantized.dot(queries, rows), queries @ features[rows].T, atol=tolerance
+    )
+    with pytest.raises(ValueError):
+        QuantizedFeatures(features, "int4")
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_quantized_scoring_matches_full_precision_rankings(recommender, mode):
+    seeds = recommender.dataset["track_id"].iloc[:20].tolist()
+    try:
+        recommender.set_quantization(mode)
+        agreement = recommender.rank_agreement(seeds, 10)
+        quantized_batch = recommender.get_recommendations_batch(seeds, 10)
+    finally:
+        recommender.set_quantization("float32")
+    exact_batch = recommender.get_recommendations_batch(seeds, 10)
+
+    # The shortlist is rescored in full precision, so the rankings agree
+    assert agreement["quantization"] == mode
+    assert agreement["exact_match"] == 1.0
+    assert agreement["scan_bytes"] < agreement["full_precision_bytes"]
+    for track_id in seeds:
+        assert [r["track_id"] for r in quantized_batch[track_id]] == [
+            r["track_id"] for r in exact_batch[track_id]
+        ]
+
+
+class _NoisyScan:
+    """A deliberately crude quantized scan: exact scores plus per-row noise"""
+
+    def __init__(self, features):
+        self.features = features
+        rng = np.random.default_rng(0)
+        self.noise = rng.normal(scale=0.05, size=len(features)).astype(np.float32)
+
+    def dot(self, queries, rows=None):
+        rows = slice(None) if rows is None else rows
+        return (
+            np.asarray(queries, np.float32) @ self.features[rows].T + self.noise[rows]
+        )
+
+
+@pytest.mark.parametrize("index", ["brute", "ivf", "cluster"])
+def test_quantized_batch_matches_single_requests(recommender, index):
+    # With a crude scan the shortlist decides the result, so both paths
+    # must rescore shortlists of the same size and probe the same rows
+    track_ids = recommender.dataset["track_id"]
+    seeds = list(track_ids.iloc[:150]) + list(track_ids[track_ids.duplicated()][:10])
+    seeds = list(dict.fromkeys(seeds))
+    try:
+        recommender.set_index(index, n_probe=1)
+        recommender.quantized_features = _NoisyScan(recommender.weighted_features_train)
+        batch = recommender.get_recommendations_batch(seeds, 10)
+        single = {}
+        for track_id in seeds:
+            song, scaled_features = recommender._seed(track_id)
+            single[track_id] = recommender._get_hybrid_recommendations(
+                scaled_features, 10, [track_id], song
+            )
+    finally:
+        recommender.set_quantization("float32")
+        recommender.set_index("brute")
+    for track_id in seeds:
+        assert [r["track_id"] for r in batch[track_id]] == [
+            r["track_id"] for r in single[track_id]
+        ]
+        np.testing.assert_allclose(
+            [r["similarity_score"] for r in batch[track_id]],
+            [r["similarity_score"] for r in single[track_id]],
+            atol=1e-5,
+        )
+
+
+def test_quantized_cache_does_not_slice_longer_lists(recommender):
+    # A longer list shortlists more rows, so its top 10 can differ from a
+    # limit-10 request's; the cache must not answer one with the other
+    seeds = recommender.dataset["track_id"].iloc[:60].tolist()
+    try:
+        recommender.set_quantization("int8")
+        recommender.quantized_features = _NoisyScan(recommender.weighted_features_train)
+        for track_id in seeds:
+            recommender.cache.clear()
+            recommender.get_recommendations(track_id, 50)
+            warm = recommender.get_recommendations(track_id, 10)
+            recommender.cache.clear()
+            cold = recommender.get_recommendations(track_id, 10)
+            assert warm == cold
+        # Repeating the same limit is still served from the cache
+        hits = recommender.cache.stats()["hits"]
+        assert recommender.get_recommendations(seeds[-1], 10) == cold
+        assert recommender.cache.stats()["hits"] == hits + 1
+    finally:
+        recommender.set_quantization("float32")
+        recommender.cache.clear()
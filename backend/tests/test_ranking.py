@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.ranking import top_k_indices
+
+
+def _legacy_ranking(recommender, scores, exclude_id, k):
+    """Ranking stage as _get_hybrid_recommendations implemented it originally"""
+    scores = scores.astype(np.float64)
+    scores = (scores - scores.min()) / (scores.max() - scores.min() + 1e-6)
+    scores = scores * ~recommender.train_data["track_id"].isin([exclude_id]).to_numpy()
+    top = np.argsort(scores, kind="stable")[::-1][:k]
+    return [recommender.train_data["track_id"].iloc[i] for i in top if scores[i] > 0.1]
+
+
+@pytest.mark.parametrize("k", [1, 5, 10, 50])
+def test_top_k_matches_full_argsort(k):
+    rng = np.random.default_rng(k)
+    # Rounding forces plenty of ties
+    scores = rng.random(5000).round(2)
+    expected = np.argsort(scores, kind="stable")[::-1][:k]
+    np.testing.assert_array_equal(top_k_indices(scores, k), expected)
+
+
+def test_top_k_edge_cases():
+    scores = np.array([0.3, 0.9, 0.1])
+    np.testing.assert_array_equal(top_k_indices(scores, 10), [1, 0, 2])
+    assert len(top_k_indices(scores, 0)) == 0
+    assert len(top_k_indices(np.array([]), 5)) == 0
+
+
+@pytest.mark.parametrize("k", [5, 20])
+def test_recommendation_order_unchanged(recommender, k):
+    for row in [0, 3, 99, 250]:
+        song = recommender.train_data.iloc[row]
+        track_id = song["track_id"]
+        scaled_input = recommender.scaler.transform(
+            recommender.train_data.iloc[[row]][recommender.feature_names]
+        )
+        raw_scores = recommender._score_train_rows(scaled_input, song["track_genre"])
+
+        recommendations = recommender._get_hybrid_recommendations(
+            scaled_input, k, exclude_ids=[track_id], input_song=song
+        )
+
+        assert [r["track_id"] for r in recommendations] == _legacy_ranking(
+            recommender, raw_scores, track_id, k
+        )
+        assert track_id not in {r["track_id"] for r in recommendations}
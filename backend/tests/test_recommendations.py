@@ -1,20 +1,178 @@
-import requests
-import time
-import subprocess
+import importlib
+import json
+
 import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import make_catalog
+
+
+@pytest.fixture(scope="module")
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        yield monkeypatch
+
 
-@pytest.fixture(scope="session", autouse=True)
-def start_server():
-    process = subprocess.Popen(["python", "app.py"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    time.sleep(5)
-    yield
-    process.terminate()
-
-def test_recommendations_endpoint():
-    track_id = "3GZD6HmiNUhxXYf8Gch723"
-    url = f"http://127.0.0.1:8000/api/songs/recommendations/{track_id}"
-    response = requests.get(url)
+@pytest.fixture(scope="module")
+def client(tmp_path_factory, monkeypatch_module):
+    data = tmp_path_factory.mktemp("api")
+    catalog = make_catalog(2000, seed=3)
+    catalog.to_csv(data / "catalog.csv", index=False)
+    # main reads its configuration from the environment at import time
+    monkeypatch_module.setenv("PREDICTIFY_CATALOG", str(data / "catalog.csv"))
+    monkeypatch_module.setenv("PREDICTIFY_ARTIFACT_DIR", str(data / "artifacts"))
+    main = importlib.import_module("main")
+    with TestClient(main.app) as client:
+        client.track_id = catalog["track_id"].iloc[0]
+        yield client
+
+
+def test_recommendations_endpoint(client):
+    response = client.get(f"/api/songs/recommendations/{client.track_id}")
     assert response.status_code == 200
     data = response.json()
     assert "songs" in data
     assert len(data["songs"]) > 0
+    assert client.track_id not in [song["track_id"] for song in data["songs"]]
+
+
+def test_unknown_track_is_not_found(client):
+    assert client.get("/api/songs/recommendations/missing").status_code == 404
+    assert client.get("/api/songs/missing").status_code == 404
+
+
+def test_song_and_search_endpoints(client):
+    song = client.get(f"/api/songs/{client.track_id}").json()
+    assert song["track_id"] == client.track_id
+
+    results = client.get("/api/songs/search", params={"q": song["track_name"]}).json()
+    assert client.track_id in [s["track_id"] for s in results["songs"]]
+
+
+def test_metrics_endpoint(client):
+    client.get(f"/api/songs/recommendations/{client.track_id}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'stage="similarity"' in text
+    assert 'route="/api/songs/recommendations/{track_id}"' in text
+    assert "predictify_cache_hits_total" in text
+    assert "predictify_executor_queued" in text
+
+
+def test_filtered_endpoints(client):
+    params = {"explicit": "false", "min_popularity": 40, "key": [0, 5, 9]}
+    response = client.get(
+        f"/api/songs/recommendations/{client.track_id}",
+        params={**params, "limit": 15},
+    )
+    assert response.status_code == 200
+    songs = response.json()["songs"]
+    assert len(songs) == 15
+    for song in songs:
+        assert not song["explicit"]
+        assert song["popularity"] >= 40
+        assert song["key"] in (0, 5, 9)
+
+    songs = client.get(
+        "/api/songs/search", params={**params, "q": "love", "limit": 50}
+    ).json()["songs"]
+    assert songs
+    assert all(not s["explicit"] and s["popularity"] >= 40 for s in songs)
+
+    assert (
+        client.get("/api/songs/search", params={"q": "th", "mode": 3}).status_code
+        == 422
+    )
+
+    response = client.get(
+        f"/api/songs/recommendations/{client.track_id}",
+        params={"min_popularity": 80, "max_popularity": 20},
+    )
+    assert response.status_code == 404
+    assert "No tracks match the filter" in response.json()["detail"]
+
+
+def test_conditional_requests(client, monkeypatch):
+    url = f"/api/songs/recommendations/{client.track_id}"
+    response = client.get(url, params={"limit": 5})
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert client.get(url, params={"limit": 6}).headers["etag"] != etag
+    assert client.get(url, params={"limit": 5}).headers["etag"] == etag
+
+    # A matching tag is answered before the handler is reached
+    main = importlib.import_module("main")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("SongHandler was called")
+
+    monkeypatch.setattr(main.song_handler, "get_recommendations", fail)
+    not_modified = client.get(
+        url, params={"limit": 5}, headers={"If-None-Match": f'W/"x", {etag}'}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    missing = client.get("/api/songs/missing")
+    assert missing.status_code == 404
+    assert "etag" not in missing.headers
+
+    # "*" is only answered with 304 for a resource that exists
+    any_tag = {"If-None-Match": "*"}
+    missing = client.get("/api/songs/missing", headers=any_tag)
+    assert missing.status_code == 404
+    assert "etag" not in missing.headers
+    song = client.get(f"/api/songs/{client.track_id}", headers=any_tag)
+    assert song.status_code == 304
+    assert song.content == b""
+    assert song.headers["etag"]
+
+
+def test_batch_responses_are_compressed(client):
+    seeds = client.get("/api/songs/search", params={"q": "love", "limit": 20}).json()
+    request = {"track_ids": [s["track_id"] for s in seeds["songs"]], "limit": 10}
+    url = "/api/songs/recommendations/batch"
+
+    compressed = client.post(url, json=request, headers={"Accept-Encoding": "gzip"})
+    identity = client.post(url, json=request, headers={"Accept-Encoding": "identity"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert int(compressed.headers["content-length"]) < len(identity.content) / 2
+    assert compressed.json() == identity.json()
+
+
+def test_export_endpoints(client, monkeypatch):
+    assert client.get("/api/export/catalog").status_code == 403
+
+    main = importlib.import_module("main")
+    monkeypatch.setattr(main, "export_enabled", True)
+    response = client.get("/api/export/catalog", params={"chunk_size": 500})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-encoding"] == "gzip"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    cursors = [line["cursor"] for line in lines if "cursor" in line]
+    assert len(lines) - len(cursors) == 2000
+    assert cursors[-1] is None
+
+    url = "/api/export/recommendations"
+    params = {"limit": 3, "chunk_size": 500}
+    lines = client.get(url, params=params).text.splitlines()
+    records = [line for line in lines if not line.startswith('{"cursor":')]
+    assert len(records) == len(set(json.loads(r)["track_id"] for r in records))
+    assert json.loads(records[0])["recommendations"]
+
+    # Resuming after the second chunk yields the rest of the export
+    resume_from = [line for line in lines if line.startswith('{"cursor":')][1]
+    params["cursor"] = json.loads(resume_from)["cursor"]
+    resumed = client.get(url, params=params).text.splitlines()
+    assert resumed == lines[lines.index(resume_from) + 1 :]
+
+    stale = cursors[0].replace(cursors[0][0], "x", 1)
+    assert (
+        client.get("/api/export/catalog", params={"cursor": stale}).status_code == 409
+    )
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from app.search_index import SearchIndex
+from benchmarks.synthetic import make_catalog
+
+COLUMNS = ["track_name", "artists", "album_name"]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    df = make_catalog(5000, seed=11)
+    df.loc[3, "track_name"] = "Ünïcode Ballad"
+    df.loc[4, "artists"] = "AC/DC;Queen"
+    return df
+
+
+@pytest.fixture(scope="module")
+def index(catalog):
+    return SearchIndex(catalog, COLUMNS)
+
+
+def _scan(df, query, limit):
+    query = query.lower()
+    mask = False
+    for column in COLUMNS:
+        mask = mask | df[column].str.lower().str.contains(query, regex=False)
+    return list(df.index[mask][:limit])
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["lo", "LOVE", "night sky", "e 1", "12", "ünï", "ac/dc", "dc;q", "zzzz", "k"],
+)
+@pytest.mark.parametrize("limit", [1, 10, 100])
+def test_search_matches_column_scan(catalog, index, query, limit):
+    assert index.search(query, limit) == _scan(catalog, query, limit)
+
+
+def test_matches_never_span_fields():
+    df = pd.DataFrame(
+        {"track_name": ["abc"], "artists": ["def"], "album_name": ["ghi"]}
+    )
+    index = SearchIndex(df, COLUMNS)
+    assert index.search("cd", 10) == []
+    assert index.search("bc", 10) == [0]
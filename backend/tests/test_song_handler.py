@@ -0,0 +1,44 @@
+import pytest
+
+from app.catalog import gather_records
+from app.song_handler import SongHandler
+
+
+@pytest.fixture(scope="module")
+def song_handler(catalog_path):
+    return SongHandler(catalog_path)
+
+
+def test_handler_and_recommender_share_catalog(song_handler):
+    assert song_handler.recommender.dataset is song_handler.df
+    assert song_handler.track_index is song_handler.recommender.track_index
+
+
+def test_get_song_by_id(song_handler):
+    track_id = song_handler.df["track_id"].iloc[42]
+    song = song_handler.get_song_by_id(track_id)
+
+    assert song["track_id"] == track_id
+    assert song["danceability"] == float(str(song_handler.df["danceability"].iloc[42]))
+    with pytest.raises(ValueError):
+        song_handler.get_song_by_id("missing")
+
+
+def test_search_and_recommendations(song_handler):
+    track_name = song_handler.df["track_name"].iloc[0]
+    results = song_handler.search_songs(track_name.upper(), 5)
+    assert results[0]["track_name"] == track_name
+
+    track_id = song_handler.df["track_id"].iloc[0]
+    recommendations = song_handler.get_recommendations(track_id, 5)
+    assert len(recommendations) == 5
+    assert track_id not in {r["track_id"] for r in recommendations}
+
+    # Recommendations carry the full catalog row, not just the scored features
+    for recommendation in recommendations:
+        rows = gather_records(
+            song_handler.df,
+            song_handler.track_index.positions(recommendation["track_id"]),
+        )
+        song = {k: v for k, v in recommendation.items() if k != "similarity_score"}
+        assert song in rows
@@ -0,0 +1,46 @@
+import numpy as np
+
+from app.track_index import TrackIndex
+
+
+def test_duplicates_resolve_to_first_occurrence():
+    index = TrackIndex(["a", "b", "a", "c", "b"])
+
+    assert len(index) == 3
+    assert index.get("a") == 0
+    assert index.get("b") == 1
+    assert index.get("missing") is None
+    assert "c" in index and "missing" not in index
+    np.testing.assert_array_equal(index.positions("b"), [1, 4])
+    assert len(index.positions("missing")) == 0
+
+
+def test_partition_rows():
+    # Catalog rows 3, 0, 4 are train rows 0, 1, 2; rows 2, 1 are test rows 0, 1
+    index = TrackIndex(["a", "b", "a", "c", "b"], [3, 0, 4], [2, 1])
+
+    np.testing.assert_array_equal(index.partition, [0, 1, 1, 0, 0])
+    np.testing.assert_array_equal(index.partition_row, [1, 1, 0, 0, 2])
+    np.testing.assert_array_equal(
+        index.partition_rows(["a", "b"], TrackIndex.TRAIN), [1, 2]
+    )
+    np.testing.assert_array_equal(
+        index.partition_rows(["a", "b"], TrackIndex.TEST), [0, 1]
+    )
+
+
+def test_recommender_lookup_matches_scan(recommender):
+    dataset = recommender.dataset
+    for track_id in dataset["track_id"].iloc[[0, 10, -1]]:
+        position = recommender.track_index.get(track_id)
+        assert position == np.flatnonzero(dataset["track_id"] == track_id)[0]
+
+        row = recommender.track_index.partition_row[position]
+        if recommender.track_index.partition[position] == TrackIndex.TRAIN:
+            assert recommender.train_data["track_id"].iloc[row] == track_id
+        else:
+            assert recommender.test_data["track_id"].iloc[row] == track_id
+
+    duplicated = dataset["track_id"][dataset["track_id"].duplicated()].iloc[0]
+    recommendations = recommender.get_recommendations(duplicated, 10)
+    assert duplicated not in {r["track_id"] for r in recommendations}
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from app.catalog import convert_to_columnar, iter_feature_chunks, load_catalog
+from app.recommendation_model import HybridRecommender
+
+FEATURES = ["danceability", "energy", "valence"]
+
+
+def test_feature_chunks_match_loaded_catalog(catalog_path, tmp_path):
+    expected = load_catalog(catalog_path)[FEATURES].to_numpy(np.float32)
+    columnar = convert_to_columnar(catalog_path, str(tmp_path / "columns"))
+
+    for path in [catalog_path, columnar]:
+        chunks = list(iter_feature_chunks(path, FEATURES, chunk_size=700))
+        assert [len(c) for c in chunks][:2] == [700, 700]
+        np.testing.assert_array_equal(np.vstack(chunks), expected)
+
+
+def test_chunked_training_serves_memory_mapped_artifact(catalog_path, tmp_path):
+    def train(chunk_size):
+        return HybridRecommender(
+            data_path=catalog_path,
+            artifact_dir=str(tmp_path / f"chunks{chunk_size}"),
+            clustering="minibatch",
+            training="chunked",
+            chunk_size=chunk_size,
+        )
+
+    small, large = train(256), train(5000)
+    assert small.model_version == large.model_version
+    np.testing.assert_array_equal(small.train_positions, large.train_positions)
+    np.testing.assert_allclose(small.scaler.mean_, large.scaler.mean_)
+
+    train_rows = small.dataset.iloc[small.train_positions][small.feature_names]
+    np.testing.assert_allclose(small.scaler.mean_, train_rows.mean(), rtol=1e-5)
+    for name in ["scaled_features_train", "weighted_features_train"]:
+        matrix = getattr(small, name)
+        assert isinstance(matrix, np.memmap) and matrix.dtype == np.float32
+    assert len(small.train_data) + len(small.test_data) == len(small.dataset)
+
+    track_id = small.dataset["track_id"].iloc[0]
+    recommendations = small.get_recommendations(track_id, 5)
+    assert len(recommendations) == 5
+    assert track_id not in [r["track_id"] for r in recommendations]
+
+
+def test_chunked_training_requires_artifact_dir(catalog_path):
+    with pytest.raises(ValueError):
+        HybridRecommender(
+            data_path=catalog_path, clustering="minibatch", training="chunked"
+        )